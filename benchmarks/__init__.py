@@ -0,0 +1,3 @@
+"""
+Benchmark riproducibili dei backend FBref (fixture sintetica, nessuna rete)
+"""
@@ -0,0 +1,279 @@
+"""
+Benchmark del servizio player-stats su tabelle FBref sintetiche (nessuna rete)
+
+    python -m benchmarks.bench_service                 # esegue e confronta con la baseline
+    python -m benchmarks.bench_service --save          # aggiorna benchmarks/baseline.json
+    python -m benchmarks.bench_service --check         # exit 1 se uno scenario regredisce o manca dalla baseline
+
+Per ogni scenario riporta p50/p99 in ms, throughput (operazioni/s) e picco di
+memoria allocata (tracemalloc) durante lo scenario
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from pathlib import Path
+from urllib.parse import quote
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Uno scenario è più lento della baseline se p50 supera questo rapporto
+REGRESSION_RATIO = 1.5
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[position]
+
+
+def measure(op, iterations, warmup=5, setup=None, memory_iterations=20):
+    """Esegue op(i) iterations volte; setup() prima di ogni chiamata, fuori dal tempo misurato"""
+    for i in range(warmup):
+        if setup:
+            setup()
+        op(i)
+
+    timings = []
+    for i in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter_ns()
+        op(i)
+        timings.append(time.perf_counter_ns() - start)
+
+    # Picco di memoria su un giro separato: tracemalloc rallenta le allocazioni
+    tracemalloc.start()
+    try:
+        for i in range(min(iterations, memory_iterations)):
+            if setup:
+                setup()
+            op(i)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    total_s = sum(timings) / 1e9
+    return {
+        "iterations": iterations,
+        "p50_ms": round(_percentile(timings, 0.50) / 1e6, 4),
+        "p99_ms": round(_percentile(timings, 0.99) / 1e6, 4),
+        "mean_ms": round(total_s * 1000 / iterations, 4),
+        "throughput_ops": round(iterations / total_s, 1) if total_s else None,
+        "peak_kib": round(peak / 1024, 1)
+    }
+
+
+def build_app(preset, players, workdir):
+    """App Flask del preset caricata da uno snapshot scritto con le tabelle sintetiche"""
+    os.environ["FBREF_SNAPSHOT_DIR"] = str(Path(workdir) / "snapshot")
+    os.environ["FBREF_REFRESH_HOURS"] = "0"
+    os.environ["FBREF_LISTONE_PATH"] = str(Path(workdir) / "listone.xlsx")
+
+    from fbref_core import save_snapshot
+    from fbref_core.app import create_app
+    from benchmarks.fixture import make_tables
+
+    tables = make_tables(players)
+    save_snapshot(tables)
+    return create_app(preset), tables
+
+
+def scenarios(app, tables, queries, iterations):
+    """(nome, funzione che esegue lo scenario) nell'ordine del report"""
+    from fbref_core import FBrefDataset
+
+    service = app.extensions['fbref_service']
+    client = app.test_client()
+    clear = service.cache.clear
+
+    def lookup(name):
+        items = queries[name]
+        return lambda i: service.get_player_stats(*items[i % len(items)])
+
+    def warm(name):
+        for item in queries[name]:
+            service.get_player_stats(*item)
+
+    def route(name, conditional=False):
+        items = queries[name]
+        etags = {}
+
+        def op(i):
+            player, team = items[i % len(items)]
+            url = f"/api/player-stats/{quote(player)}" + (f"?team={quote(team)}" if team else "")
+            # Rivalidazione del browser: If-None-Match con l'ETag della risposta precedente
+            headers = {"If-None-Match": etags[url]} if conditional and url in etags else None
+            response = client.get(url, headers=headers)
+            if conditional and response.status_code == 200:
+                etags[url] = response.headers["ETag"]
+        return op
+
+    roster = [{"name": player, "team": team} for player, team in queries["listone"][:32]]
+    listone = queries["listone"]
+
+    def listone_sweep(i):
+        for player, team in listone:
+            service.get_player_stats(player, team)
+
+    yield "service_exact_cold", lambda: measure(lookup("exact"), iterations, setup=clear)
+    yield "service_abbreviated_cold", lambda: measure(lookup("abbreviated"), iterations, setup=clear)
+    yield "service_misspelled_cold", lambda: measure(lookup("misspelled"), iterations, setup=clear)
+    yield "service_unknown_cold", lambda: measure(lookup("unknown"), iterations, setup=clear)
+
+    def warm_scenario(name):
+        clear()
+        warm(name)
+        return measure(lookup(name), iterations)
+
+    yield "service_exact_warm", lambda: warm_scenario("exact")
+    yield "service_unknown_warm", lambda: warm_scenario("unknown")
+
+    yield "route_player_stats_cold", lambda: measure(route("exact"), iterations, setup=clear)
+
+    def route_warm():
+        clear()
+        warm("exact")
+        return measure(route("exact"), iterations)
+
+    yield "route_player_stats_warm", route_warm
+
+    def route_not_modified():
+        clear()
+        warm("exact")
+        return measure(route("exact", conditional=True), iterations, warmup=len(queries["exact"]))
+
+    yield "route_player_stats_304", route_not_modified
+    yield "route_batch_32_cold", lambda: measure(
+        lambda i: client.post("/api/player-stats/batch", json={"players": roster}),
+        max(10, iterations // 20), setup=clear
+    )
+    yield "route_batch_32_fields", lambda: measure(
+        lambda i: client.post("/api/player-stats/batch", json={"players": roster, "fields": ["generale", "tiri"]}),
+        max(10, iterations // 20), setup=clear
+    )
+    yield "route_players_query", lambda: measure(
+        lambda i: client.get("/api/players?min_minuti=900&sort=gol_assist_90&limit=50"), iterations
+    )
+    yield "route_players_similar", lambda: measure(
+        lambda i: client.get(f"/api/players/{roster[i % len(roster)]['name']}/similar",
+                             query_string={"team": roster[i % len(roster)]["team"], "k": 10, "min_fvm": 1}),
+        iterations
+    )
+    yield "listone_sweep_500_cold", lambda: measure(listone_sweep, max(3, iterations // 100), warmup=1, setup=clear,
+                                                    memory_iterations=1)
+    yield "dataset_build", lambda: measure(lambda i: FBrefDataset(tables, platform=service.config.platform),
+                                           max(3, iterations // 200), warmup=1, memory_iterations=1)
+
+
+def compare(results, baseline):
+    """Righe di confronto con la baseline, scenari regrediti e scenari senza baseline"""
+    lines = []
+    regressions = []
+    missing = []
+    for name, current in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous or not previous.get("p50_ms"):
+            lines.append(f"   {name:<28} (nuovo, manca dalla baseline)")
+            missing.append(name)
+            continue
+        ratio = current["p50_ms"] / previous["p50_ms"]
+        flag = ""
+        if ratio > REGRESSION_RATIO:
+            flag = "  ⚠️ REGRESSIONE"
+            regressions.append(name)
+        lines.append(f"   {name:<28} p50 {previous['p50_ms']:>9.3f} -> {current['p50_ms']:>9.3f} ms  x{ratio:.2f}{flag}")
+    return lines, regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del servizio FBref player-stats")
+    parser.add_argument("--preset", default="railway", help="preset del servizio (railway, oracle)")
+    parser.add_argument("--players", type=int, default=600, help="giocatori nella fixture")
+    parser.add_argument("--iterations", type=int, default=1000, help="iterazioni per scenario")
+    parser.add_argument("--only", nargs="+", help="esegue solo gli scenari indicati")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save", action="store_true", help="salva i risultati come nuova baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 se uno scenario regredisce o manca dalla baseline")
+    parser.add_argument("--with-logging", action="store_true", help="misura anche il costo dei log per richiesta")
+    args = parser.parse_args()
+
+    # Di default i log per richiesta non vengono misurati; con --with-logging
+    # si usa la configurazione di produzione (FBREF_LOG_FORMAT, FBREF_LOG_SAMPLE)
+    if args.with_logging:
+        from fbref_core import configure_logging
+        configure_logging()
+    else:
+        logging.disable(logging.WARNING)
+
+    from benchmarks.fixture import query_sets
+
+    with tempfile.TemporaryDirectory(prefix="fbref-bench-") as workdir:
+        start = time.perf_counter()
+        app, tables = build_app(args.preset, args.players, workdir)
+        boot_s = time.perf_counter() - start
+        queries = query_sets(tables)
+
+        print(f"⏱️  Benchmark {args.preset}: {len(tables['standard'])} righe, avvio da snapshot {boot_s:.2f}s")
+        results = {}
+        for name, run in scenarios(app, tables, queries, args.iterations):
+            if args.only and name not in args.only:
+                continue
+            results[name] = run()
+            r = results[name]
+            print(f"   {name:<28} p50 {r['p50_ms']:>9.3f} ms  p99 {r['p99_ms']:>9.3f} ms  "
+                  f"{r['throughput_ops']:>10.1f} op/s  picco {r['peak_kib']:>9.1f} KiB")
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "preset": args.preset,
+        "players": args.players,
+        "iterations": args.iterations,
+        "boot_s": round(boot_s, 3),
+        "max_rss_mib": _max_rss_mib(),
+        "scenarios": results
+    }
+    print(f"📈 RSS massimo del processo: {report['max_rss_mib']} MiB")
+
+    baseline_path = Path(args.baseline)
+    regressions = []
+    missing = [] if args.save else list(results)
+    if baseline_path.exists() and not args.save:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        print(f"📊 Confronto con la baseline del {baseline.get('created_at')}:")
+        lines, regressions, missing = compare(results, baseline)
+        print("\n".join(lines))
+
+    if args.save:
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"💾 Baseline salvata in {baseline_path}")
+
+    if args.check and missing:
+        # Uno scenario senza baseline non è verificato: va salvata una baseline aggiornata
+        print(f"⚠️ Scenari senza baseline: {', '.join(missing)} (eseguire con --save)")
+    if args.check and (regressions or missing):
+        sys.exit(1)
+
+
+def _max_rss_mib():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss è in KiB su Linux, in byte su macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+if __name__ == "__main__":
+    main()
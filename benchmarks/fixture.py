@@ -0,0 +1,196 @@
+"""
+Tabelle FBref sintetiche per i benchmark (nessun accesso alla rete)
+Stesso MultiIndex (league, season, team, player) e stesse colonne a tuple
+di soccerdata, generate in modo deterministico da un seed
+"""
+
+import random
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+LEAGUE = "ITA-Serie A"
+SEASON = "2425"
+
+TEAMS = [
+    "Inter", "Juventus", "Milan", "Napoli", "Roma", "Lazio", "Atalanta", "Fiorentina",
+    "Bologna", "Torino", "Genoa", "Udinese", "Lecce", "Cagliari", "Empoli", "Hellas Verona",
+    "Parma", "Como", "Venezia", "Monza"
+]
+
+# Giocatori reali usati dagli scenari con nomi abbreviati del listone
+KNOWN_PLAYERS = [
+    ("Lautaro Martínez", "Inter"), ("Marcus Thuram", "Inter"), ("Dušan Vlahović", "Juventus"),
+    ("Kenan Yıldız", "Juventus"), ("Federico Chiesa", "Juventus"), ("Khvicha Kvaratskhelia", "Napoli"),
+    ("Romelu Lukaku", "Napoli"), ("Paulo Dybala", "Roma"), ("Hakan Çalhanoğlu", "Inter"),
+    ("Nicolò Barella", "Inter"), ("Mike Maignan", "Milan"), ("Yann Sommer", "Inter"),
+    ("Ademola Lookman", "Atalanta"), ("Moise Kean", "Fiorentina"), ("Mateo Retegui", "Atalanta"),
+    ("Scott McTominay", "Napoli"), ("Christian Pulisic", "Milan"), ("Riccardo Orsolini", "Bologna"),
+    ("Rafael Leão", "Milan"), ("Theo Hernández", "Milan"), ("Alex Meret", "Napoli"),
+    ("Michele Di Gregorio", "Juventus"), ("Mile Svilar", "Roma"), ("Ivan Provedel", "Lazio")
+]
+
+FIRST_NAMES = [
+    "Lorenzo", "Andrea", "Matteo", "Giacomo", "Stefan", "Luka", "Nikola", "João", "Álvaro",
+    "Sergej", "Teun", "Tammy", "Artem", "Charles", "Denzel", "Samuel", "Boulaye", "Nico",
+    "Christopher", "Taty", "Ciro", "Manu", "Pedro", "Davide", "Alessandro", "Gianluca",
+    "Jonathan", "Albert", "Emil", "Tomás", "Marco", "Simone", "Francesco", "Valentín"
+]
+
+LAST_NAMES = [
+    "Frattesi", "Pellegrini", "Cambiaso", "Politano", "Raspadori", "de Vrij", "Modrić",
+    "Milinković-Savić", "Koopmeiners", "Abraham", "Dovbyk", "De Ketelaere", "Dumfries",
+    "Ricci", "Dia", "Zaccagni", "Immobile", "Castellanos", "Pérez", "Dimarco", "Gosens",
+    "Zortea", "Carnesecchi", "Scamacca", "Zirkzee", "Okafor", "Lobotka", "Anguissa",
+    "Rrahmani", "Rossi", "Bianchi", "Ferrari", "Esposito", "Romano", "Colombo", "Ricciardi",
+    "Marino", "Greco", "Bruno", "Gallo", "Conti", "De Luca", "Mancini", "Costa", "Giordano"
+]
+
+
+def _columns(*groups):
+    return pd.MultiIndex.from_tuples([(group, name) for group, names in groups for name in names])
+
+
+STANDARD_COLUMNS = _columns(
+    ("nation", [""]), ("pos", [""]), ("age", [""]), ("born", [""]),
+    ("Playing Time", ["MP", "Starts", "Min", "90s"]),
+    ("Performance", ["Gls", "Ast", "G+A", "G-PK", "PK", "PKatt", "CrdY", "CrdR"]),
+    ("Expected", ["xG", "npxG", "xAG", "npxG+xAG"]),
+    ("Progression", ["PrgC", "PrgP", "PrgR"]),
+    ("Per 90 Minutes", ["Gls", "Ast", "G+A", "G-PK", "G+A-PK", "xG", "xAG", "xG+xAG", "npxG", "npxG+xAG"])
+)
+SHOOTING_COLUMNS = _columns(
+    ("nation", [""]), ("pos", [""]), ("age", [""]), ("born", [""]), ("90s", [""]),
+    ("Standard", ["Gls", "Sh", "SoT", "SoT%", "Sh/90", "SoT/90", "G/Sh", "G/SoT", "Dist", "FK", "PK", "PKatt"]),
+    ("Expected", ["xG", "npxG", "npxG/Sh", "G-xG", "np:G-xG"])
+)
+PASSING_COLUMNS = _columns(
+    ("nation", [""]), ("pos", [""]), ("age", [""]), ("born", [""]), ("90s", [""]),
+    ("Total", ["Cmp", "Att", "Cmp%", "TotDist", "PrgDist"]),
+    ("Short", ["Cmp", "Att", "Cmp%"]), ("Medium", ["Cmp", "Att", "Cmp%"]), ("Long", ["Cmp", "Att", "Cmp%"]),
+    ("Ast", [""]), ("xAG", [""]),
+    ("Expected", ["xA", "A-xAG"]),
+    ("KP", [""]), ("1/3", [""]), ("PPA", [""]), ("CrsPA", [""]), ("PrgP", [""])
+)
+KEEPER_COLUMNS = _columns(
+    ("nation", [""]), ("pos", [""]), ("age", [""]), ("born", [""]),
+    ("Playing Time", ["MP", "Starts", "Min", "90s"]),
+    ("Performance", ["GA", "GA90", "SoTA", "Saves", "Save%", "W", "D", "L", "CS", "CS%"]),
+    ("Penalty Kicks", ["PKatt", "PKA", "PKsv", "PKm", "Save%"])
+)
+
+
+def _players(rng, count):
+    """(nome, [squadre]) per count giocatori; circa il 5% ha giocato in due squadre"""
+    players = list(KNOWN_PLAYERS)
+    names = {name for name, _ in players}
+    while len(players) < count:
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if name in names:
+            continue
+        names.add(name)
+        players.append((name, rng.choice(TEAMS)))
+
+    roster = []
+    for name, team in players:
+        teams = [team]
+        if rng.random() < 0.05:
+            teams.append(rng.choice([t for t in TEAMS if t != team]))
+        roster.append((name, teams))
+    return roster
+
+
+def _table(index, columns, np_rng, positions):
+    """Valori plausibili per colonna: interi per i conteggi, float per percentuali e medie"""
+    rows = len(index)
+    data = {}
+    for column in columns:
+        group, name = column
+        if group == "nation":
+            data[column] = np_rng.choice(["it ITA", "fr FRA", "ar ARG", "br BRA", "rs SRB"], rows)
+        elif group == "pos":
+            data[column] = positions
+        elif group == "age":
+            data[column] = [f"{a}-{d:03d}" for a, d in zip(np_rng.integers(18, 37, rows), np_rng.integers(0, 365, rows))]
+        elif group == "born":
+            data[column] = np_rng.integers(1987, 2007, rows).astype(float)
+        elif "%" in name or "/" in name or name in ("90s", "Dist", "GA90") or group in ("Expected", "Per 90 Minutes"):
+            data[column] = np.round(np_rng.uniform(0, 100 if "%" in name else 20, rows), 1)
+        elif name == "MP":
+            data[column] = np_rng.integers(0, 39, rows)
+        elif name == "Min":
+            data[column] = np_rng.integers(0, 3421, rows)
+        else:
+            data[column] = np_rng.integers(0, 40, rows)
+
+    table = pd.DataFrame(data, index=index)
+    table.columns = columns
+    return table
+
+
+def make_tables(players=600, seed=42):
+    """{'standard', 'shooting', 'passing', 'keeper'} -> DataFrame con la forma di soccerdata"""
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+
+    rows = []
+    keepers = []
+    for name, teams in _players(rng, players):
+        is_keeper = name in ("Mike Maignan", "Yann Sommer", "Alex Meret", "Michele Di Gregorio",
+                             "Mile Svilar", "Ivan Provedel") or rng.random() < 0.07
+        for team in teams:
+            rows.append((LEAGUE, SEASON, team, name))
+            if is_keeper:
+                keepers.append((LEAGUE, SEASON, team, name))
+
+    index = pd.MultiIndex.from_tuples(sorted(rows), names=["league", "season", "team", "player"])
+    keeper_index = pd.MultiIndex.from_tuples(sorted(keepers), names=["league", "season", "team", "player"])
+    positions = np_rng.choice(["DF", "MF", "FW", "MF,FW", "DF,MF"], len(index))
+
+    return {
+        "standard": _table(index, STANDARD_COLUMNS, np_rng, positions),
+        "shooting": _table(index, SHOOTING_COLUMNS, np_rng, positions),
+        "passing": _table(index, PASSING_COLUMNS, np_rng, positions),
+        "keeper": _table(keeper_index, KEEPER_COLUMNS, np_rng, ["GK"] * len(keeper_index))
+    }
+
+
+def fold(text):
+    """Nome senza accenti, come scritto nel listone"""
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def listone_name(player):
+    """Formato del listone: "Lautaro Martínez" -> "Martinez L." """
+    first, _, last = fold(player).partition(" ")
+    return f"{last} {first[0]}." if last else first
+
+
+def misspell(name, rng):
+    """Errore di battitura: due lettere adiacenti scambiate"""
+    if len(name) < 4:
+        return name
+    i = rng.randrange(1, len(name) - 2)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def query_sets(tables, seed=7):
+    """Nomi di input per gli scenari: esatti, listone, errori di battitura, sconosciuti"""
+    rng = random.Random(seed)
+    index = tables["standard"].index
+    pairs = list(dict.fromkeys(zip(index.get_level_values("player"), index.get_level_values("team"))))
+    rng.shuffle(pairs)
+
+    unknown = []
+    while len(unknown) < 200:
+        unknown.append("".join(rng.choice("bcdfghlmnprstvz") for _ in range(rng.randint(6, 12))))
+
+    return {
+        "exact": [(player, team) for player, team in pairs[:200]],
+        "abbreviated": [(listone_name(player), team) for player, team in pairs[:200]],
+        "misspelled": [(misspell(fold(player), rng), None) for player, _ in pairs[:200]],
+        "unknown": [(name, None) for name in unknown],
+        # Un listone completo: ~500 righe "Cognome I." con squadra
+        "listone": [(listone_name(player), team) for player, team in pairs[:500]]
+    }
@@ -0,0 +1,101 @@
+"""
+Componenti condivisi dei backend FBref (Railway e Oracle Cloud)
+"""
+
+from .name_index import PlayerNameIndex
+from .aliases import AliasTable, alias_key, load_aliases, save_aliases
+from .row_index import PlayerRowIndex
+from .insights import RANKING_METRICS, compute_insights, rank_insights
+from .encoding import EncodedPayload, etag_for
+from .sections import SECTIONS, SECTION_NAMES, StatSection, parse_fields
+from .normalization import RoleNormalization
+from .similarity import SimilarityIndex
+from .responses import ResponseStore, assemble_payload, batch_payload, build_response_store, dumps
+from .snapshot import (
+    download_tables,
+    fetch_tables,
+    load_snapshot,
+    read_manifest,
+    save_snapshot,
+    season_snapshot_dir,
+    snapshot_age,
+    snapshot_lock
+)
+from .seasons import season_label, sort_seasons
+from .player_table import PlayerTable
+from .aggregates import AggregateDataset, compute_totals
+from .dataset import FBrefDataset
+from .matchday import download_matchday, fold_match_stats, played_games
+from .season_store import SeasonLoading, SeasonStore
+from .refresher import DataRefresher, refresh_interval_from_env
+from .cache import ResponseCache, cache_size_from_env
+from .fasce import FASCIA_KEYS, FasceStore, assign_fasce, ruolo_principale
+from .listone import ListoneStore, read_listone
+from .auction import AuctionOptimizer, AuctionPool
+from .config import PRESETS, ServiceConfig
+from .metrics import MetricsRegistry, ServiceMetrics
+from .logs import RequestLogger, configure_logging
+from .service import FBrefService
+
+__all__ = [
+    "PlayerNameIndex",
+    "AliasTable",
+    "alias_key",
+    "load_aliases",
+    "save_aliases",
+    "PlayerRowIndex",
+    "RANKING_METRICS",
+    "compute_insights",
+    "rank_insights",
+    "EncodedPayload",
+    "etag_for",
+    "SECTIONS",
+    "SECTION_NAMES",
+    "StatSection",
+    "parse_fields",
+    "RoleNormalization",
+    "SimilarityIndex",
+    "ResponseStore",
+    "assemble_payload",
+    "batch_payload",
+    "build_response_store",
+    "dumps",
+    "download_tables",
+    "fetch_tables",
+    "load_snapshot",
+    "read_manifest",
+    "save_snapshot",
+    "season_snapshot_dir",
+    "snapshot_age",
+    "snapshot_lock",
+    "season_label",
+    "sort_seasons",
+    "PlayerTable",
+    "AggregateDataset",
+    "compute_totals",
+    "FBrefDataset",
+    "download_matchday",
+    "fold_match_stats",
+    "played_games",
+    "SeasonStore",
+    "SeasonLoading",
+    "DataRefresher",
+    "refresh_interval_from_env",
+    "ResponseCache",
+    "cache_size_from_env",
+    "FASCIA_KEYS",
+    "FasceStore",
+    "assign_fasce",
+    "ruolo_principale",
+    "ListoneStore",
+    "read_listone",
+    "AuctionOptimizer",
+    "AuctionPool",
+    "PRESETS",
+    "ServiceConfig",
+    "MetricsRegistry",
+    "ServiceMetrics",
+    "RequestLogger",
+    "configure_logging",
+    "FBrefService",
+]
@@ -0,0 +1,189 @@
+"""
+Totali stagionali per giocatore e aggregazioni su più stagioni
+I totali di ogni stagione sono calcolati una volta con il dataset; un'aggregazione
+somma array già allineati invece di concatenare tabelle ad ogni richiesta
+"""
+
+import time
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from .aliases import AliasTable
+from .columns import int_array
+from .encoding import EncodedPayload
+from .name_index import PlayerNameIndex
+from .player_table import PlayerTable
+from .responses import ResponseStore, assemble_payload, dumps
+from .seasons import season_label
+
+# Colonna dei totali -> (tabella, colonna FBref)
+TOTAL_COLUMNS = {
+    "partite": ('standard', ('Playing Time', 'MP')),
+    "minuti": ('standard', ('Playing Time', 'Min')),
+    "gol": ('standard', ('Performance', 'Gls')),
+    "assist": ('standard', ('Performance', 'Ast')),
+    "gialli": ('standard', ('Performance', 'CrdY')),
+    "rossi": ('standard', ('Performance', 'CrdR')),
+    "partite_portiere": ('keeper', ('Playing Time', 'MP')),
+    "gol_subiti": ('keeper', ('Performance', 'GA')),
+    "parate": ('keeper', ('Performance', 'Saves')),
+    "clean_sheets": ('keeper', ('Performance', 'CS')),
+}
+
+# Sezioni di "stats" nelle risposte aggregate (sottoinsieme di sections.SECTIONS)
+AGGREGATE_SECTIONS = ("generale", "portiere")
+
+
+def _rows_of(table, players):
+    if table is None or table.empty or players is None:
+        return table
+    return table[table.index.get_level_values('player').isin(players)]
+
+
+def compute_totals(tables, players=None):
+    """Totali della stagione per giocatore (somma di tutte le righe: più squadre o leghe)
+
+    Colonne: team e league della prima riga, più le colonne di TOTAL_COLUMNS (int64)
+    players: se indicato, solo i totali di questi giocatori
+    """
+    standard = _rows_of(tables.get('standard'), players)
+    if standard is None or standard.empty:
+        return pd.DataFrame(columns=["team", "league", *TOTAL_COLUMNS])
+
+    index = standard.index
+    first = pd.DataFrame({
+        "team": index.get_level_values('team'),
+        "league": index.get_level_values('league')
+    }, index=index.get_level_values('player')).groupby(level=0, sort=False).first()
+
+    totals = [first]
+    for table_name in ('standard', 'keeper'):
+        table = _rows_of(tables.get(table_name), players)
+        columns = {name: column for name, (source, column) in TOTAL_COLUMNS.items() if source == table_name}
+        if table is None or table.empty:
+            totals.append(pd.DataFrame(0, index=first.index, columns=list(columns), dtype=np.int64))
+            continue
+        frame = pd.DataFrame(
+            {name: int_array(table, column) for name, column in columns.items()},
+            index=table.index.get_level_values('player')
+        ).groupby(level=0, sort=False).sum()
+        totals.append(frame.reindex(first.index, fill_value=0))
+
+    result = pd.concat(totals, axis=1)
+    result.index.name = "player"
+    return result
+
+
+class AggregateDataset:
+    """Statistiche sommate su più stagioni, con indice nomi e risposte pre-serializzate
+
+    Espone name_index, responses, version e is_empty come FBrefDataset, quindi
+    passa dalla stessa ricerca e dalla stessa cache di /api/player-stats
+    """
+
+    def __init__(self, datasets, platform):
+        start = time.perf_counter()
+        # Dal più recente al più vecchio
+        self.seasons = [dataset.season for dataset in datasets]
+        self.season = "+".join(str(season) for season in self.seasons)
+        self.signature = tuple(dataset.version for dataset in datasets)
+        self.loaded_at = time.time()
+        self.manifest = None
+
+        players = list(dict.fromkeys(
+            player for dataset in datasets for player in dataset.totals.index
+        ))
+        numeric = list(TOTAL_COLUMNS)
+        totals = np.zeros((len(players), len(numeric)), dtype=np.int64)
+
+        player_teams = {}
+        history = {player: [] for player in players}
+        latest = {}
+        for dataset in datasets:
+            frame = dataset.totals
+            if frame.empty:
+                continue
+            totals += frame[numeric].reindex(players, fill_value=0).to_numpy(dtype=np.int64)
+
+            label = season_label(dataset.season)
+            for player, team, league, partite, minuti, gol, assist in zip(
+                frame.index, frame["team"], frame["league"], frame["partite"].tolist(),
+                frame["minuti"].tolist(), frame["gol"].tolist(), frame["assist"].tolist()
+            ):
+                latest.setdefault(player, (team, league))
+                teams = player_teams.setdefault(player, [])
+                if team not in teams:
+                    teams.append(team)
+                history[player].append({
+                    "season": label,
+                    "team": team,
+                    "partite_giocate": partite,
+                    "minuti_totali": minuti,
+                    "gol": gol,
+                    "assist": assist
+                })
+
+        self.name_index = PlayerNameIndex(players, player_teams)
+        self.aliases = AliasTable.from_index(self.name_index, datasets[0].aliases.learned if datasets else None)
+        # Nessuna normalizzazione per 90' su più stagioni: ricerca simili solo per stagione singola
+        self.similarity = None
+        self.player_table = PlayerTable.from_totals(
+            players, [latest[player][0] for player in players], [latest[player][1] for player in players],
+            {name: totals[:, column] for column, name in enumerate(numeric)}
+        )
+
+        updated = datasets[0].updated if datasets else None
+        source = f"FBref via SoccerData ({platform})"
+        payloads = {}
+        bounds = {}
+        for row, player in enumerate(players):
+            values = dict(zip(numeric, totals[row].tolist()))
+            team, league = latest[player]
+            gol_assist = values["gol"] + values["assist"]
+            generale = {
+                "partite_giocate": values["partite"],
+                "minuti_totali": values["minuti"],
+                "gol": values["gol"],
+                "assist": values["assist"],
+                "cartellini_gialli": values["gialli"],
+                "cartellini_rossi": values["rossi"]
+            }
+            portiere = {}
+            if values["partite_portiere"]:
+                portiere = {
+                    "partite_giocate": values["partite_portiere"],
+                    "gol_subiti": values["gol_subiti"],
+                    "parate": values["parate"],
+                    "clean_sheets": values["clean_sheets"]
+                }
+            payload, bounds[player] = assemble_payload(
+                {
+                    "player": {
+                        "name": player,
+                        "team": team,
+                        "league": league,
+                        "seasons": [item["season"] for item in history[player]]
+                    }
+                },
+                [(b'"generale":', dumps(generale)), (b'"portiere":', dumps(portiere))],
+                {
+                    "per_stagione": history[player],
+                    "fantacalcio_insights": {
+                        "gol_assist": gol_assist,
+                        "gol_assist_per_partita": round(gol_assist / values["partite"], 2) if values["partite"] else 0
+                    },
+                    "fonte": source,
+                    "ultimo_aggiornamento": updated
+                }
+            )
+            payloads[player] = EncodedPayload(payload)
+
+        self.responses = ResponseStore(payloads, AGGREGATE_SECTIONS, bounds)
+        self.version = hashlib.sha1("|".join(self.signature).encode()).hexdigest()[:16]
+        self.build_times = {"aggregate": time.perf_counter() - start}
+
+    @property
+    def is_empty(self):
+        return not self.responses.payloads
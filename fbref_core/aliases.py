@@ -0,0 +1,249 @@
+"""
+Tabella alias nome -> giocatore FBref per la ricerca esatta O(1)
+Ogni nome FBref genera le sue chiavi canoniche (senza accenti, cognome + iniziale,
+ordine invertito); i nomi del listone, risolti una volta offline, vengono salvati
+con lo snapshot in aliases.json. La ricerca fuzzy resta solo come ripiego.
+
+    python -m fbref_core.aliases --dir data/fbref_snapshot --listone public/listone.xlsx
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from types import MappingProxyType
+from collections import defaultdict
+
+from .name_index import PlayerNameIndex, fold_accents
+
+logger = logging.getLogger(__name__)
+
+ALIASES_FILE = "aliases.json"
+ALIASES_FORMAT_VERSION = 1
+
+# Lettere senza decomposizione Unicode (NFKD non le semplifica)
+_TRANSLITERATION = str.maketrans({
+    "ı": "i", "ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "ß": "ss", "æ": "ae", "œ": "oe"
+})
+
+# Abbreviazioni comuni che le chiavi canoniche non coprono (soprannomi, cognomi condivisi)
+SEED_ALIASES = {
+    "lautaro m": "lautaro martinez",
+    "thuram": "marcus thuram",
+    "vlahovic": "dusan vlahovic",
+    "osimhen": "victor osimhen",
+    "yildiz": "kenan yildiz",
+    "kenan y": "kenan yildiz",
+    "chiesa": "federico chiesa",
+    "kvaratskhelia": "khvicha kvaratskhelia",
+    "kvara": "khvicha kvaratskhelia",
+}
+
+
+def alias_key(name):
+    """Chiave canonica: minuscolo, senza accenti né punti ("Martínez L." -> "martinez l")"""
+    folded = fold_accents(str(name or "").lower().translate(_TRANSLITERATION))
+    return " ".join(folded.replace(".", " ").split())
+
+
+def name_keys(player):
+    """Chiavi canoniche di un nome FBref: completo, invertito, cognome e cognome + iniziale
+
+    Ogni punto di divisione nome/cognome è valido ("Stefan de Vrij" -> "de vrij s")
+    """
+    words = alias_key(player).split()
+    keys = {" ".join(words)}
+    for split in range(1, len(words)):
+        first, last = " ".join(words[:split]), " ".join(words[split:])
+        initial = words[0][0]
+        keys.update((last, f"{last} {first}", f"{last} {initial}", f"{initial} {last}"))
+    return keys
+
+
+class AliasTable:
+    """Mappa congelata chiave canonica (e chiave + squadra) -> giocatore FBref"""
+
+    def __init__(self, names, team_names, learned=None):
+        self.names = MappingProxyType(names)
+        self.team_names = MappingProxyType(team_names)
+        # Alias del listone da cui è stata costruita, riusati dalle aggregazioni
+        self.learned = learned or {}
+
+    def __len__(self):
+        return len(self.names) + len(self.team_names)
+
+    @classmethod
+    def build(cls, players, player_teams, listone_aliases=None):
+        """Tabella per i giocatori di un dataset
+
+        Le chiavi condivise da più giocatori restano solo se distinte dalla squadra;
+        gli alias del listone (risolti offline) e SEED_ALIASES hanno la precedenza
+        """
+        owners = defaultdict(set)
+        for player in players:
+            for key in name_keys(player):
+                owners[key].add(player)
+
+        names = {}
+        team_names = {}
+        team_owners = defaultdict(set)
+        for key, candidates in owners.items():
+            if len(candidates) == 1:
+                names[key] = next(iter(candidates))
+                continue
+            for player in candidates:
+                for team in player_teams.get(player, ()):
+                    team_owners[(key, alias_key(team))].add(player)
+        for key, candidates in team_owners.items():
+            if len(candidates) == 1:
+                team_names[key] = next(iter(candidates))
+
+        for alias, target in SEED_ALIASES.items():
+            player = names.get(target)
+            if player is not None:
+                names[alias] = player
+
+        known = set(players)
+        for key, player in (listone_aliases or {}).items():
+            if player not in known:
+                continue
+            if "|" in key:
+                name, team = key.split("|", 1)
+                team_names[(name, team)] = player
+            else:
+                names[key] = player
+
+        return cls(names, team_names, listone_aliases)
+
+    @classmethod
+    def from_index(cls, name_index, listone_aliases=None):
+        """Tabella per i giocatori di un PlayerNameIndex"""
+        return cls.build(name_index.players, name_index.player_teams, listone_aliases)
+
+    def lookup(self, player_name, team_name=None):
+        """Giocatore FBref per un nome (e squadra) con match esatto, None se serve il fuzzy"""
+        key = alias_key(player_name)
+        if team_name:
+            player = self.team_names.get((key, alias_key(team_name)))
+            if player is not None:
+                return player
+        return self.names.get(key)
+
+
+def resolve_listone_aliases(listone_players, dataset, resolve_fn=None):
+    """{chiave o "chiave|squadra": giocatore FBref} per i nomi del listone
+
+    resolve_fn(nome, squadra) -> giocatore FBref o None; di default alias FBref
+    del dataset e poi ricerca fuzzy sull'indice nomi
+    """
+    if resolve_fn is None:
+        def resolve_fn(name, team):
+            return (dataset.aliases.lookup(name, team)
+                    or dataset.name_index.find(name.lower().strip(), team)[0])
+
+    aliases = {}
+    for player in listone_players:
+        name, team = player["nome"], player.get("squadra") or ""
+        fbref_player = resolve_fn(name, team or None)
+        if not fbref_player:
+            continue
+        key = alias_key(name)
+        if team:
+            aliases[f"{key}|{alias_key(team)}"] = fbref_player
+        # Senza squadra l'alias vale solo se il nome del listone è univoco:
+        # None segna un nome ambiguo e non viene più sovrascritto
+        aliases.setdefault(key, fbref_player)
+        if aliases[key] != fbref_player:
+            aliases[key] = None
+    return {key: player for key, player in aliases.items() if player}
+
+
+def learn_aliases(standard_stats, listone_path=None):
+    """Alias del listone risolti sulle statistiche standard indicate, None senza listone
+
+    Bastano indice nomi e chiavi canoniche: non serve costruire tutto il dataset
+    """
+    from .listone import default_listone_path, read_listone
+
+    listone_path = Path(listone_path or default_listone_path())
+    if not listone_path.exists():
+        return None
+    name_index = PlayerNameIndex.from_stats(standard_stats)
+    table = AliasTable.from_index(name_index)
+
+    def resolve_fn(name, team):
+        return table.lookup(name, team) or name_index.find(name.lower().strip(), team)[0]
+
+    return resolve_listone_aliases(read_listone(listone_path), None, resolve_fn)
+
+
+def save_aliases(aliases, directory=None, source=None):
+    """Scrive aliases.json nella cartella dello snapshot (scrittura atomica)"""
+    from .snapshot import default_snapshot_dir
+
+    directory = Path(directory or default_snapshot_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    data = {
+        "format_version": ALIASES_FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": source,
+        "aliases": dict(sorted(aliases.items()))
+    }
+    tmp_path = directory / f".{ALIASES_FILE}.tmp"
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp_path, directory / ALIASES_FILE)
+    logger.info(f"💾 {len(aliases)} alias salvati in {directory / ALIASES_FILE}")
+    return data
+
+
+def load_aliases(directory=None):
+    """Alias del listone salvati con lo snapshot ({} se assenti o non compatibili)"""
+    from .snapshot import default_snapshot_dir
+
+    path = Path(directory or default_snapshot_dir()) / ALIASES_FILE
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Alias non leggibili ({path}): {e}")
+        return {}
+    if data.get("format_version") != ALIASES_FORMAT_VERSION:
+        logger.warning("⚠️ Alias con formato diverso, ignorati")
+        return {}
+    return data.get("aliases") or {}
+
+
+def write_aliases(directory=None, listone_path=None):
+    """Risolve il listone sullo snapshot della stagione corrente e salva gli alias"""
+    from .listone import default_listone_path
+    from .snapshot import load_snapshot
+
+    listone_path = Path(listone_path or default_listone_path())
+    snapshot = load_snapshot(directory)
+    if snapshot is None:
+        raise RuntimeError("Snapshot non disponibile: eseguire prima python -m fbref_core.snapshot")
+    tables, _ = snapshot
+    aliases = learn_aliases(tables.get('standard'), listone_path)
+    if aliases is None:
+        raise RuntimeError(f"Listone non trovato: {listone_path}")
+    return save_aliases(aliases, directory, source=listone_path.name)
+
+
+def main():
+    """Genera aliases.json dallo snapshot locale e dal listone"""
+    parser = argparse.ArgumentParser(description="Genera la tabella alias del listone per lo snapshot FBref")
+    parser.add_argument("--dir", default=None, help="cartella dello snapshot")
+    parser.add_argument("--listone", default=None, help="percorso di listone.xlsx")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    start = time.time()
+    data = write_aliases(args.dir, args.listone)
+    logger.info(f"🎯 {len(data['aliases'])} alias generati in {time.time() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
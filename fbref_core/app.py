@@ -0,0 +1,530 @@
+"""
+App Flask dei backend FBref: stesse route per tutti gli host
+Gli entry point (railway_app.py, oracle_app.py) scelgono solo il preset
+"""
+
+import time
+import logging
+
+from flask import Blueprint, Flask, Response, current_app, g, jsonify, request
+
+from .config import ServiceConfig
+from .auction import DEFAULT_FVM_WEIGHT
+from .encoding import EncodedPayload, choose_encoding, encoded
+from .fasce import FASCIA_KEYS
+from .insights import RANKING_METRICS
+from .metrics import CONTENT_TYPE
+from .player_table import DEFAULT_LIMIT, DEFAULT_SORT, MAX_LIMIT, TEXT_COLUMNS
+from .season_store import SeasonLoading
+from .sections import SECTION_NAMES, parse_fields
+from .similarity import DEFAULT_K, MAX_K
+from .service import FBrefService
+
+logger = logging.getLogger(__name__)
+
+# Giocatori massimi per /api/player-stats/batch (rosa Mantra + preferiti)
+MAX_BATCH_SIZE = 100
+
+ENDPOINTS = [
+    "GET /api/player-stats/<nome>?team=<squadra>&season=<stagione>&last_seasons=<n>&fields=<sezioni>",
+    "POST /api/player-stats/batch",
+    "GET /api/listone",
+    "GET /api/fasce?ruolo=<ruolo principale>",
+    "POST /api/fasce/manuali",
+    "POST /api/asta/ottimizza",
+    "GET /api/players?team=&ruolo=&min_minuti=&portieri=&sort=<colonna>&order=desc&limit=&offset=",
+    "GET /api/players/<nome>/similar?team=<squadra>&k=<n>&ruolo=&min_fvm=&max_fvm=&season=<stagione>",
+    "GET /api/health",
+    "GET /api/metrics",
+    "GET /api/insights/ranking?metric=<metrica>&limit=<n>",
+    "POST /api/cache/clear",
+    "POST /api/cache/refresh"
+]
+
+api = Blueprint('fbref_api', __name__)
+
+
+def _service():
+    return current_app.extensions['fbref_service']
+
+
+def _cache_control(max_age=None):
+    max_age = _service().config.http_max_age if max_age is None else max_age
+    return f"public, max-age={max_age}" if max_age else "no-cache"
+
+
+def _cacheable(response, max_age=None):
+    """Cache-Control ed ETag (calcolato sul corpo) per le GET costruite con jsonify"""
+    if request.method not in ('GET', 'HEAD'):
+        return response
+    response.headers['Cache-Control'] = _cache_control(max_age)
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+def _payload_response(payload, max_age=None):
+    """Risposta con bytes già serializzati, ETag pre-calcolato e compressione negoziata
+
+    I payload pre-calcolati (EncodedPayload) sono riusabili da browser e CDN;
+    i bytes semplici (errori, servizio non pronto) vanno sempre rivalidati
+    """
+    if not isinstance(payload, EncodedPayload):
+        max_age = 0
+    payload = encoded(payload)
+    encoding = choose_encoding(payload, lambda name: request.accept_encodings[name])
+    # ETag forte distinto per ogni codifica dello stesso contenuto
+    etag = f"{payload.etag}-{encoding}" if encoding else payload.etag
+    conditional = request.method in ('GET', 'HEAD')
+
+    if conditional and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(payload.variant(encoding) if encoding else payload, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    headers = response.headers
+    headers['Vary'] = 'Accept-Encoding'
+    headers['X-Data-Source'] = _service().config.data_source
+    if conditional:
+        headers['ETag'] = f'"{etag}"'
+        headers['Cache-Control'] = _cache_control(max_age)
+    return response
+
+
+def _player_filters(args):
+    """Filtri di /api/players dalla query string (ValueError per soglie non numeriche)"""
+    filters = {}
+    for name in TEXT_COLUMNS:
+        # ?team=Inter&team=Milan oppure ?team=Inter,Milan
+        values = [value.strip() for item in args.getlist(name) for value in item.split(',') if value.strip()]
+        if values:
+            filters[name] = values
+
+    portieri = args.get('portieri')
+    if portieri is not None:
+        filters["portiere"] = portieri.lower() in ('1', 'true', 'si')
+
+    for name, value in args.items():
+        if name.startswith(('min_', 'max_')):
+            try:
+                filters[name] = float(value)
+            except ValueError:
+                raise ValueError(f"Soglia non numerica: {name}={value}")
+    return filters
+
+
+def _requested_dataset(season, last_seasons):
+    """(dataset, None) per ?season= / ?last_seasons=, altrimenti (None, risposta di errore)"""
+    service = _service()
+    if last_seasons is not None:
+        try:
+            last_seasons = int(last_seasons)
+        except (TypeError, ValueError):
+            return None, (jsonify({"error": "last_seasons deve essere un intero"}), 400)
+
+    try:
+        return service.dataset_for(season or None, last_seasons), None
+    except ValueError as e:
+        return None, (jsonify({"error": str(e), "stagioni_disponibili": service.seasons}), 400)
+    except SeasonLoading as e:
+        # Download della stagione in background: il client riprova più tardi
+        return None, (jsonify({"error": str(e), "retry_after": e.retry_after}), 503,
+                      {"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        logger.error(f"❌ Stagione {season or last_seasons} non disponibile su {service.config.label}: {e}")
+        return None, (jsonify({"error": f"Dati stagione non disponibili: {e}"}), 503)
+
+
+@api.before_app_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@api.after_app_request
+def _observe_request(response):
+    """Durata per route (regola URL, non il path: cardinalità limitata)"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        _service().metrics.request_seconds.observe(
+            time.perf_counter() - started, endpoint, request.method, str(response.status_code)
+        )
+    return response
+
+
+@api.route('/api/player-stats/<player_name>', methods=['GET'])
+def get_player_stats(player_name):
+    """Endpoint per statistiche giocatore"""
+    service = _service()
+    try:
+        team_name = request.args.get('team')
+        logger.debug(f"🎯 {service.config.label} API Request: {player_name} ({team_name or 'no team'})")
+
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({"error": str(e), "sezioni_disponibili": SECTION_NAMES}), 400
+
+        dataset = None
+        if 'season' in request.args or 'last_seasons' in request.args:
+            dataset, error = _requested_dataset(request.args.get('season'), request.args.get('last_seasons'))
+            if error:
+                return error
+
+        return _payload_response(service.get_player_payload(player_name, team_name, dataset, fields))
+
+    except Exception as e:
+        logger.error(f"❌ Errore {service.config.label} API: {e}")
+        return jsonify({"error": f"Errore {service.config.label}: {str(e)}"}), 500
+
+
+@api.route('/api/player-stats/batch', methods=['POST'])
+def get_player_stats_batch():
+    """Statistiche di più giocatori in una sola richiesta (rosa, preferiti)"""
+    body = request.get_json(silent=True)
+    items = body.get('players') if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Body atteso: {\"players\": [{\"name\": ..., \"team\": ...}]}"}), 400
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Massimo {MAX_BATCH_SIZE} giocatori per richiesta"}), 400
+
+    players = []
+    for item in items:
+        # Accetta sia {"name", "team"} sia il solo nome
+        if isinstance(item, str):
+            item = {"name": item}
+        if not isinstance(item, dict) or not isinstance(item.get('name'), str) or not item['name'].strip():
+            return jsonify({"error": f"Elemento non valido: {item}"}), 400
+        team = item.get('team')
+        players.append((item['name'], team if isinstance(team, str) and team.strip() else None))
+
+    try:
+        fields = parse_fields(body.get('fields') if isinstance(body, dict) else None)
+    except ValueError as e:
+        return jsonify({"error": str(e), "sezioni_disponibili": SECTION_NAMES}), 400
+
+    dataset = None
+    if isinstance(body, dict) and (body.get('season') or body.get('last_seasons') is not None):
+        dataset, error = _requested_dataset(body.get('season'), body.get('last_seasons'))
+        if error:
+            return error
+
+    service = _service()
+    logger.debug(f"🎯 {service.config.label} API Batch Request: {len(players)} giocatori")
+    return _payload_response(service.get_batch_payload(players, dataset, fields))
+
+
+@api.route('/api/listone', methods=['GET'])
+def get_listone():
+    """Listone completo con mapping Id -> giocatore FBref e statistiche"""
+    service = _service()
+    listone = service.get_listone()
+    if listone is None:
+        return jsonify({
+            "error": "Listone non disponibile",
+            "path": str(service.listone.path)
+        }), 404
+
+    return _payload_response(listone.payload)
+
+
+@api.route('/api/fasce', methods=['GET'])
+def get_fasce():
+    """Fasce FVM per ruolo principale (automatiche + manuali), pre-serializzate"""
+    service = _service()
+    state = service.fasce.get()
+    if state is None:
+        return jsonify({"error": "Listone non disponibile", "path": str(service.listone.path)}), 404
+
+    ruolo = request.args.get('ruolo')
+    payload = state.payload(ruolo)
+    if payload is None:
+        return jsonify({"error": f"Ruolo sconosciuto: {ruolo}", "ruoli": list(state.payloads)}), 404
+    return _payload_response(payload)
+
+
+@api.route('/api/fasce/manuali', methods=['POST'])
+def set_fasce_manuali():
+    """Assegna fasce manuali: {"id": ..., "fascia": ...} o {"fasce": {id: fascia o null}}"""
+    body = request.get_json(silent=True)
+    if isinstance(body, dict) and isinstance(body.get('fasce'), dict):
+        changes = body['fasce']
+    elif isinstance(body, dict) and 'id' in body:
+        changes = {body['id']: body.get('fascia')}
+    else:
+        return jsonify({
+            "error": "Body atteso: {\"id\": ..., \"fascia\": ...} oppure {\"fasce\": {id: fascia}}",
+            "fasce": list(FASCIA_KEYS)
+        }), 400
+
+    service = _service()
+    try:
+        state = service.fasce.set_overrides(changes)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 404
+
+    return jsonify({
+        "status": "ok",
+        "manuali": len(state.overrides),
+        "ruoli_aggiornati": state.rebuilt,
+        "fasce": {str(key): state.fascia(key) for key in changes}
+    })
+
+
+@api.route('/api/asta/ottimizza', methods=['POST'])
+def optimize_auction():
+    """Migliori completamenti della rosa Mantra per il budget rimasto
+
+    Body: {"budget": 180, "ruoli": {"Dc": 2, "Pc": 1}, "esclusi": [id, ...],
+           "prezzi": {id: prezzo}, "peso_fvm": 0.5, "soluzioni": 3}
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get('ruoli'), dict) or 'budget' not in body:
+        return jsonify({"error": "Body atteso: {\"budget\": ..., \"ruoli\": {ruolo: giocatori mancanti}}"}), 400
+
+    service = _service()
+    try:
+        # Tipi e limiti di ogni campo sono controllati da optimize (ValueError)
+        result = service.auction.optimize(
+            body['ruoli'],
+            body['budget'],
+            excluded=body.get('esclusi') or [],
+            prices=body.get('prezzi'),
+            fvm_weight=body.get('peso_fvm', DEFAULT_FVM_WEIGHT),
+            solutions=body.get('soluzioni', 3)
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 404
+
+    service.request_log.log(
+        "auction_optimize", "ok" if result["soluzioni"] else "not_found",
+        budget=result["budget"], roles=result["ruoli"], solutions=len(result["soluzioni"]),
+        frontiers=result["frontiere"], duration_ms=result["durata_ms"]
+    )
+    return jsonify(result)
+
+
+@api.route('/api/players', methods=['GET'])
+def query_players():
+    """Roster filtrato, ordinato per qualsiasi statistica e paginato"""
+    service = _service()
+    args = request.args
+    order = args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        return jsonify({"error": "order deve essere asc o desc"}), 400
+
+    dataset = None
+    if 'season' in args or 'last_seasons' in args:
+        dataset, error = _requested_dataset(args.get('season'), args.get('last_seasons'))
+        if error:
+            return error
+
+    try:
+        payload = service.query_players(
+            _player_filters(args),
+            sort=args.get('sort', DEFAULT_SORT),
+            descending=order == 'desc',
+            limit=max(0, min(args.get('limit', DEFAULT_LIMIT, type=int), MAX_LIMIT)),
+            offset=max(0, args.get('offset', 0, type=int)),
+            dataset=dataset
+        )
+    except ValueError as e:
+        return jsonify({
+            "error": str(e),
+            "colonne_disponibili": service.player_table(dataset).sortable
+        }), 400
+
+    return _payload_response(payload)
+
+
+@api.route('/api/players/<player_name>/similar', methods=['GET'])
+def similar_players(player_name):
+    """Alternative più simili per profilo statistico, filtrate per ruolo e fascia FVM"""
+    service = _service()
+    args = request.args
+
+    dataset = None
+    if 'season' in args or 'last_seasons' in args:
+        dataset, error = _requested_dataset(args.get('season'), args.get('last_seasons'))
+        if error:
+            return error
+
+    try:
+        filters = _player_filters(args)
+        # ?team= indica la squadra del giocatore cercato, non un filtro sui candidati
+        filters.pop("team", None)
+        payload = service.similar_players(
+            player_name, args.get('team'), filters,
+            k=max(1, min(args.get('k', DEFAULT_K, type=int), MAX_K)),
+            dataset=dataset
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if payload is None:
+        return jsonify({"error": f"Giocatore '{player_name}' non trovato"}), 404
+    return _payload_response(payload)
+
+
+@api.route('/api/health', methods=['GET'])
+def health():
+    """Health check (sempre rivalidato: ETag sul contenuto, nessun riuso senza controllo)"""
+    service = _service()
+    manifest = service.snapshot_manifest
+    return _cacheable(jsonify({
+        "status": "ok",
+        "platform": service.config.platform,
+        "soccerdata_available": service.soccerdata_available,
+        "service": f"Real FBref Service - {service.config.platform} Deploy",
+        "cached_players": len(service.cache),
+        "cache": service.cache.stats(),
+        "data_version": service.dataset.version,
+        "refresh": service.refresher.status(),
+        "listone": service.listone.status(),
+        "fasce": service.fasce.status(),
+        "seasons": service.season_store.status(),
+        "snapshot": manifest and {
+            "created_at": manifest["created_at"],
+            "leagues": manifest["leagues"],
+            "seasons": manifest["seasons"],
+            "games": len(manifest.get("games") or ()),
+            "full_refresh_at": manifest.get("full_refresh_at"),
+            # Esito per tabella dell'ultimo download completo (ok, error, timeout)
+            "download": manifest.get("download")
+        },
+        "data_loaded": {
+            "standard_stats": len(service.standard_stats),
+            "shooting_stats": len(service.shooting_stats),
+            "passing_stats": len(service.passing_stats),
+            "keeper_stats": len(service.keeper_stats),
+            "defense_stats": len(service.defense_stats),
+            "possession_stats": len(service.possession_stats),
+            "gca_stats": len(service.gca_stats)
+        }
+    }), max_age=0)
+
+
+@api.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Metriche del processo nel formato testo di Prometheus"""
+    return Response(_service().metrics.render(), content_type=CONTENT_TYPE)
+
+
+@api.route('/api/insights/ranking', methods=['GET'])
+def insights_ranking():
+    """Classifica fantacalcio su tutto il roster"""
+    metric = request.args.get('metric', 'bonus_malus_attesi')
+    if metric not in RANKING_METRICS:
+        return jsonify({
+            "error": f"Metrica non supportata: {metric}",
+            "metriche_disponibili": list(RANKING_METRICS)
+        }), 400
+
+    limit = min(request.args.get('limit', 20, type=int), 200)
+    portieri = request.args.get('portieri')
+    if portieri is not None:
+        portieri = portieri.lower() in ('1', 'true', 'si')
+
+    return _cacheable(jsonify({
+        "metric": metric,
+        "ranking": _service().get_insights_ranking(metric, limit, portieri)
+    }))
+
+
+@api.route('/api/cache/clear', methods=['POST'])
+def clear_cache():
+    """Pulisce la cache"""
+    service = _service()
+    service.cache.clear()
+    return jsonify({"message": f"Cache {service.config.label} pulita", "status": "ok"})
+
+
+@api.route('/api/cache/refresh', methods=['GET', 'POST'])
+def refresh_cache():
+    """Avvia (POST) o consulta (GET) il refresh dei dati FBref in background"""
+    service = _service()
+    if request.method == 'GET':
+        return jsonify({
+            "refresh": service.refresher.status(),
+            "data_loaded": service.dataset.row_counts(),
+            "data_version": service.dataset.version
+        })
+
+    started = service.refresher.trigger()
+    return jsonify({
+        "message": f"Refresh dati {service.config.label} avviato" if started else "Refresh già in corso",
+        "status": "ok",
+        "started": started,
+        "refresh": service.refresher.status(),
+        "data_loaded": service.dataset.row_counts(),
+        "data_version": service.dataset.version
+    }), 202
+
+
+@api.route('/', methods=['GET'])
+def root():
+    """Root endpoint"""
+    service = _service()
+    return jsonify({
+        "message": f"Fantacalcio Stats API - {service.config.platform} Backend",
+        "status": "running",
+        "endpoints": ENDPOINTS,
+        "data_source": "FBref via SoccerData",
+        "platform": service.config.platform
+    })
+
+
+def create_app(config):
+    """App Flask con servizio FBref per un preset ("railway", "oracle") o una ServiceConfig"""
+    if isinstance(config, str):
+        config = ServiceConfig.from_env(config)
+
+    logger.info(f"🚀 Inizializzazione {config.platform} FBref Service...")
+    service = FBrefService(config)
+
+    app = Flask(__name__)
+    # Riferimento al servizio per le route e per gli hook di gunicorn.conf.py
+    app.extensions['fbref_service'] = service
+
+    if config.cors_origins:
+        from flask_cors import CORS
+        CORS(app, origins=config.cors_origins)
+
+    app.register_blueprint(api)
+    return app
+
+
+def run(app):
+    """Avvio con il server di sviluppo Flask (python railway_app.py / oracle_app.py)"""
+    service = app.extensions['fbref_service']
+    config = service.config
+
+    print(f"🚀 Fantacalcio Backend - {config.platform} Deploy")
+    print(f"📊 {', '.join(config.leagues)} {', '.join(config.seasons)} (Dati REALI FBref)")
+    print(f"🌐 Port: {config.port}")
+    print("📋 Endpoints:")
+    for endpoint in ENDPOINTS:
+        print(f"   {endpoint}")
+    print()
+
+    if service.snapshot_manifest:
+        print(f"⚡ Dati da snapshot locale ({service.snapshot_manifest['created_at']})")
+        print("💡 Aggiornamento dati: python -m fbref_core.snapshot")
+    elif service.soccerdata_available:
+        print(f"✅ SoccerData pronto su {config.platform}!")
+    else:
+        print("❌ SoccerData non disponibile")
+
+    if config.banner_note:
+        print(f"💡 {config.banner_note}")
+    print()
+
+    # Thread di refresh solo nel processo che serve le richieste
+    service.refresher.start()
+
+    app.run(host='0.0.0.0', port=config.port, debug=False)
@@ -0,0 +1,406 @@
+"""
+Ottimizzatore d'asta Mantra: completa la rosa con il budget rimasto
+Per ogni ruolo principale mancante si scelgono esattamente i giocatori richiesti,
+massimizzando il valore atteso (insights FBref + FVM) con costo totale entro il budget.
+
+Knapsack a due livelli con programmazione dinamica vettoriale (numpy):
+  1. per ruolo: miglior valore con n giocatori per ogni costo esatto (frontiera)
+  2. tra ruoli: convoluzione max-plus delle frontiere
+
+Le frontiere per ruolo restano in cache: durante l'asta, quando un giocatore viene
+comprato, si ricalcola solo il ruolo che lo contiene
+"""
+
+import math
+import time
+import logging
+import threading
+
+import numpy as np
+
+from .cache import ResponseCache
+from .fasce import ruolo_principale
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FVM_WEIGHT = 0.5
+MAX_SOLUTIONS = 10
+# Limiti delle richieste: la tabella delle scelte occupa candidati x giocatori x budget.
+# Crediti massimi di una lega Mantra e giocatori massimi di una rosa
+MAX_BUDGET = 1000
+MAX_ROSTER_SIZE = 40
+# Frontiere per ruolo in cache (ruolo, giocatori richiesti, esclusi, prezzi, peso FVM)
+FRONTIER_CACHE_SIZE = 512
+
+
+def _whole_number(value):
+    """Intero da un valore JSON (int o float senza decimali), None se non lo è"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if isinstance(value, float) and not (math.isfinite(value) and value.is_integer()):
+        return None
+    return int(value)
+
+
+def _norm(values):
+    """Valori scalati su [0, 1] (NaN e negativi -> 0)"""
+    values = np.nan_to_num(values.astype(float), nan=0.0)
+    values = np.clip(values, 0, None)
+    top = values.max() if len(values) else 0
+    return values / top if top > 0 else values
+
+
+class AuctionPool:
+    """Giocatori del listone pronti per l'ottimizzazione, raggruppati per ruolo principale
+
+    Costruito una volta per listone risolto: prezzo di default (FVM), punti attesi
+    dagli insights FBref e FVM, entrambi normalizzati all'interno del ruolo
+    """
+
+    def __init__(self, listone):
+        self.listone = listone
+        players = [player for player in listone.players if ruolo_principale(player.get("ruolo_mantra"))]
+        self.players = {player["id"]: player for player in players}
+        self.ids = {str(player_id): player_id for player_id in self.players}
+
+        fbref = [listone.mapping.get(player["id"]) for player in players]
+        table = listone.table
+        partite = table.values(fbref, "partite") if table is not None else np.full(len(players), np.nan)
+        voto = table.values(fbref, "voto_medio_stimato") if table is not None else partite
+        bonus = table.values(fbref, "bonus_malus_attesi") if table is not None else partite
+        # Punti fantacalcio stagionali stimati: voto per presenze più bonus/malus
+        points = partite * voto + bonus
+        fvm = np.array([float(player.get("fvm") or 0) for player in players])
+
+        self.roles = {}
+        roles = np.array([ruolo_principale(player.get("ruolo_mantra")) for player in players], dtype=object)
+        for ruolo in dict.fromkeys(roles):
+            rows = np.flatnonzero(roles == ruolo)
+            self.roles[ruolo] = {
+                "ids": [players[row]["id"] for row in rows],
+                "price": np.maximum(1, np.rint(fvm[rows])).astype(np.int64),
+                "points": _norm(points[rows]),
+                "fvm": _norm(fvm[rows]),
+            }
+        self.fbref = {player["id"]: player_fbref for player, player_fbref in zip(players, fbref)}
+
+
+def _role_frontier(prices, values, need, budget):
+    """(miglior valore per costo esatto con need giocatori, tabella delle scelte)"""
+    dp = np.full((need + 1, budget + 1), -np.inf)
+    dp[0, 0] = 0.0
+    take = np.zeros((len(prices), need + 1, budget + 1), dtype=bool)
+    for item, (price, value) in enumerate(zip(prices.tolist(), values.tolist())):
+        if price > budget:
+            continue
+        for count in range(min(item + 1, need), 0, -1):
+            candidate = dp[count - 1, :budget + 1 - price] + value
+            current = dp[count, price:]
+            better = candidate > current
+            current[better] = candidate[better]
+            take[item, count, price:] = better
+    return dp[need], take
+
+
+def _prune(prices, values, need):
+    """Indici dei candidati non dominati: chi ha almeno need giocatori del ruolo
+    che costano meno (o uguale) e valgono di più (o uguale) non entra mai nella soluzione"""
+    order = np.lexsort((-values, prices))
+    kept = []
+    best = []
+    for row in order.tolist():
+        dominated = sum(1 for value in best if value >= values[row])
+        if dominated < need:
+            kept.append(row)
+        best.append(values[row])
+    return np.array(sorted(kept), dtype=np.int64)
+
+
+class RoleFrontier:
+    """Frontiera di un ruolo per un insieme di candidati: riusabile per ogni budget <= budget"""
+
+    def __init__(self, ids, prices, values, need, budget):
+        rows = _prune(prices, values, need)
+        self.ids = [ids[row] for row in rows]
+        self.prices = prices[rows]
+        self.values = values[rows]
+        self.need = need
+        self.budget = budget
+        self.best, self.take = _role_frontier(self.prices, self.values, need, budget)
+
+    def pick(self, cost):
+        """Indici dei candidati scelti per il costo esatto indicato"""
+        chosen = []
+        count = self.need
+        for item in range(len(self.prices) - 1, -1, -1):
+            if count == 0:
+                break
+            if self.take[item, count, cost]:
+                chosen.append(item)
+                count -= 1
+                cost -= int(self.prices[item])
+        return chosen[::-1]
+
+
+def _convolve(total, best, budget):
+    """Convoluzione max-plus (valore per costo, costo assegnato al ruolo)
+
+    Si considerano solo i costi di Pareto del ruolo (valore più alto di ogni costo
+    inferiore): a parità di valore conviene sempre spendere meno
+    """
+    best = best[:budget + 1]
+    running = np.maximum.accumulate(np.concatenate(([-np.inf], best[:-1])))
+    merged = np.full(budget + 1, -np.inf)
+    split = np.full(budget + 1, -1, dtype=np.int64)
+    for cost in np.flatnonzero(best > running).tolist():
+        candidate = total[:budget + 1 - cost] + best[cost]
+        current = merged[cost:]
+        better = candidate > current
+        current[better] = candidate[better]
+        split[cost:][better] = cost
+    return merged, split
+
+
+def _best_within(total):
+    """(miglior valore con costo <= c, costo che lo realizza) per ogni c"""
+    running = np.maximum.accumulate(total)
+    positions = np.where(total >= running, np.arange(len(total)), -1)
+    return running, np.maximum.accumulate(positions)
+
+
+class _Plan:
+    """Frontiere dei ruoli combinate da sinistra (prefissi) e, se servono, da destra (suffissi)
+
+    Una soluzione alternativa cambia un solo ruolo: si combina il prefisso prima del
+    ruolo con la nuova frontiera e si chiude con il miglior suffisso, senza rifare
+    tutta la catena di convoluzioni
+    """
+
+    def __init__(self, frontiers, budget, suffixes=False):
+        self.frontiers = frontiers
+        self.budget = budget
+        start = np.full(budget + 1, -np.inf)
+        start[0] = 0.0
+        self.prefix = [start]
+        self.prefix_splits = []
+        for frontier in frontiers:
+            merged, split = _convolve(self.prefix[-1], frontier.best, budget)
+            self.prefix.append(merged)
+            self.prefix_splits.append(split)
+
+        self.suffix = None
+        if suffixes:
+            suffix = [start]
+            splits = []
+            for frontier in reversed(frontiers):
+                merged, split = _convolve(suffix[-1], frontier.best, budget)
+                suffix.append(merged)
+                splits.append(split)
+            # suffix[r]: ruoli da r in poi
+            self.suffix = [_best_within(total) for total in suffix[::-1]]
+            self.suffix_splits = splits[::-1]
+
+    def best(self):
+        """(valore, costo per ruolo) della soluzione migliore, None se impossibile"""
+        total = self.prefix[-1]
+        if not np.isfinite(total).any():
+            return None
+        cost = int(np.argmax(total))
+        return float(total[cost]), self._unwind_prefix(len(self.frontiers), cost)
+
+    def replace(self, role, frontier):
+        """(valore, costo per ruolo) con la frontiera di un ruolo sostituita, None se impossibile"""
+        merged, split = _convolve(self.prefix[role], frontier.best, self.budget)
+        rest, positions = self.suffix[role + 1]
+        totals = merged + rest[::-1]
+        if not np.isfinite(totals).any():
+            return None
+        cost = int(np.argmax(totals))
+        role_cost = int(split[cost])
+        costs = self._unwind_prefix(role, cost - role_cost) + [role_cost]
+        costs += self._unwind_suffix(role + 1, int(positions[self.budget - cost]))
+        return float(totals[cost]), costs
+
+    def _unwind_prefix(self, count, cost):
+        costs = []
+        for split in reversed(self.prefix_splits[:count]):
+            costs.append(int(split[cost]))
+            cost -= costs[-1]
+        return costs[::-1]
+
+    def _unwind_suffix(self, role, cost):
+        costs = []
+        for split in self.suffix_splits[role:]:
+            costs.append(int(split[cost]))
+            cost -= costs[-1]
+        return costs
+
+
+class AuctionOptimizer:
+    """Soluzioni migliori per completare la rosa, con frontiere per ruolo in cache"""
+
+    def __init__(self, listone_fn, cache_size=FRONTIER_CACHE_SIZE):
+        # listone_fn() -> ResolvedListone corrente o None
+        self.listone_fn = listone_fn
+        self.frontiers = ResponseCache(max_entries=cache_size)
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def pool(self):
+        """Pool del listone corrente (ricostruito solo se cambia il listone)"""
+        listone = self.listone_fn()
+        if listone is None:
+            return None
+        pool = self._pool
+        if pool is None or pool.listone is not listone:
+            with self._lock:
+                pool = self._pool
+                if pool is None or pool.listone is not listone:
+                    pool = self._pool = AuctionPool(listone)
+                    self.frontiers.clear()
+        return pool
+
+    def _frontier(self, pool, ruolo, need, excluded, prices, fvm_weight, budget):
+        role = pool.roles[ruolo]
+        rows = [row for row, player_id in enumerate(role["ids"]) if player_id not in excluded]
+        ids = [role["ids"][row] for row in rows]
+        role_prices = role["price"][rows]
+        overrides = tuple((player_id, prices[player_id]) for player_id in ids if player_id in prices)
+        for position, player_id in enumerate(ids):
+            if player_id in prices:
+                role_prices[position] = prices[player_id]
+
+        key = (ruolo, need, tuple(sorted(player_id for player_id in role["ids"] if player_id in excluded)),
+               overrides, fvm_weight)
+        frontier = self.frontiers.get(key)
+        if frontier is not None and frontier.budget >= budget:
+            return frontier, True
+
+        values = (1 - fvm_weight) * role["points"][rows] + fvm_weight * role["fvm"][rows]
+        frontier = RoleFrontier(ids, role_prices, values, need, budget)
+        self.frontiers.set(key, frontier)
+        return frontier, False
+
+    @staticmethod
+    def _picks(needs, frontiers, costs):
+        picks = []
+        for ruolo, frontier, cost in zip(needs, frontiers, costs):
+            for item in frontier.pick(cost):
+                picks.append((ruolo, frontier.ids[item], int(frontier.prices[item]), float(frontier.values[item])))
+        return picks
+
+    def optimize(self, needs, budget, excluded=(), prices=None, fvm_weight=DEFAULT_FVM_WEIGHT, solutions=3):
+        """Fino a `solutions` completamenti della rosa, dal valore più alto
+
+        needs: {ruolo principale Mantra: giocatori ancora da prendere}
+        excluded: id del listone non disponibili (già comprati, scartati)
+        prices: {id: prezzo previsto} al posto del prezzo di default (FVM)
+        I parametri arrivano come dal body JSON: ValueError (messaggio per il client) per
+        ruoli sconosciuti o parametri non validi, RuntimeError senza listone
+        """
+        start = time.perf_counter()
+        pool = self.pool()
+        if pool is None:
+            raise RuntimeError("Listone non disponibile")
+
+        if not isinstance(needs, dict):
+            raise ValueError("ruoli deve essere un oggetto {ruolo: giocatori mancanti}")
+        counts = {ruolo: _whole_number(count) for ruolo, count in needs.items()}
+        invalid = [str(ruolo) for ruolo, count in counts.items() if count is None or count < 0]
+        if invalid:
+            raise ValueError(f"Giocatori mancanti non validi per: {', '.join(invalid)} (interi da 0 in su)")
+        needs = {ruolo: count for ruolo, count in counts.items() if count > 0}
+        unknown = [ruolo for ruolo in needs if ruolo not in pool.roles]
+        if unknown:
+            raise ValueError(f"Ruoli sconosciuti: {', '.join(unknown)} (validi: {', '.join(pool.roles)})")
+        if sum(needs.values()) > MAX_ROSTER_SIZE:
+            raise ValueError(f"Al massimo {MAX_ROSTER_SIZE} giocatori da completare")
+        budget = _whole_number(budget)
+        if budget is None or not 1 <= budget <= MAX_BUDGET:
+            raise ValueError(f"budget deve essere un intero tra 1 e {MAX_BUDGET}")
+        if isinstance(fvm_weight, bool) or not isinstance(fvm_weight, (int, float)) or not 0 <= fvm_weight <= 1:
+            raise ValueError("peso_fvm deve essere un numero tra 0 e 1")
+        solutions = _whole_number(solutions)
+        if solutions is None or solutions < 1:
+            raise ValueError(f"soluzioni deve essere un intero tra 1 e {MAX_SOLUTIONS}")
+        solutions = min(solutions, MAX_SOLUTIONS)
+        if not isinstance(excluded, (list, tuple)) or any(
+                isinstance(player_id, bool) or not isinstance(player_id, (int, str)) for player_id in excluded):
+            raise ValueError("esclusi deve essere una lista di id del listone (numeri o stringhe)")
+        if prices is not None and not isinstance(prices, dict):
+            raise ValueError("prezzi deve essere un oggetto {id: prezzo}")
+        invalid = [str(player_id) for player_id, price in (prices or {}).items()
+                   if isinstance(price, bool) or not isinstance(price, (int, float)) or not math.isfinite(price)]
+        if invalid:
+            raise ValueError(f"Prezzi non numerici per: {', '.join(invalid)}")
+
+        excluded = {pool.ids.get(str(player_id), player_id) for player_id in excluded}
+        # Oltre il budget un prezzo vale come "non acquistabile": basta MAX_BUDGET + 1
+        prices = {pool.ids[str(player_id)]: int(min(max(1, price), MAX_BUDGET + 1))
+                  for player_id, price in (prices or {}).items() if str(player_id) in pool.ids}
+        stats = {"cached": 0, "computed": 0}
+
+        frontiers = []
+        for ruolo, need in needs.items():
+            frontier, cached = self._frontier(pool, ruolo, need, excluded, prices, fvm_weight, budget)
+            stats["cached" if cached else "computed"] += 1
+            frontiers.append(frontier)
+        plan = _Plan(frontiers, budget, suffixes=solutions > 1)
+
+        results = []
+        best = plan.best()
+        if best is not None:
+            picks = self._picks(needs, frontiers, best[1])
+            results.append((best[0], picks))
+
+            # Soluzioni alternative: si escludono uno alla volta i giocatori della migliore,
+            # ricalcolando solo la frontiera del loro ruolo
+            seen = {frozenset(player_id for _, player_id, _, _ in picks)}
+            alternatives = []
+            roles = list(needs)
+            for ruolo, player_id, _, _ in (picks if solutions > 1 else ()):
+                role = roles.index(ruolo)
+                frontier, cached = self._frontier(pool, ruolo, needs[ruolo], excluded | {player_id},
+                                                  prices, fvm_weight, budget)
+                stats["cached" if cached else "computed"] += 1
+                alternative = plan.replace(role, frontier)
+                if alternative is None:
+                    continue
+                role_frontiers = frontiers[:role] + [frontier] + frontiers[role + 1:]
+                alternative_picks = self._picks(needs, role_frontiers, alternative[1])
+                chosen = frozenset(item[1] for item in alternative_picks)
+                if chosen not in seen:
+                    seen.add(chosen)
+                    alternatives.append((alternative[0], alternative_picks))
+            alternatives.sort(key=lambda result: -result[0])
+            results.extend(alternatives[:solutions - 1])
+
+        return {
+            "budget": budget,
+            "ruoli": needs,
+            "soluzioni": [self._describe(pool, value, picks, budget) for value, picks in results],
+            "frontiere": stats,
+            "durata_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+
+    @staticmethod
+    def _describe(pool, value, picks, budget):
+        cost = sum(price for _, _, price, _ in picks)
+        return {
+            "valore": round(value * 100, 1),
+            "costo": cost,
+            "residuo": budget - cost,
+            "giocatori": [
+                {
+                    "id": player_id,
+                    "nome": pool.players[player_id]["nome"],
+                    "squadra": pool.players[player_id]["squadra"],
+                    "ruolo": pool.players[player_id].get("ruolo_mantra"),
+                    "ruolo_principale": ruolo,
+                    "fbref": pool.fbref.get(player_id),
+                    "prezzo": price,
+                    "valore": round(player_value * 100, 1)
+                }
+                for ruolo, player_id, price, player_value in picks
+            ]
+        }
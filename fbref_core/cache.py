@@ -0,0 +1,120 @@
+"""
+Cache delle risposte con limite di dimensione (LRU), scadenza (TTL)
+e cache negativa per i nomi non trovati
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+
+def cache_size_from_env(default=2048):
+    """Numero massimo di voci in cache (FBREF_CACHE_SIZE)"""
+    try:
+        return max(1, int(os.environ.get('FBREF_CACHE_SIZE', default)))
+    except ValueError:
+        return default
+
+
+class ResponseCache:
+    """Cache LRU+TTL di risposte serializzate, con contatori per /api/health
+
+    Thread-safe: ogni worker gunicorn ha la sua istanza, condivisa tra i thread
+    """
+
+    def __init__(self, max_entries=2048, ttl=30 * 60, negative_ttl=5 * 60, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+
+        # chiave -> (scadenza, valore, negativa)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def key(player_name, team_name=None, version=""):
+        """Chiave normalizzata: "Martinez L." e "martinez l." condividono la voce"""
+        name = player_name.lower().strip()
+        team = (team_name or "").lower().strip()
+        return f"{version}:{name}|{team}"
+
+    def get(self, key):
+        """Valore in cache (None se assente o scaduto); la voce diventa la più recente"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value, negative = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if negative:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key, value, negative=False):
+        """Salva un valore; le voci negative (giocatore non trovato) scadono prima"""
+        ttl = self.negative_ttl if negative else self.ttl
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value, negative)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def purge_expired(self):
+        """Rimuove tutte le voci scadute, restituisce quante ne ha rimosse"""
+        with self._lock:
+            now = self.clock()
+            expired = [key for key, (expires_at, _, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+            self.expirations += len(expired)
+            return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self):
+        """Contatori per /api/health"""
+        with self._lock:
+            return self._stats()
+
+    def _stats(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl,
+            "negative_ttl_s": self.negative_ttl,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0
+        }
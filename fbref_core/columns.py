@@ -0,0 +1,41 @@
+"""
+Estrazione colonnare dalle tabelle FBref
+Versioni vettoriali di _safe_numeric / _safe_round applicate a colonne intere
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def numeric_column(table, column):
+    """Colonna convertita in float, con NaN e infiniti sostituiti da 0 (come _safe_numeric)"""
+    if table.empty or column not in table.columns:
+        return np.zeros(len(table))
+    values = pd.to_numeric(table[column], errors='coerce').to_numpy(dtype=float)
+    values[~np.isfinite(values)] = 0
+    return values
+
+
+def int_array(table, column):
+    """Colonna troncata a intero come int(_safe_numeric(...))"""
+    return numeric_column(table, column).astype(np.int64)
+
+
+def int_column(table, column):
+    """Colonna intera come lista di int Python"""
+    return int_array(table, column).tolist()
+
+
+def rounded_column(table, column, decimals=1):
+    """Colonna arrotondata come _safe_round (0 intero per valori non validi)"""
+    if table.empty or column not in table.columns:
+        return [0] * len(table)
+    values = pd.to_numeric(table[column], errors='coerce').to_numpy(dtype=float).tolist()
+    return [round(value, decimals) if math.isfinite(value) else 0 for value in values]
+
+
+def round_values(values, decimals=1):
+    """Arrotondamento elemento per elemento identico a round() di Python"""
+    return np.array([round(value, decimals) for value in values.tolist()], dtype=float)
@@ -0,0 +1,124 @@
+"""
+Configurazione dei backend FBref: un preset per host (Railway, Oracle Cloud)
+più override da variabili d'ambiente
+"""
+
+import os
+
+from .cache import cache_size_from_env
+from .refresher import refresh_interval_from_env
+from .snapshot import DEFAULT_LEAGUES, DEFAULT_SEASONS
+
+# Valori per host: tutto ciò che non è qui è identico tra le piattaforme
+PRESETS = {
+    "railway": {
+        "platform": "Railway",
+        "label": "Railway",
+        "data_source": "Railway-FBref-Real",
+        "port": 8000,
+        # Railway assegna la porta con la variabile PORT
+        "port_env": "PORT",
+        # CORS per permettere chiamate dal frontend Vercel
+        "cors_origins": [
+            "https://fantahustler.vercel.app",  # Dominio fisso Vercel
+            "http://localhost:3000",
+            "http://localhost:5173"
+        ],
+        "surname_bonus": True,
+        "not_found_suggestions": 10,
+        "banner_note": "Railway gestisce restart automatico"
+    },
+    "oracle": {
+        "platform": "Oracle Cloud",
+        "label": "Oracle",
+        "data_source": "Oracle-FBref-Real",
+        # Porta fissa per il proxy Nginx
+        "port": 5003,
+        "port_env": None,
+        # CORS gestito da Nginx per evitare header duplicati
+        "cors_origins": None,
+        "surname_bonus": False,
+        "not_found_suggestions": 0,
+        "banner_note": "Oracle Cloud - Always On, 24GB RAM"
+    }
+}
+
+
+def _env_list(name, default):
+    """Lista separata da virgole da una variabile d'ambiente"""
+    value = os.environ.get(name)
+    if not value:
+        return list(default) if default is not None else None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class ServiceConfig:
+    """Parametri del servizio FBref e dell'app Flask per un host"""
+
+    def __init__(self, name, platform, label, data_source, port=8000, cors_origins=None,
+                 leagues=None, seasons=None, cache_size=2048, cache_ttl=30 * 60,
+                 negative_ttl=5 * 60, refresh_interval=None, incremental=True,
+                 full_refresh_days=7, http_max_age=5 * 60, surname_bonus=True,
+                 not_found_suggestions=10, banner_note=""):
+        self.name = name
+        self.platform = platform
+        # Etichetta breve per log e messaggi ("Railway", "Oracle")
+        self.label = label
+        # Valore dell'header X-Data-Source
+        self.data_source = data_source
+        self.port = port
+        self.cors_origins = cors_origins
+        # Leghe lette per ogni stagione (anche quelle di prestiti e trasferimenti)
+        self.leagues = list(leagues or DEFAULT_LEAGUES)
+        # La stagione più recente è la corrente, le altre vengono caricate su richiesta
+        self.seasons = list(seasons or DEFAULT_SEASONS)
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.negative_ttl = negative_ttl
+        self.refresh_interval = refresh_interval
+        # Refresh per giornata (solo partite nuove), completo ogni full_refresh_days
+        self.incremental = incremental
+        self.full_refresh_days = full_refresh_days
+        # Secondi di riuso per browser e CDN (poi rivalidazione con ETag)
+        self.http_max_age = http_max_age
+        # Matching: bonus cognome (Railway) e suggerimenti nei "non trovato"
+        self.surname_bonus = surname_bonus
+        self.not_found_suggestions = not_found_suggestions
+        self.banner_note = banner_note
+
+    @classmethod
+    def from_env(cls, preset):
+        """Preset dell'host con override da variabili d'ambiente
+
+        FBREF_PORT, FBREF_CORS_ORIGINS, FBREF_LEAGUES, FBREF_SEASONS,
+        FBREF_CACHE_SIZE, FBREF_REFRESH_HOURS, FBREF_INCREMENTAL (0 = sempre
+        refresh completo), FBREF_FULL_REFRESH_DAYS, FBREF_HTTP_MAX_AGE
+        """
+        if preset not in PRESETS:
+            raise ValueError(f"Preset sconosciuto: {preset} (disponibili: {', '.join(PRESETS)})")
+
+        values = dict(PRESETS[preset])
+        default_port = values.pop("port")
+        port_env = values.pop("port_env")
+        port = os.environ.get('FBREF_PORT') or (port_env and os.environ.get(port_env)) or default_port
+
+        return cls(
+            name=preset,
+            port=int(port),
+            cors_origins=_env_list('FBREF_CORS_ORIGINS', values.pop("cors_origins")),
+            leagues=_env_list('FBREF_LEAGUES', DEFAULT_LEAGUES),
+            seasons=_env_list('FBREF_SEASONS', DEFAULT_SEASONS),
+            cache_size=cache_size_from_env(),
+            refresh_interval=refresh_interval_from_env(),
+            incremental=os.environ.get('FBREF_INCREMENTAL', '1') != '0',
+            full_refresh_days=_env_float('FBREF_FULL_REFRESH_DAYS', 7),
+            http_max_age=int(_env_float('FBREF_HTTP_MAX_AGE', 5 * 60)),
+            **values
+        )
@@ -0,0 +1,169 @@
+"""
+Dataset FBref immutabile: tabelle + strutture derivate
+Viene costruito per intero fuori dal percorso delle richieste e pubblicato
+con un singolo assegnamento di riferimento (hot-swap atomico)
+"""
+
+import time
+import hashlib
+
+import pandas as pd
+
+from .aggregates import compute_totals
+from .aliases import AliasTable
+from .name_index import PlayerNameIndex
+from .normalization import RoleNormalization
+from .player_table import PlayerTable
+from .row_index import PlayerRowIndex
+from .similarity import SimilarityIndex
+from .insights import compute_insights
+from .responses import build_response_store
+
+TABLE_NAMES = ('standard', 'shooting', 'passing', 'keeper', 'defense', 'possession', 'gca')
+
+
+def _season_of(standard, manifest):
+    """Stagione del dataset: dall'indice FBref, altrimenti dal manifest dello snapshot"""
+    if not standard.empty and 'season' in standard.index.names:
+        return str(standard.index.get_level_values('season')[0])
+    seasons = (manifest or {}).get("seasons")
+    return seasons[0] if seasons else None
+
+
+def _merge_rows(previous, updated, order):
+    """Righe ricalcolate al posto di quelle precedenti, nell'ordine dei giocatori del dataset"""
+    kept = previous[~previous.index.isin(updated.index)]
+    return pd.concat([kept, updated]).reindex(order)
+
+
+class FBrefDataset:
+    """Tabelle di una stagione e indici costruiti insieme, mai modificati dopo la creazione"""
+
+    def __init__(self, tables, platform, manifest=None, season=None, previous=None, changed=None, aliases=None):
+        """previous + changed: aggiornamento incrementale, si ricalcolano solo i giocatori
+        in changed e tutto il resto viene riusato dal dataset precedente
+
+        aliases: alias del listone salvati con lo snapshot (aliases.load_aliases)"""
+        self.tables = {name: tables.get(name, pd.DataFrame()) for name in TABLE_NAMES}
+        for name, table in tables.items():
+            self.tables.setdefault(name, table)
+        self.manifest = manifest
+        self.loaded_at = time.time()
+        self.season = season or _season_of(self.standard_stats, manifest)
+        # Data dei dati: creazione dello snapshot, altrimenti il giorno del download
+        self.updated = (manifest or {}).get("created_at", time.strftime("%Y-%m-%d"))[:10]
+        # Secondi per fase di costruzione, esposti in /api/metrics
+        self.build_times = {}
+
+        incremental = previous is not None and changed is not None and not previous.is_empty
+        start = time.perf_counter()
+        if incremental and self._same_rows(previous):
+            # Nessuna riga nuova (giocatore o squadra): indici invariati
+            self.name_index = previous.name_index
+            self.row_index = previous.row_index
+        else:
+            self.name_index = PlayerNameIndex.from_stats(self.standard_stats)
+            start = self._timed("name_index", start)
+            self.row_index = PlayerRowIndex.from_tables(self.tables)
+        start = self._timed("row_index", start)
+        # Chiavi canoniche per il match esatto prima della ricerca fuzzy
+        self.aliases = AliasTable.from_index(self.name_index, aliases)
+        start = self._timed("aliases", start)
+
+        if incremental:
+            changed = set(changed)
+            players = list(self.row_index.positions.get('standard', {}))
+            self.insights = _merge_rows(
+                previous.insights, compute_insights(self.tables, self.row_index, changed), players
+            )
+            start = self._timed("insights", start)
+            # Tassi per 90' sui minuti di ogni tabella (tutte aggiornate per giornata);
+            # i percentili di ruolo si spostano anche per chi non ha giocato
+            self.normalization = RoleNormalization.from_tables(self.tables, self.row_index)
+            start = self._timed("normalization", start)
+            # "ultimo_aggiornamento" resta quello dell'ultimo dato cambiato per ogni giocatore
+            updated = build_response_store(
+                self.tables, self.row_index, self.insights, platform, self.updated,
+                changed | self.normalization.changed_since(getattr(previous, "normalization", None)),
+                self.normalization
+            )
+            self.responses = previous.responses.merged(updated)
+            start = self._timed("responses", start)
+            self.totals = _merge_rows(previous.totals, compute_totals(self.tables, changed), self.name_index.players)
+            start = self._timed("totals", start)
+        else:
+            self.insights = compute_insights(self.tables, self.row_index)
+            start = self._timed("insights", start)
+            # Tassi per 90' e percentili per ruolo, serviti nelle risposte pre-calcolate
+            self.normalization = RoleNormalization.from_tables(self.tables, self.row_index)
+            start = self._timed("normalization", start)
+            self.responses = build_response_store(self.tables, self.row_index, self.insights, platform,
+                                                  self.updated, normalization=self.normalization)
+            start = self._timed("responses", start)
+            # Totali per giocatore, base delle aggregazioni su più stagioni
+            self.totals = compute_totals(self.tables)
+            start = self._timed("totals", start)
+
+        # Roster colonnare per /api/players: ricostruito per intero, costa pochi millisecondi
+        self.player_table = PlayerTable.from_dataset(self.tables, self.row_index, self.insights)
+        start = self._timed("player_table", start)
+        # Profili standardizzati per /api/players/<nome>/similar, stesso ordine della tabella
+        self.similarity = SimilarityIndex.from_normalization(self.normalization)
+        start = self._timed("similarity", start)
+
+        # Versione derivata dal contenuto delle risposte
+        digest = hashlib.sha1()
+        for player in sorted(self.responses.payloads):
+            digest.update(self.responses.payloads[player])
+        self.version = digest.hexdigest()[:16]
+        self._timed("version", start)
+
+    def _same_rows(self, previous):
+        # Le partite nuove aggiornano righe esistenti o ne aggiungono in coda
+        return all(len(table) == len(previous.tables.get(name, ())) for name, table in self.tables.items())
+
+    def _timed(self, stage, start):
+        now = time.perf_counter()
+        self.build_times[stage] = now - start
+        return now
+
+    @classmethod
+    def empty(cls, platform):
+        """Dataset vuoto usato prima del primo caricamento"""
+        return cls({}, platform)
+
+    @property
+    def standard_stats(self):
+        return self.tables['standard']
+
+    @property
+    def shooting_stats(self):
+        return self.tables['shooting']
+
+    @property
+    def passing_stats(self):
+        return self.tables['passing']
+
+    @property
+    def keeper_stats(self):
+        return self.tables['keeper']
+
+    @property
+    def defense_stats(self):
+        return self.tables['defense']
+
+    @property
+    def possession_stats(self):
+        return self.tables['possession']
+
+    @property
+    def gca_stats(self):
+        return self.tables['gca']
+
+    @property
+    def is_empty(self):
+        return self.standard_stats.empty
+
+    def row_counts(self):
+        """Righe per tabella (0 per tabelle non disponibili)"""
+        return {name: len(table) for name, table in self.tables.items()}
@@ -0,0 +1,76 @@
+"""
+Validatori HTTP e compressione delle risposte JSON
+Ogni payload porta con sé un ETag forte derivato dal contenuto (calcolato una
+volta con il dataset) e le sue varianti gzip/brotli: pre-calcolate per i payload
+grandi e stabili (listone), compresse al volo e poi riusate per gli altri
+"""
+
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # brotli è opzionale: senza, si serve solo gzip
+    brotli = None
+
+# Sotto questa dimensione la compressione non conviene (la risposta sta in un pacchetto)
+MIN_COMPRESS_SIZE = 1400
+
+# Livelli per la compressione al volo e per quella fatta una volta per snapshot
+ONLINE_LEVELS = {"br": 5, "gzip": 6}
+PRECOMPRESS_LEVELS = {"br": 9, "gzip": 9}
+
+
+def _compress(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def available_encodings():
+    """Codifiche supportate, in ordine di preferenza"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def etag_for(data):
+    """ETag forte (senza virgolette) dal contenuto della risposta"""
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+
+class EncodedPayload(bytes):
+    """Bytes JSON con ETag e varianti compresse memorizzate
+
+    È un bytes a tutti gli effetti: si concatena nelle risposte batch e listone
+    e si confronta con gli altri payload come prima
+    """
+
+    def __new__(cls, data, precompress=False):
+        payload = super().__new__(cls, data)
+        payload.etag = etag_for(payload)
+        payload._variants = {}
+        if precompress and len(payload) >= MIN_COMPRESS_SIZE:
+            for encoding in available_encodings():
+                payload._variants[encoding] = _compress(payload, encoding, PRECOMPRESS_LEVELS[encoding])
+        return payload
+
+    def variant(self, encoding):
+        """Corpo compresso con la codifica indicata (calcolato alla prima richiesta)"""
+        body = self._variants.get(encoding)
+        if body is None:
+            body = self._variants[encoding] = _compress(self, encoding, ONLINE_LEVELS[encoding])
+        return body
+
+
+def encoded(data):
+    """EncodedPayload per bytes qualsiasi (riusa quello esistente)"""
+    return data if isinstance(data, EncodedPayload) else EncodedPayload(data)
+
+
+def choose_encoding(payload, accepted):
+    """Codifica da usare per il payload; accepted(codifica) -> qualità dell'header Accept-Encoding"""
+    if len(payload) < MIN_COMPRESS_SIZE:
+        return None
+    for encoding in available_encodings():
+        if accepted(encoding) > 0:
+            return encoding
+    return None
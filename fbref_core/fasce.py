@@ -0,0 +1,246 @@
+"""
+Fasce FVM dei giocatori del listone (stessa regola di getFasciaGiocatore nel frontend)
+Ranking per FVM all'interno del ruolo principale Mantra calcolato una volta quando il
+listone viene letto; le fasce manuali si sovrappongono e, quando cambiano, si
+ricostruisce solo la risposta del ruolo interessato
+"""
+
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+
+from .encoding import EncodedPayload
+from .responses import dumps
+
+logger = logging.getLogger(__name__)
+
+# Fasce in ordine di ranking: (chiave, prima posizione esclusa), l'ultima prende il resto
+FASCE = (("top", 4), ("supertop", 8), ("buoni", 16), ("scommesse", 24), ("daEvitare", None))
+FASCIA_KEYS = tuple(key for key, _ in FASCE)
+
+# Ruoli Mantra dal più difensivo al più offensivo (GERARCHIA_RUOLI del frontend)
+GERARCHIA_RUOLI = ('Por', 'B', 'Dc', 'Ds', 'Dd', 'E', 'M', 'C', 'W', 'T', 'A', 'Pc')
+
+
+def default_overrides_path():
+    """File delle fasce manuali (override con FBREF_FASCE_PATH)"""
+    env_path = os.environ.get('FBREF_FASCE_PATH')
+    if env_path:
+        return Path(env_path)
+    return Path(__file__).resolve().parent.parent / "data" / "fasce_manuali.json"
+
+
+def ruolo_principale(ruolo_mantra):
+    """Ruolo più difensivo tra quelli Mantra del giocatore ("M;C" -> "M"), None se assente"""
+    ruoli = [ruolo.strip() for ruolo in str(ruolo_mantra or "").split(";") if ruolo.strip()]
+    if not ruoli:
+        return None
+    known = [ruolo for ruolo in ruoli if ruolo in GERARCHIA_RUOLI]
+    return min(known, key=GERARCHIA_RUOLI.index) if known else ruoli[0]
+
+
+def fascia_for_rank(rank):
+    """Fascia automatica per la posizione (0 = FVM più alto del ruolo), None -> daEvitare"""
+    if rank is None:
+        return "daEvitare"
+    for key, limit in FASCE:
+        if limit is None or rank < limit:
+            return key
+
+
+def _fvm(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def assign_fasce(players):
+    """Fasce automatiche del listone: {ruolo principale: {id: voce}} nell'ordine del ranking
+
+    Come nel frontend: solo i giocatori con FVM > 0 entrano nel ranking del ruolo
+    (a parità di FVM vale l'ordine del listone), gli altri sono "daEvitare"
+    """
+    by_role = {}
+    for player in players:
+        by_role.setdefault(ruolo_principale(player.get("ruolo_mantra")) or "", []).append(player)
+
+    fasce = {}
+    for ruolo, members in by_role.items():
+        ranked = sorted((player for player in members if _fvm(player.get("fvm")) > 0),
+                        key=lambda player: -_fvm(player.get("fvm"))) if ruolo else []
+        ranks = {player["id"]: rank for rank, player in enumerate(ranked)}
+        entries = {}
+        for player in ranked + [player for player in members if player["id"] not in ranks]:
+            rank = ranks.get(player["id"])
+            entries[player["id"]] = {
+                "id": player["id"],
+                "nome": player["nome"],
+                "squadra": player["squadra"],
+                "ruolo": player.get("ruolo_mantra"),
+                "fvm": player.get("fvm"),
+                "rank": None if rank is None else rank + 1,
+                "fascia_automatica": fascia_for_rank(rank)
+            }
+        fasce[ruolo] = entries
+    return fasce
+
+
+def _role_payload(entries, overrides):
+    """Bytes JSON del ruolo: {id: voce con fascia effettiva e flag manuale}"""
+    return EncodedPayload(dumps({
+        str(player_id): dict(
+            entry,
+            fascia=overrides.get(player_id, entry["fascia_automatica"]),
+            manuale=player_id in overrides
+        )
+        for player_id, entry in entries.items()
+    }))
+
+
+class FasceState:
+    """Fasce di un listone con le fasce manuali applicate: mai modificato dopo la creazione"""
+
+    def __init__(self, listone, overrides, mtime, previous=None):
+        self.listone = listone
+        self.overrides = overrides
+        self.mtime = mtime
+        automatic = listone.fasce
+        # id -> ruolo principale per aggiornare solo il ruolo toccato da un override
+        self.roles = previous.roles if previous is not None else {
+            player_id: ruolo for ruolo, entries in automatic.items() for player_id in entries
+        }
+        self.ids = previous.ids if previous is not None else {str(player_id): player_id for player_id in self.roles}
+        changed = None
+        if previous is not None:
+            changed = {self.roles[player_id] for player_id in set(overrides) | set(previous.overrides)
+                       if player_id in self.roles and overrides.get(player_id) != previous.overrides.get(player_id)}
+
+        self.payloads = {}
+        for ruolo, entries in automatic.items():
+            if changed is not None and ruolo not in changed:
+                self.payloads[ruolo] = previous.payloads[ruolo]
+                continue
+            role_overrides = {player_id: key for player_id, key in overrides.items() if player_id in entries}
+            self.payloads[ruolo] = _role_payload(entries, role_overrides)
+        self.rebuilt = sorted(self.payloads) if changed is None else sorted(changed)
+        self._payload = None
+
+    def fascia(self, player_id):
+        """Fascia effettiva di un giocatore del listone (O(1)), None se sconosciuto"""
+        player_id = self.ids.get(str(player_id), player_id)
+        ruolo = self.roles.get(player_id)
+        if ruolo is None:
+            return None
+        return self.overrides.get(player_id, self.listone.fasce[ruolo][player_id]["fascia_automatica"])
+
+    def payload(self, ruolo=None):
+        """Risposta di un ruolo o di tutti i ruoli (bytes concatenati, costruita una volta)"""
+        if ruolo is not None:
+            return self.payloads.get(ruolo)
+        if self._payload is None:
+            roles = b','.join(dumps(name) + b':' + self.payloads[name] for name in self.payloads)
+            self._payload = EncodedPayload(
+                dumps({"fasce": FASCIA_KEYS, "manuali": len(self.overrides)})[:-1] + b',"ruoli":{' + roles + b'}}'
+            )
+        return self._payload
+
+
+class FasceStore:
+    """Fasce automatiche del listone più fasce manuali salvate su file
+
+    Il file è condiviso tra i worker gunicorn: ogni lettura controlla l'mtime,
+    come ListoneStore fa con il listone
+    """
+
+    def __init__(self, listone_fn, path=None):
+        # listone_fn() -> ResolvedListone corrente o None
+        self.listone_fn = listone_fn
+        self.path = Path(path or default_overrides_path())
+        self._lock = threading.Lock()
+        self._state = None
+
+    def _mtime(self):
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read_overrides(self, listone):
+        """Fasce manuali dal file, con id normalizzati sugli id del listone"""
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Fasce manuali non leggibili ({self.path}): {e}")
+            return {}
+        ids = {str(player["id"]): player["id"] for player in listone.players}
+        return {ids[key]: value for key, value in raw.items() if key in ids and value in FASCIA_KEYS}
+
+    def get(self):
+        """Stato corrente delle fasce, None se il listone non è disponibile"""
+        listone = self.listone_fn()
+        if listone is None:
+            return None
+
+        state = self._state
+        if state is not None and state.listone is listone and state.mtime == self._mtime():
+            return state
+
+        with self._lock:
+            return self._current(listone)
+
+    def _current(self, listone):
+        # Con il lock acquisito: ricostruisce se sono cambiati listone o file delle fasce manuali
+        state = self._state
+        mtime = self._mtime()
+        if state is None or state.listone is not listone or state.mtime != mtime:
+            previous = state if state is not None and state.listone is listone else None
+            state = FasceState(listone, self._read_overrides(listone), mtime, previous)
+            self._state = state
+        return state
+
+    def set_overrides(self, changes):
+        """Applica fasce manuali {id: fascia o None per tornare all'automatica}
+
+        ValueError per fasce o giocatori sconosciuti; restituisce il nuovo stato
+        """
+        listone = self.listone_fn()
+        if listone is None:
+            raise RuntimeError("Listone non disponibile")
+
+        with self._lock:
+            state = self._current(listone)
+
+            overrides = dict(state.overrides)
+            for key, fascia in changes.items():
+                player_id = state.ids.get(str(key))
+                if player_id is None:
+                    raise ValueError(f"Giocatore del listone sconosciuto: {key}")
+                if fascia is None:
+                    overrides.pop(player_id, None)
+                elif fascia in FASCIA_KEYS:
+                    overrides[player_id] = fascia
+                else:
+                    raise ValueError(f"Fascia non valida: {fascia} (valide: {', '.join(FASCIA_KEYS)})")
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+            tmp_path.write_text(json.dumps({str(key): value for key, value in overrides.items()}, indent=1),
+                                encoding="utf-8")
+            os.replace(tmp_path, self.path)
+
+            state = FasceState(state.listone, overrides, self._mtime(), state)
+            self._state = state
+            logger.info(f"🏷️ Fasce manuali aggiornate: {len(changes)} giocatori, ruoli ricostruiti {state.rebuilt}")
+            return state
+
+    def status(self):
+        """Stato per /api/health"""
+        state = self._state
+        if state is None:
+            return None
+        return {"path": str(self.path), "manuali": len(state.overrides), "ruoli": len(state.payloads)}
@@ -0,0 +1,110 @@
+"""
+Insights fantacalcio calcolati in blocco per tutto il roster
+Voto medio stimato, bonus/malus attesi e affidabilità come operazioni
+colonnari su standard_stats e keeper_stats
+"""
+
+import numpy as np
+import pandas as pd
+
+from .columns import int_array, round_values
+
+# Metriche numeriche ordinabili nelle classifiche
+RANKING_METRICS = (
+    "voto_medio_stimato",
+    "bonus_malus_attesi",
+    "gol",
+    "assist",
+    "gol_assist",
+    "partite",
+    "clean_sheets",
+)
+
+
+def compute_insights(tables, row_index, players=None):
+    """Tabella insights indicizzata per giocatore FBref
+
+    Colonne: partite, gol, assist, gialli, gol_assist, voto_medio_stimato,
+    bonus_malus_attesi, affidabilita, portiere, clean_sheets, gol_subiti, parate
+    players: se indicato, solo le righe di questi giocatori
+    """
+    selected = players
+    players, standard = row_index.current_rows(tables.get('standard'), 'standard', selected)
+    if standard.empty:
+        return pd.DataFrame(columns=[
+            "partite", "gol", "assist", "gialli", "gol_assist",
+            "voto_medio_stimato", "bonus_malus_attesi", "affidabilita",
+            "portiere", "clean_sheets", "gol_subiti", "parate"
+        ])
+
+    partite = int_array(standard, ('Playing Time', 'MP'))
+    gol = int_array(standard, ('Performance', 'Gls'))
+    assist = int_array(standard, ('Performance', 'Ast'))
+    gialli = int_array(standard, ('Performance', 'CrdY'))
+
+    insights = pd.DataFrame({
+        "partite": partite.astype(np.int32),
+        "gol": gol.astype(np.int32),
+        "assist": assist.astype(np.int32),
+        "gialli": gialli.astype(np.int32),
+        "gol_assist": (gol + assist).astype(np.int32),
+        "voto_medio_stimato": round_values(6.0 + (gol + assist) * 0.1),
+        "bonus_malus_attesi": round_values(gol * 3 + assist - gialli * 0.5),
+        "affidabilita": np.where(partite > 15, "Alta", "Media"),
+    }, index=pd.Index(players, name="player"))
+
+    # Portieri: override basato su clean sheets e gol subiti
+    keepers, keeper = row_index.current_rows(tables.get('keeper'), 'keeper', selected)
+    insights["portiere"] = False
+    insights["clean_sheets"] = np.int32(0)
+    insights["gol_subiti"] = np.int32(0)
+    insights["parate"] = np.int32(0)
+
+    if not keeper.empty:
+        keeper_frame = pd.DataFrame({
+            "clean_sheets": int_array(keeper, ('Performance', 'CS')).astype(np.int32),
+            "gol_subiti": int_array(keeper, ('Performance', 'GA')).astype(np.int32),
+            "parate": int_array(keeper, ('Performance', 'Saves')).astype(np.int32),
+        }, index=pd.Index(keepers, name="player"))
+        keeper_frame = keeper_frame[keeper_frame.index.isin(insights.index)]
+
+        cs = keeper_frame["clean_sheets"].to_numpy(dtype=np.int64)
+        ga = keeper_frame["gol_subiti"].to_numpy(dtype=np.int64)
+        rows = keeper_frame.index
+
+        insights.loc[rows, "portiere"] = True
+        insights.loc[rows, ["clean_sheets", "gol_subiti", "parate"]] = keeper_frame.to_numpy()
+        insights.loc[rows, "voto_medio_stimato"] = round_values(6.0 + cs * 0.1 - ga * 0.05)
+        insights.loc[rows, "bonus_malus_attesi"] = (cs - ga).astype(float)
+
+    return insights
+
+
+def rank_insights(insights, metric="bonus_malus_attesi", limit=20, portieri=None):
+    """Classifica del roster per una metrica pre-calcolata"""
+    if metric not in RANKING_METRICS:
+        raise ValueError(f"Metrica non supportata: {metric}")
+
+    ranked = insights
+    if portieri is not None:
+        ranked = ranked[ranked["portiere"] == portieri]
+
+    top = ranked.nlargest(limit, metric, keep="first")
+    return [
+        {
+            "player": player,
+            "valore": value,
+            "voto_medio_stimato": voto,
+            "bonus_malus_attesi": bonus,
+            "affidabilita": affidabilita,
+            "portiere": portiere,
+        }
+        for player, value, voto, bonus, affidabilita, portiere in zip(
+            top.index,
+            top[metric].tolist(),
+            top["voto_medio_stimato"].tolist(),
+            top["bonus_malus_attesi"].tolist(),
+            top["affidabilita"].tolist(),
+            top["portiere"].tolist(),
+        )
+    ]
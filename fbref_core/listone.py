@@ -0,0 +1,206 @@
+"""
+Listone Fantacalcio (listone.xlsx) risolto in blocco sui giocatori FBref
+Il mapping Id -> giocatore FBref e la risposta completa con le statistiche
+vengono ricalcolati solo quando cambia il file o il dataset
+"""
+
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+
+from .encoding import EncodedPayload
+from .fasce import assign_fasce
+from .responses import dumps
+
+logger = logging.getLogger(__name__)
+
+LISTONE_SHEET = "Tutti"
+
+# Intestazione del listone -> campo della risposta
+LISTONE_COLUMNS = {
+    "Id": "id",
+    "R": "ruolo",
+    "RM": "ruolo_mantra",
+    "Nome": "nome",
+    "Squadra": "squadra",
+    "Qt.A": "qt_a",
+    "Qt.I": "qt_i",
+    "Diff.": "diff",
+    "Qt.A M": "qt_a_m",
+    "Qt.I M": "qt_i_m",
+    "Diff.M": "diff_m",
+    "FVM": "fvm",
+    "FVM M": "fvm_m"
+}
+
+
+def default_listone_path():
+    """Percorso del listone (override con FBREF_LISTONE_PATH)"""
+    env_path = os.environ.get('FBREF_LISTONE_PATH')
+    if env_path:
+        return Path(env_path)
+    return Path(__file__).resolve().parent.parent / "public" / "listone.xlsx"
+
+
+def read_listone(path, sheet=LISTONE_SHEET):
+    """Righe del listone come dizionari (riga titolo + riga intestazioni, come nel frontend)"""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet in workbook.sheetnames else workbook.worksheets[0]
+
+        header = None
+        players = []
+        for row in worksheet.iter_rows(values_only=True):
+            if header is None:
+                # Le righe prima delle intestazioni (titolo) vengono saltate
+                if row and "Nome" in row:
+                    header = {i: LISTONE_COLUMNS[label] for i, label in enumerate(row) if label in LISTONE_COLUMNS}
+                continue
+
+            record = {field: row[i] for i, field in header.items() if i < len(row)}
+            if not record.get("nome"):
+                continue
+            record["nome"] = str(record["nome"]).strip()
+            record["squadra"] = str(record.get("squadra") or "").strip()
+            players.append(record)
+    finally:
+        workbook.close()
+
+    if header is None:
+        raise ValueError(f"Intestazioni del listone non trovate in {path}")
+    return players
+
+
+def listone_payload(players, mapping, responses, meta, fasce=None):
+    """Risposta unica del listone: le statistiche pre-serializzate vengono concatenate
+
+    fasce: fasce automatiche di assign_fasce(), aggiunte a ogni giocatore
+    """
+    ranking = {player_id: (ruolo, entry) for ruolo, entries in (fasce or {}).items()
+               for player_id, entry in entries.items()}
+    items = []
+    for player in players:
+        fbref_player = mapping.get(player["id"])
+        stats = responses.get(fbref_player) if fbref_player else None
+        record = dict(player, fbref=fbref_player)
+        if player["id"] in ranking:
+            ruolo, entry = ranking[player["id"]]
+            record.update(ruolo_principale=ruolo or None, rank_ruolo=entry["rank"],
+                          fascia_automatica=entry["fascia_automatica"])
+        item = dumps(record)
+        items.append(item[:-1] + b',"stats":' + (stats or b'null') + b'}')
+
+    return dumps(meta)[:-1] + b',"players":[' + b','.join(items) + b']}'
+
+
+class ResolvedListone:
+    """Listone risolto per una coppia (file, dataset): mai modificato dopo la creazione"""
+
+    def __init__(self, signature, players, mapping, payload, build_time, table=None, fasce=None):
+        self.signature = signature
+        self.players = players
+        self.mapping = mapping
+        self.payload = payload
+        # Roster colonnare del dataset con ruoli, FVM e quotazioni del listone
+        self.table = table
+        # Fasce FVM automatiche per ruolo principale (fbref_core.fasce)
+        self.fasce = fasce
+        self.build_time = build_time
+        self.built_at = time.time()
+
+    @property
+    def matched(self):
+        return sum(1 for player in self.mapping.values() if player)
+
+
+class ListoneStore:
+    """Listone risolto su FBref, ricostruito solo se cambiano file o dataset
+
+    La ricostruzione (risoluzione dei nomi e compressione) avviene in refresh(),
+    chiamato prima di pubblicare un dataset o dal refresher: le richieste leggono
+    con get() solo listoni già pronti
+    """
+
+    def __init__(self, resolve_fn, path=None):
+        # resolve_fn(nome, squadra, dataset) -> giocatore FBref o None
+        self.resolve_fn = resolve_fn
+        self.path = Path(path or default_listone_path())
+        self._lock = threading.Lock()
+        self._resolved = None
+
+    def _signature(self, dataset):
+        stat = self.path.stat()
+        return (stat.st_mtime_ns, stat.st_size, dataset.version)
+
+    def get(self):
+        """Ultimo listone risolto, None se il file non esiste o non è ancora stato risolto"""
+        return self._resolved
+
+    def refresh(self, dataset):
+        """Risolve il listone sul dataset indicato se file o dataset sono cambiati
+
+        Un solo thread ricostruisce, gli altri trovano il risultato pronto
+        """
+        try:
+            signature = self._signature(dataset)
+        except FileNotFoundError:
+            self._resolved = None
+            return None
+
+        resolved = self._resolved
+        if resolved is not None and resolved.signature == signature:
+            return resolved
+
+        with self._lock:
+            resolved = self._resolved
+            if resolved is None or resolved.signature != signature:
+                resolved = self._build(dataset, signature)
+                self._resolved = resolved
+            return resolved
+
+    def _build(self, dataset, signature):
+        start = time.time()
+        players = read_listone(self.path)
+
+        # Stesso nome e squadra risolti una volta sola
+        resolved_names = {}
+        mapping = {}
+        for player in players:
+            key = (player["nome"], player["squadra"])
+            if key not in resolved_names:
+                resolved_names[key] = self.resolve_fn(player["nome"], player["squadra"] or None, dataset)
+            mapping[player["id"]] = resolved_names[key]
+
+        build_time = round(time.time() - start, 3)
+        matched = sum(1 for player in mapping.values() if player)
+        meta = {
+            "source": self.path.name,
+            "data_version": dataset.version,
+            "count": len(players),
+            "matched": matched
+        }
+        # Ranking FVM per ruolo calcolato una volta per listone (le fasce manuali sono in FasceStore)
+        fasce = assign_fasce(players)
+        # Compresso una volta per listone e dataset, servito così a ogni richiesta
+        payload = EncodedPayload(listone_payload(players, mapping, dataset.responses, meta, fasce), precompress=True)
+        table = dataset.player_table.with_listone(players, mapping)
+
+        logger.info(f"📋 Listone risolto: {matched}/{len(players)} giocatori FBref in {build_time}s")
+        return ResolvedListone(signature, players, mapping, payload, build_time, table, fasce)
+
+    def status(self):
+        """Stato dell'ultimo listone risolto per /api/health"""
+        resolved = self._resolved
+        if resolved is None:
+            return None
+        return {
+            "path": str(self.path),
+            "players": len(resolved.players),
+            "matched": resolved.matched,
+            "build_s": resolved.build_time,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(resolved.built_at))
+        }
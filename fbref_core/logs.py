@@ -0,0 +1,177 @@
+"""
+Logging dei backend FBref: testo o JSON strutturato, asincrono e campionato
+
+    FBREF_LOG_FORMAT   text (default) | json
+    FBREF_LOG_LEVEL    INFO (default), DEBUG per i passaggi interni di ogni ricerca
+    FBREF_LOG_SAMPLE   quota di richieste riuscite registrate (0-1, default 1)
+    FBREF_LOG_ASYNC    1 (default): formattazione e scrittura in un thread dedicato
+
+Ogni richiesta produce un solo record (nome, giocatore, score, cache, durata)
+invece di una riga di log per ogni passaggio
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+
+REQUEST_LOGGER = "fbref_core.requests"
+
+# Attributi standard di LogRecord: tutto il resto viene da extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+# (handler di coda, handler di output) correnti, usati anche dopo il fork
+_async_handlers = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Un oggetto JSON per riga; i campi strutturati arrivano in extra={"fields": {...}}"""
+
+    def format(self, record):
+        data = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            data.update(fields)
+        else:
+            data["msg"] = record.getMessage()
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != "fields":
+                data.setdefault(key, value)
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler che non formatta nel thread della richiesta
+
+    Il QueueHandler standard formatta il messaggio prima di accodarlo; qui la coda
+    resta nel processo, quindi il record viene passato intatto al listener
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class _RequestLine:
+    """Riga di testo di un record richiesta, formattata solo se il record viene scritto"""
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        f = self.fields
+        icon = "🎯" if f.get("status") == "ok" else "❌"
+        line = f"{icon} {f.get('event')}"
+        if "name" in f:
+            line += f" '{f['name']}' ({f.get('team') or 'no team'}) -> {f.get('player') or 'non trovato'}"
+        extra = " ".join(f"{key}={value}" for key, value in f.items()
+                         if key not in ("event", "name", "team", "player", "status") and value is not None)
+        return f"{line} {extra}"
+
+
+class RequestLogger:
+    """Un record per richiesta; le richieste riuscite vengono campionate"""
+
+    def __init__(self, sample_rate=None, logger=None):
+        if sample_rate is None:
+            sample_rate = sample_rate_from_env()
+        self.sample_rate = sample_rate
+        self.logger = logger or logging.getLogger(REQUEST_LOGGER)
+
+    def log(self, event, status="ok", **fields):
+        # Errori e nomi non trovati sono sempre registrati, i successi a campione
+        if status == "ok" and self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        level = logging.INFO if status != "error" else logging.ERROR
+        if not self.logger.isEnabledFor(level):
+            return
+        fields = dict(event=event, status=status, **fields)
+        # Record costruito direttamente: niente ricerca del chiamante nello stack
+        record = self.logger.makeRecord(
+            self.logger.name, level, "(request)", 0, "%s", (_RequestLine(fields),), None,
+            extra={"fields": fields}
+        )
+        self.logger.handle(record)
+
+
+def sample_rate_from_env(default=1.0):
+    """Quota di richieste riuscite da registrare (FBREF_LOG_SAMPLE)"""
+    try:
+        rate = float(os.environ.get('FBREF_LOG_SAMPLE', default))
+    except ValueError:
+        return default
+    return min(1.0, max(0.0, rate))
+
+
+def _start_listener():
+    """Thread che svuota la coda verso lo stream (nuova coda ad ogni avvio)"""
+    global _listener
+    handler, target = _async_handlers
+    handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(handler.queue, target, respect_handler_level=True)
+    _listener.start()
+
+
+def _after_fork_in_child():
+    # I thread non sopravvivono al fork (gunicorn preload_app): il figlio
+    # riparte con una coda nuova e un proprio listener
+    global _listener
+    if _async_handlers is not None:
+        _listener = None
+        _start_listener()
+
+
+def configure_logging(fmt=None, level=None, asynchronous=None):
+    """Configura il logger root (sostituisce logging.basicConfig negli entry point)"""
+    global _async_handlers
+    fmt = (fmt or os.environ.get('FBREF_LOG_FORMAT', 'text')).lower()
+    level = level or os.environ.get('FBREF_LOG_LEVEL', 'INFO').upper()
+    if asynchronous is None:
+        asynchronous = os.environ.get('FBREF_LOG_ASYNC', '1') != '0'
+
+    stream = logging.StreamHandler(sys.stdout if fmt == 'json' else sys.stderr)
+    if fmt == 'json':
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+
+    if not asynchronous:
+        _async_handlers = None
+        root.addHandler(stream)
+        return
+
+    handler = _DeferredQueueHandler(queue.SimpleQueue())
+    root.addHandler(handler)
+    first_setup = _async_handlers is None
+    _async_handlers = (handler, stream)
+    _start_listener()
+
+    if first_setup:
+        atexit.register(stop_logging)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def stop_logging():
+    """Svuota la coda e ferma il listener (uscita pulita)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
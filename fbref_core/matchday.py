@@ -0,0 +1,274 @@
+"""
+Aggiornamento incrementale per giornata: invece di riscaricare le statistiche
+stagionali si leggono solo le partite giocate dopo l'ultimo snapshot
+(read_player_match_stats di soccerdata) e si sommano alle tabelle stagionali.
+Il dataset ricalcola poi solo i giocatori che hanno giocato
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .columns import numeric_column
+
+logger = logging.getLogger(__name__)
+
+KEY_LEVELS = ['league', 'season', 'team', 'player']
+MATCH_LEVELS = ['league', 'season', 'game', 'team', 'player']
+
+MINUTES = ('min', '')
+APPEARANCES = ('Playing Time', 'MP')
+# Titolare nella partita: dalle formazioni (read_lineup), aggiunto al riepilogo
+STARTER = ('is_starter', '')
+# 90' giocati nelle tabelle senza minuti (tiri, difesa, possesso, creazione)
+NINETIES = ('90s', '')
+
+# Minuti registrati da FBref per una partita intera (recupero escluso)
+FULL_MATCH_MINUTES = 90
+
+# Tabella stagionale -> (stat_type per partita, {colonna stagionale: colonna della partita})
+# Ogni tabella servita in /api/player-stats è aggiornata: tiri e creazione stanno nel
+# riepilogo per partita ("summary"), difesa e possesso hanno la loro tabella
+MATCH_COLUMNS = {
+    'standard': ('summary', {
+        ('Playing Time', 'Min'): MINUTES,
+        ('Playing Time', 'Starts'): STARTER,
+        ('Performance', 'Gls'): ('Performance', 'Gls'),
+        ('Performance', 'Ast'): ('Performance', 'Ast'),
+        ('Performance', 'PK'): ('Performance', 'PK'),
+        ('Performance', 'PKatt'): ('Performance', 'PKatt'),
+        ('Performance', 'CrdY'): ('Performance', 'CrdY'),
+        ('Performance', 'CrdR'): ('Performance', 'CrdR'),
+    }),
+    'passing': ('passing', {
+        ('Total', 'Cmp'): ('Total', 'Cmp'),
+        ('Total', 'Att'): ('Total', 'Att'),
+    }),
+    'keeper': ('keepers', {
+        ('Performance', 'SoTA'): ('Shot Stopping', 'SoTA'),
+        ('Performance', 'GA'): ('Shot Stopping', 'GA'),
+        ('Performance', 'Saves'): ('Shot Stopping', 'Saves'),
+    }),
+    'shooting': ('summary', {
+        ('Standard', 'Gls'): ('Performance', 'Gls'),
+        ('Standard', 'Sh'): ('Performance', 'Sh'),
+        ('Standard', 'SoT'): ('Performance', 'SoT'),
+        ('Standard', 'PK'): ('Performance', 'PK'),
+        ('Standard', 'PKatt'): ('Performance', 'PKatt'),
+        ('Expected', 'xG'): ('Expected', 'xG'),
+        ('Expected', 'npxG'): ('Expected', 'npxG'),
+    }),
+    'defense': ('defense', {
+        ('Tackles', 'Tkl'): ('Tackles', 'Tkl'),
+        ('Tackles', 'TklW'): ('Tackles', 'TklW'),
+        ('Int', ''): ('Int', ''),
+        ('Tkl+Int', ''): ('Tkl+Int', ''),
+        ('Blocks', 'Sh'): ('Blocks', 'Sh'),
+        ('Blocks', 'Pass'): ('Blocks', 'Pass'),
+        ('Clr', ''): ('Clr', ''),
+        ('Err', ''): ('Err', ''),
+    }),
+    'possession': ('possession', {
+        ('Touches', 'Touches'): ('Touches', 'Touches'),
+        ('Touches', 'Att Pen'): ('Touches', 'Att Pen'),
+        ('Take-Ons', 'Att'): ('Take-Ons', 'Att'),
+        ('Take-Ons', 'Succ'): ('Take-Ons', 'Succ'),
+        ('Carries', 'Carries'): ('Carries', 'Carries'),
+        ('Carries', 'PrgC'): ('Carries', 'PrgC'),
+        ('Carries', 'PrgDist'): ('Carries', 'PrgDist'),
+        ('Carries', 'Dis'): ('Carries', 'Dis'),
+        ('Receiving', 'PrgR'): ('Receiving', 'PrgR'),
+    }),
+    'gca': ('summary', {
+        ('SCA', 'SCA'): ('SCA', 'SCA'),
+        ('GCA', 'GCA'): ('SCA', 'GCA'),
+    }),
+}
+
+# Colonne derivate ricalcolate sulle righe aggiornate:
+# (colonna, numeratore, denominatore o None, scala, decimali)
+RATIO_COLUMNS = {
+    'standard': [(('Playing Time', '90s'), ('Playing Time', 'Min'), None, 1 / 90, 1)],
+    'passing': [(('Total', 'Cmp%'), ('Total', 'Cmp'), ('Total', 'Att'), 100, 1)],
+    'keeper': [
+        (('Performance', 'Save%'), ('Performance', 'Saves'), ('Performance', 'SoTA'), 100, 1),
+        (('Performance', 'CS%'), ('Performance', 'CS'), APPEARANCES, 100, 1),
+    ],
+    'shooting': [
+        (('Standard', 'SoT%'), ('Standard', 'SoT'), ('Standard', 'Sh'), 100, 1),
+        (('Standard', 'G/Sh'), ('Standard', 'Gls'), ('Standard', 'Sh'), 1, 2),
+        (('Standard', 'Sh/90'), ('Standard', 'Sh'), NINETIES, 1, 2),
+        (('Standard', 'SoT/90'), ('Standard', 'SoT'), NINETIES, 1, 2),
+    ],
+    'gca': [
+        (('SCA', 'SCA90'), ('SCA', 'SCA'), NINETIES, 1, 2),
+        (('GCA', 'GCA90'), ('GCA', 'GCA'), NINETIES, 1, 2),
+    ],
+}
+
+# Differenze ricalcolate sulle righe aggiornate: (colonna, minuendo, sottraendo)
+# La distanza media dei tiri (Dist) non è ricavabile dalle partite: resta quella
+# dell'ultimo refresh completo
+DIFFERENCE_COLUMNS = {
+    'shooting': [(('Expected', 'G-xG'), ('Standard', 'Gls'), ('Expected', 'xG'))],
+}
+
+
+def played_games(schedule):
+    """game_id delle partite già giocate (con risultato) nel calendario soccerdata"""
+    if schedule is None or schedule.empty or 'game_id' not in schedule.columns:
+        return set()
+    played = schedule
+    if 'score' in schedule.columns:
+        played = schedule[schedule['score'].notna()]
+    return {str(game_id) for game_id in played['game_id'].dropna()}
+
+
+def download_played_games(leagues, season, no_cache=False):
+    """Partite giocate finora nella stagione (per il manifest dello snapshot)"""
+    import soccerdata as sd
+
+    fbref = sd.FBref(leagues=list(leagues), seasons=[season], no_cache=no_cache)
+    return played_games(fbref.read_schedule())
+
+
+def download_matchday(leagues, season, known_games):
+    """(tabelle per partita, partite nuove) per le partite giocate e non ancora in known_games"""
+    import soccerdata as sd
+
+    fbref = sd.FBref(leagues=list(leagues), seasons=[season], no_cache=True)
+    new_games = sorted(played_games(fbref.read_schedule()) - set(known_games))
+    if not new_games:
+        return {}, []
+
+    # Ogni stat_type scaricato una volta sola ("summary" serve a più tabelle)
+    by_type = {}
+    for stat_type, _ in MATCH_COLUMNS.values():
+        if stat_type in by_type:
+            continue
+        try:
+            by_type[stat_type] = fbref.read_player_match_stats(stat_type=stat_type, match_id=new_games)
+            logger.info(f"✅ {stat_type}: {len(by_type[stat_type])} righe da {len(new_games)} partite")
+        except Exception as e:
+            # Una tabella mancante renderebbe i totali incoerenti: meglio un refresh completo
+            raise RuntimeError(f"Statistiche {stat_type} per partita non disponibili: {e}") from e
+    by_type['summary'] = _with_starters(by_type['summary'], fbref, new_games)
+    return {table_name: by_type[stat_type] for table_name, (stat_type, _) in MATCH_COLUMNS.items()}, new_games
+
+
+def _with_starters(summary, fbref, new_games):
+    """Riepilogo per partita con la colonna dei titolari (Starts non è tra le statistiche)
+
+    Le formazioni stanno nelle stesse pagine partita, già in cache dopo il riepilogo
+    """
+    try:
+        lineup = fbref.read_lineup(match_id=new_games)
+        starters = lineup['is_starter'].groupby(level=MATCH_LEVELS).max().reindex(summary.index)
+    except Exception as e:
+        raise RuntimeError(f"Formazioni per partita non disponibili: {e}") from e
+    if starters.isna().any():
+        raise RuntimeError("Formazioni non allineate al riepilogo per partita")
+    summary = summary.copy()
+    summary[STARTER] = starters.astype(float).to_numpy()
+    return summary
+
+
+def _match_values(matches, column):
+    """Colonna numerica della tabella partite (anche se soccerdata la espone a un solo livello)"""
+    if column in matches.columns:
+        return numeric_column(matches, column)
+    if isinstance(column, tuple) and not column[1] and column[0] in matches.columns.get_level_values(0):
+        return numeric_column(matches, matches.columns[matches.columns.get_level_values(0) == column[0]][0])
+    return None
+
+
+def _increments(matches, table_name, columns):
+    """Somme per (league, season, team, player) delle partite nuove, con colonne stagionali"""
+    minutes = _match_values(matches, MINUTES)
+    if minutes is None:
+        # Senza minuti presenze, 90s e clean sheet sarebbero sbagliati: refresh completo
+        raise RuntimeError(f"Minuti mancanti nelle statistiche per partita di {table_name}")
+
+    values = {}
+    for season_column, match_column in columns.items():
+        column = _match_values(matches, match_column)
+        if column is not None:
+            values[season_column] = column
+    values[APPEARANCES] = (minutes > 0).astype(float)
+    values[NINETIES] = minutes / 90
+    if table_name == 'keeper' and ('Performance', 'GA') in values:
+        # Clean sheet solo al portiere in campo per tutta la partita, non a chi subentra
+        full_match = minutes >= FULL_MATCH_MINUTES
+        values[('Performance', 'CS')] = ((values[('Performance', 'GA')] == 0) & full_match).astype(float)
+
+    index = matches.index.droplevel([name for name in matches.index.names if name not in KEY_LEVELS])
+    increments = pd.DataFrame(values, index=index).groupby(level=KEY_LEVELS, sort=False).sum()
+    increments.columns = pd.MultiIndex.from_tuples(increments.columns)
+    return increments
+
+
+def _fold_table(table, matches, table_name, columns):
+    increments = _increments(matches, table_name, columns)
+    increments.index = increments.index.reorder_levels(table.index.names)
+    dtypes = table.dtypes
+
+    # Giocatori (o squadre) mai visti nella stagione: righe nuove in coda
+    missing = increments.index[table.index.get_indexer(increments.index) < 0]
+    if len(missing):
+        table = pd.concat([table, table.iloc[:0].reindex(missing)])
+        # La concatenazione con righe vuote trasforma gli interi in float
+        for column, dtype in dtypes.items():
+            if pd.api.types.is_integer_dtype(dtype):
+                table[column] = numeric_column(table, column).astype(np.int64)
+    else:
+        table = table.copy()
+
+    rows = table.index.get_indexer(increments.index)
+    for column in increments.columns:
+        if column not in table.columns:
+            continue
+        values = numeric_column(table, column)
+        values[rows] += increments[column].to_numpy(dtype=float)
+        table[column] = values.astype(np.int64) if pd.api.types.is_integer_dtype(dtypes[column]) else values
+
+    for target, numerator, denominator, scale, decimals in RATIO_COLUMNS.get(table_name, ()):
+        if target not in table.columns or numerator not in table.columns:
+            continue
+        if denominator is not None and denominator not in table.columns:
+            continue
+        values = pd.to_numeric(table[target], errors='coerce').to_numpy(dtype=float)
+        top = numeric_column(table, numerator)[rows]
+        if denominator is None:
+            values[rows] = np.round(top * scale, decimals)
+        else:
+            bottom = numeric_column(table, denominator)[rows]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values[rows] = np.where(bottom > 0, np.round(top / bottom * scale, decimals), np.nan)
+        table[target] = values
+
+    for target, minuend, subtrahend in DIFFERENCE_COLUMNS.get(table_name, ()):
+        if not {target, minuend, subtrahend} <= set(table.columns):
+            continue
+        values = pd.to_numeric(table[target], errors='coerce').to_numpy(dtype=float)
+        values[rows] = np.round(numeric_column(table, minuend)[rows] - numeric_column(table, subtrahend)[rows], 1)
+        table[target] = values
+
+    return table, set(increments.index.get_level_values('player'))
+
+
+def fold_match_stats(tables, match_tables):
+    """(nuove tabelle stagionali, giocatori cambiati) sommando le statistiche per partita
+
+    Le tabelle originali non vengono modificate (possono essere mappate dallo snapshot)
+    """
+    tables = dict(tables)
+    changed = set()
+    for table_name, (_, columns) in MATCH_COLUMNS.items():
+        matches = match_tables.get(table_name)
+        table = tables.get(table_name)
+        if matches is None or matches.empty or table is None or table.empty:
+            continue
+        tables[table_name], players = _fold_table(table, matches, table_name, columns)
+        changed |= players
+    return tables, changed
@@ -0,0 +1,215 @@
+"""
+Metriche del servizio nel formato testo di Prometheus (nessuna dipendenza esterna)
+I valori sono per processo: con più worker gunicorn ogni scrape legge un worker,
+identificato dall'etichetta pid di fbref_process_info
+"""
+
+import os
+import time
+import threading
+from bisect import bisect_left
+
+# Secondi: da 50µs (cache hit) a qualche secondo (build del dataset)
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Punteggi del matching fuzzy: soglia 80, con i bonus si superano i 100
+SCORE_BUCKETS = (80, 90, 100, 110, 120, 140, 160, 200, 250)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contatore monotono con etichette opzionali"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, tuple(zip(self.labelnames, labels)), value
+
+
+class Histogram:
+    """Istogramma a bucket fissi (cumulativi solo al momento della lettura)"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # etichette -> [conteggi per bucket (+Inf in coda), somma, numero osservazioni]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            snapshot = {labels: (list(series[0]), series[1], series[2]) for labels, series in self._series.items()}
+
+        for labels, (counts, total, count) in sorted(snapshot.items()):
+            base = tuple(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", base + (("le", _format_value(float(bound))),), cumulative
+            yield f"{self.name}_sum", base, total
+            yield f"{self.name}_count", base, count
+
+
+class NullMetric:
+    """Contatore/istogramma che scarta tutto: lavoro interno da non contare"""
+
+    def inc(self, *labels, amount=1):
+        pass
+
+    def observe(self, value, *labels):
+        pass
+
+
+NULL_METRIC = NullMetric()
+
+
+class Callback:
+    """Metrica letta al momento dello scrape: fn() -> valore o lista di (etichette, valore)"""
+
+    def __init__(self, name, documentation, fn, kind="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.kind = kind
+
+    def samples(self):
+        value = self.fn()
+        if value is None:
+            return
+        if isinstance(value, (list, tuple)):
+            for labels, item in value:
+                if item is not None:
+                    yield self.name, tuple(labels.items()), item
+        else:
+            yield self.name, (), value
+
+
+class MetricsRegistry:
+    """Insieme di metriche esposte da /api/metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, fn, kind="gauge"):
+        return self.register(Callback(name, documentation, fn, kind))
+
+    def render(self):
+        """Testo nel formato di esposizione Prometheus 0.0.4"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class ServiceMetrics(MetricsRegistry):
+    """Metriche del servizio FBref: latenze per fase, matching, cache, dataset e refresh"""
+
+    def __init__(self, service):
+        super().__init__()
+        self.started_at = time.time()
+
+        self.request_seconds = self.histogram(
+            "fbref_http_request_seconds", "Durata delle richieste HTTP", ("endpoint", "method", "status")
+        )
+        self.stage_seconds = self.histogram(
+            "fbref_lookup_stage_seconds",
+            "Durata delle fasi di una ricerca giocatore (cache, alias, normalize, match, fetch, serialize)",
+            ("stage",)
+        )
+        self.match_score = self.histogram(
+            "fbref_match_score", "Punteggio del miglior match fuzzy", buckets=SCORE_BUCKETS
+        )
+        self.matches = self.counter(
+            "fbref_match_total", "Ricerche giocatore per esito (alias, matched, not_found)", ("result",)
+        )
+        self.build_seconds = self.histogram(
+            "fbref_dataset_build_seconds", "Durata delle fasi di costruzione del dataset", ("stage",)
+        )
+
+        def cache_stats(field):
+            return lambda: service.cache.stats()[field]
+
+        self.callback("fbref_process_info", "Processo che ha risposto allo scrape",
+                      lambda: [({"pid": os.getpid(), "platform": service.config.platform}, 1)])
+        self.callback("fbref_uptime_seconds", "Secondi dall'avvio del servizio", lambda: round(time.time() - self.started_at, 3))
+        self.callback("fbref_cache_entries", "Voci nella cache delle risposte", cache_stats("entries"))
+        self.callback("fbref_cache_lookups_total", "Letture della cache per esito", lambda: [
+            ({"result": "hit"}, service.cache.hits),
+            ({"result": "negative_hit"}, service.cache.negative_hits),
+            ({"result": "miss"}, service.cache.misses)
+        ], kind="counter")
+        self.callback("fbref_cache_evictions_total", "Voci rimosse dal limite LRU", cache_stats("evictions"), kind="counter")
+        self.callback("fbref_cache_hit_ratio", "Quota di letture servite dalla cache", cache_stats("hit_ratio"))
+        self.callback("fbref_dataset_players", "Giocatori nel dataset corrente", lambda: len(service.dataset.name_index))
+        self.callback("fbref_dataset_age_seconds", "Secondi dalla costruzione del dataset corrente",
+                      lambda: round(time.time() - service.dataset.loaded_at, 3))
+        self.callback("fbref_refresh_running", "1 se un refresh è in corso", lambda: int(service.refresher.running))
+        self.callback("fbref_refresh_total", "Refresh completati", lambda: service.refresher.refreshes, kind="counter")
+        self.callback("fbref_refresh_last_duration_seconds", "Durata dell'ultimo refresh",
+                      lambda: service.refresher.last_duration)
+
+    def observe_build(self, dataset):
+        """Registra le fasi di costruzione di un dataset appena pubblicato"""
+        for stage, seconds in dataset.build_times.items():
+            self.build_seconds.observe(seconds, stage)
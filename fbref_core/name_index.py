@@ -0,0 +1,188 @@
+"""
+Indice dei nomi FBref per la ricerca giocatori
+Costruito una volta al caricamento dati, restringe ogni lookup a poche
+decine di candidati prima dello scoring fuzzy
+"""
+
+import unicodedata
+from collections import defaultdict
+
+from fuzzywuzzy import fuzz
+
+# Soglia minima del punteggio per accettare un match (come lo scorer originale)
+MATCH_THRESHOLD = 80
+# Soglia oltre la quale si applica il bonus squadra
+TEAM_BONUS_THRESHOLD = 60
+# Bonus per i candidati trovati tramite chiavi esatte (cognome, cognome+iniziale)
+EXACT_KEY_WEIGHT = 1000
+
+
+def fold_accents(text):
+    """Rimuove gli accenti carattere per carattere (Vlahović -> Vlahovic)"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def word_trigrams(word):
+    """Trigrammi di una singola parola (vuoto per parole sotto i 3 caratteri)"""
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def score_player(normalized_input, normalized_words, player_lower, player_words,
+                 player_teams, team_name=None, surname_bonus=True):
+    """Punteggio di similarità tra input normalizzato e un giocatore FBref"""
+    score = fuzz.ratio(normalized_input, player_lower)
+
+    # Bonus se il nome normalizzato è contenuto nel nome completo
+    if normalized_input in player_lower or player_lower in normalized_input:
+        score += 30
+
+    # Bonus per match di parole chiave
+    for norm_word in normalized_words:
+        for player_word in player_words:
+            if len(norm_word) > 2 and len(player_word) > 2:
+                if norm_word in player_word or player_word in norm_word:
+                    score += 20
+
+    # Bonus extra per match esatto di cognome
+    if surname_bonus and normalized_words:
+        last_word = normalized_words[-1]
+        if any(last_word in pw for pw in player_words):
+            score += 25
+
+    # Se abbiamo specificato una squadra, verifichiamo se il giocatore ci ha mai giocato
+    if team_name and score > TEAM_BONUS_THRESHOLD:
+        team_lower = team_name.lower()
+        if any(team_lower in team for team in player_teams):
+            score += 40
+
+    return score
+
+
+class PlayerNameIndex:
+    """Indice nome -> giocatore FBref con tabella di trigrammi e chiavi cognome/iniziale"""
+
+    def __init__(self, players, player_teams, max_candidates=64):
+        self.players = list(players)
+        self.max_candidates = max_candidates
+        self.position = {player: pid for pid, player in enumerate(self.players)}
+
+        # Forme pre-calcolate usate dallo scorer
+        self.lowered = [player.lower() for player in self.players]
+        self.words = [tuple(lowered.split()) for lowered in self.lowered]
+        self.player_teams = {
+            player: tuple(team.lower() for team in player_teams.get(player, ()))
+            for player in self.players
+        }
+
+        # Token normalizzati, chiavi cognome / cognome+iniziale e trigrammi
+        tokens = defaultdict(list)
+        surnames = defaultdict(list)
+        initials = defaultdict(list)
+        trigrams = defaultdict(list)
+
+        for pid, words in enumerate(self.words):
+            folded = [fold_accents(word) for word in words]
+            for word in set(folded):
+                tokens[word.strip('.')].append(pid)
+            if folded:
+                surname = folded[-1].strip('.')
+                surnames[surname].append(pid)
+                if len(folded) > 1:
+                    initials[(surname, folded[0][0])].append(pid)
+            player_trigrams = set()
+            for word in folded:
+                player_trigrams |= word_trigrams(word)
+            for trigram in player_trigrams:
+                trigrams[trigram].append(pid)
+
+        self.tokens = {key: tuple(ids) for key, ids in tokens.items()}
+        self.surnames = {key: tuple(ids) for key, ids in surnames.items()}
+        self.initials = {key: tuple(ids) for key, ids in initials.items()}
+        self.trigrams = {key: tuple(ids) for key, ids in trigrams.items()}
+
+    @classmethod
+    def from_stats(cls, standard_stats, max_candidates=64):
+        """Costruisce l'indice dalle statistiche standard (MultiIndex league/season/team/player)"""
+        if standard_stats is None or standard_stats.empty:
+            return cls([], {}, max_candidates)
+
+        index = standard_stats.index
+        players = index.get_level_values('player')
+        teams = index.get_level_values('team')
+
+        player_teams = defaultdict(list)
+        for player, team in zip(players, teams):
+            if team not in player_teams[player]:
+                player_teams[player].append(team)
+
+        return cls(players.unique(), player_teams, max_candidates)
+
+    def __len__(self):
+        return len(self.players)
+
+    def teams_for(self, player):
+        """Squadre (lowercase) in cui il giocatore ha giocato"""
+        return self.player_teams.get(player, ())
+
+    def candidates(self, normalized_input):
+        """Id dei candidati ordinati come nel roster originale"""
+        folded_words = [fold_accents(word) for word in normalized_input.split()]
+
+        query_trigrams = set()
+        for word in folded_words:
+            query_trigrams |= word_trigrams(word)
+
+        # Input troppo corto per i trigrammi: si ricade sulla scansione completa
+        if not query_trigrams:
+            return range(len(self.players))
+
+        counts = defaultdict(int)
+        for trigram in query_trigrams:
+            for pid in self.trigrams.get(trigram, ()):
+                counts[pid] += 1
+
+        # Chiavi esatte: token, cognome e cognome + iniziale (es. "martinez l.")
+        keys = [word.strip('.') for word in folded_words]
+        long_keys = [key for key in keys if len(key) > 2]
+        short_keys = [key for key in keys if 0 < len(key) <= 2]
+        for key in long_keys:
+            for pid in self.tokens.get(key, ()):
+                counts[pid] += EXACT_KEY_WEIGHT
+            for pid in self.surnames.get(key, ()):
+                counts[pid] += EXACT_KEY_WEIGHT
+            for initial in short_keys:
+                for pid in self.initials.get((key, initial[0]), ()):
+                    counts[pid] += EXACT_KEY_WEIGHT
+
+        if len(counts) > self.max_candidates:
+            ranked = sorted(counts, key=lambda pid: (-counts[pid], pid))
+            return sorted(ranked[:self.max_candidates])
+
+        return sorted(counts)
+
+    def find(self, normalized_input, team_name=None, surname_bonus=True):
+        """Restituisce (giocatore, score) del miglior match sopra soglia, altrimenti (None, 0)"""
+        if not self.players:
+            return None, 0
+
+        normalized_words = normalized_input.split()
+        best_match = None
+        best_score = 0
+
+        for pid in self.candidates(normalized_input):
+            player = self.players[pid]
+            score = score_player(
+                normalized_input,
+                normalized_words,
+                self.lowered[pid],
+                self.words[pid],
+                self.player_teams[player],
+                team_name,
+                surname_bonus
+            )
+            if score > best_score and score > MATCH_THRESHOLD:
+                best_score = score
+                best_match = player
+
+        return best_match, best_score
@@ -0,0 +1,208 @@
+"""
+Normalizzazione per 90 minuti e percentili per ruolo
+Calcolata una volta con il dataset per tutta la Serie A: le statistiche di conteggio
+del registro sezioni diventano tassi per 90' (minuti della stessa tabella), poi ogni
+colonna viene ordinata una volta per ruolo e i percentili si leggono con una ricerca
+binaria vettoriale. Le matrici restano float32 e le sezioni "per_90" e "percentili"
+sono serializzate nelle risposte pre-calcolate
+"""
+
+import numpy as np
+
+from .columns import numeric_column
+from .player_table import FBREF_ROLES
+from .responses import dumps
+from .sections import STAT_SECTIONS
+
+# Minuti minimi per entrare nella popolazione di confronto del ruolo
+MIN_MINUTES = 450
+
+# Conteggi che non diventano tassi per 90' (sono la base della normalizzazione)
+EXPOSURE_FIELDS = ("partite_giocate", "minuti_totali")
+
+# Minuti giocati: da Min se la tabella li riporta, altrimenti da 90s (tiri, difesa, ...)
+MINUTES_COLUMN = ('Playing Time', 'Min')
+NINETIES_COLUMNS = (('90s', ''), ('Playing Time', '90s'))
+
+
+def _table_minutes(table):
+    """Minuti per riga della tabella, None se non ha né Min né 90s"""
+    if MINUTES_COLUMN in table.columns:
+        return numeric_column(table, MINUTES_COLUMN)
+    for column in NINETIES_COLUMNS:
+        if column in table.columns:
+            return numeric_column(table, column) * 90
+    return None
+
+
+def _roles(standard, players, goalkeepers):
+    """Ruolo P/D/C/A dalla prima posizione FBref, P per chi compare tra i portieri"""
+    positions = standard[('pos', '')].tolist() if ('pos', '') in standard.columns else [""] * len(players)
+    return np.array([
+        FBREF_ROLES.get(str(position or "").split(",")[0].strip().upper())
+        or ("P" if player in goalkeepers else "")
+        for player, position in zip(players, positions)
+    ], dtype=object)
+
+
+class RoleNormalization:
+    """Tassi per 90' e percentili per ruolo: matrici float32 giocatori x statistiche
+
+    rates: conteggi per 90' (NaN se il giocatore non ha la riga della tabella)
+    values: colonne su cui si calcolano i percentili (tassi per 90' e percentuali)
+    """
+
+    def __init__(self, players, roles, minutes, rate_names, rates, value_names, values):
+        self.players = players
+        self.index = {player: row for row, player in enumerate(players)}
+        self.roles = roles
+        self.minutes = minutes
+        self.rate_names = rate_names
+        self.rates = rates
+        self.value_names = value_names
+        self.values = values
+        self.qualified = minutes >= MIN_MINUTES
+        self.percentiles, self.peers = self._percentiles()
+        # Sezioni "per_90" e "percentili" serializzate una volta per giocatore
+        self.sections = self._serialize()
+
+    def __len__(self):
+        return len(self.players)
+
+    @classmethod
+    def from_tables(cls, tables, row_index):
+        """Normalizzazione della stagione dalle tabelle del registro sezioni
+
+        Ogni tabella usa i propri minuti (Min o 90s): dopo un aggiornamento per
+        giornata conteggi e minuti della stessa tabella restano coerenti tra loro
+        """
+        players, standard = row_index.current_rows(tables.get('standard'), 'standard')
+        count = len(players)
+        rows = {player: row for row, player in enumerate(players)}
+        minutes = numeric_column(standard, MINUTES_COLUMN) if count else np.zeros(0)
+
+        rates = {}
+        ratios = {}
+        for section in STAT_SECTIONS:
+            section_players, table = row_index.current_rows(tables.get(section.table_name), section.table_name)
+            if table.empty:
+                continue
+            positions = np.array([rows.get(player, -1) for player in section_players], dtype=np.int64)
+            found = positions >= 0
+            exposure = _table_minutes(table)
+            if exposure is None:
+                exposure = np.full(len(section_players), np.nan)
+                exposure[found] = minutes[positions[found]]
+            for name, column, decimals in section.fields:
+                if column not in table.columns or name in rates or name in ratios or name in EXPOSURE_FIELDS:
+                    continue
+                values = numeric_column(table, column)
+                if decimals is None:
+                    # Conteggi: tassi per 90' sui minuti della stessa tabella
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        values = np.where(exposure > 0, values.astype(np.int64) * 90 / exposure, np.nan)
+                else:
+                    values = np.round(values, decimals)
+                aligned = np.full(count, np.nan)
+                aligned[positions[found]] = values[found]
+                (rates if decimals is None else ratios)[name] = aligned
+
+        if "gol" in rates and "assist" in rates:
+            rates["gol_assist"] = rates["gol"] + rates["assist"]
+
+        rate_names = tuple(rates)
+        value_names = rate_names + tuple(ratios)
+        rates = np.column_stack(list(rates.values())) if rates else np.empty((count, 0))
+        values = np.column_stack([rates] + list(ratios.values())) if ratios else rates
+
+        return cls(
+            players, _roles(standard, players, row_index.goalkeepers), minutes,
+            rate_names, rates.astype(np.float32), value_names, values.astype(np.float32)
+        )
+
+    def _percentiles(self):
+        """(percentili float32, giocatori di confronto per riga) in un passaggio per ruolo
+
+        Ogni colonna è ordinata una volta per ruolo sui soli giocatori con almeno
+        MIN_MINUTES minuti; il percentile è la quota di questi con valore <= al proprio
+        """
+        percentiles = np.full(self.values.shape, np.nan, dtype=np.float32)
+        peers = np.zeros(len(self.players), dtype=np.int64)
+        for role in np.unique(self.roles):
+            members = self.roles == role
+            reference = np.sort(self.values[members & self.qualified], axis=0)
+            peers[members] = len(reference)
+            if not len(reference):
+                continue
+            rows = self.values[members]
+            valid = (~np.isnan(reference)).sum(axis=0)
+            column_percentiles = np.full(rows.shape, np.nan, dtype=np.float32)
+            for column in np.flatnonzero(valid):
+                ranks = np.searchsorted(reference[:valid[column], column], rows[:, column], side='right')
+                column_percentiles[:, column] = np.where(np.isnan(rows[:, column]), np.nan, ranks * 100 / valid[column])
+            percentiles[members] = column_percentiles
+        return percentiles, peers
+
+    def rate(self, player, name):
+        """Tasso per 90' di un giocatore, None se non disponibile"""
+        row = self.index.get(player)
+        if row is None or name not in self.rate_names:
+            return None
+        value = self.rates[row, self.rate_names.index(name)]
+        return None if np.isnan(value) else round(float(value), 2)
+
+    def percentile(self, player, name):
+        """Percentile (0-100) di un giocatore nel suo ruolo, None se non disponibile"""
+        row = self.index.get(player)
+        if row is None or name not in self.value_names:
+            return None
+        value = self.percentiles[row, self.value_names.index(name)]
+        return None if np.isnan(value) else int(round(float(value)))
+
+    def _serialize(self):
+        """{giocatore: (bytes di "per_90", bytes di "percentili")} con modelli di formato
+
+        I valori mancanti seguono pochi schemi (es. statistiche da portiere per gli
+        altri ruoli): un modello per schema, costruito alla prima riga che lo usa
+        """
+        rates = np.round(self.rates.astype(float), 2)
+        percentiles = np.where(np.isnan(self.percentiles), -1, np.rint(self.percentiles)).astype(np.int64)
+        rate_present = ~np.isnan(rates)
+        value_present = percentiles >= 0
+        templates = {}
+
+        def template(names, present, placeholder):
+            key = (placeholder, present.tobytes())
+            if key not in templates:
+                templates[key] = "{" + ",".join(f'"{name}":{placeholder}'
+                                                for name, keep in zip(names, present) if keep) + "}"
+            return templates[key]
+
+        roles = {role: dumps(role or None) for role in set(self.roles.tolist())}
+        sections = {}
+        for row, player in enumerate(self.players):
+            rate_values = rates[row][rate_present[row]].tolist()
+            values = percentiles[row][value_present[row]].tolist()
+            per_90 = template(self.rate_names, rate_present[row], "%r") % tuple(rate_values)
+            valori = template(self.value_names, value_present[row], "%d") % tuple(values)
+            sections[player] = per_90.encode('utf-8'), (
+                b'{"ruolo":' + roles[self.roles[row]] +
+                b',"confronto":' + str(self.peers[row]).encode() +
+                b',"minuti_sufficienti":' + (b'true' if self.qualified[row] else b'false') +
+                b',"valori":' + valori.encode('utf-8') + b'}'
+            )
+        return sections
+
+    def fragments(self, player):
+        """(bytes JSON di "per_90", bytes JSON di "percentili") del giocatore"""
+        return self.sections.get(player, (b'{}', b'{}'))
+
+    def changed_since(self, previous):
+        """Giocatori con per_90 o percentili diversi dalla normalizzazione precedente
+
+        Dopo una giornata i percentili si spostano anche per chi non ha giocato:
+        solo le loro risposte vanno ricostruite
+        """
+        if previous is None:
+            return set(self.players)
+        return {player for player, sections in self.sections.items() if sections != previous.fragments(player)}
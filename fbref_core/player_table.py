@@ -0,0 +1,247 @@
+"""
+Tabella colonnare di tutto il roster per /api/players
+Un array numpy per colonna, costruito una volta con il dataset (e con il listone):
+filtri, ordinamento e paginazione sono operazioni vettoriali sugli array,
+senza ciclare sui giocatori né ricostruire DataFrame ad ogni richiesta
+"""
+
+import numpy as np
+
+from .columns import numeric_column
+
+# Ruolo classico fantacalcio dal primo ruolo FBref ("DF,MF" -> "D")
+FBREF_ROLES = {"GK": "P", "DF": "D", "MF": "C", "FW": "A"}
+
+# Colonne di testo (filtrabili per valore esatto, ordinabili)
+TEXT_COLUMNS = ("player", "team", "league", "posizione", "ruolo", "ruolo_mantra", "affidabilita")
+
+# Colonne del listone aggiunte quando è risolto sul dataset
+LISTONE_NUMERIC = ("fvm", "fvm_m", "qt_a", "qt_i", "qt_a_m", "qt_i_m")
+
+# Statistiche per 90 minuti: (colonna, statistica di base)
+PER_90 = (("gol_90", "gol"), ("assist_90", "assist"), ("gol_assist_90", "gol_assist"))
+
+# Totali (aggregates.TOTAL_COLUMNS) riportati nella tabella delle aggregazioni
+TOTAL_STATS = ("partite", "minuti", "gol", "assist", "gialli", "rossi", "clean_sheets", "gol_subiti", "parate")
+
+DEFAULT_SORT = "gol_assist"
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def _role_from_position(positions):
+    """Ruolo classico (P/D/C/A) dalla posizione FBref, "" se sconosciuta"""
+    roles = [FBREF_ROLES.get(str(position or "").split(",")[0].strip().upper(), "") for position in positions]
+    return np.array(roles, dtype=object)
+
+
+def _text_column(table, column, players):
+    if table is None or table.empty or column not in table.columns:
+        return np.full(len(players), "", dtype=object)
+    values = table[column].to_numpy(dtype=object)
+    return np.array(["" if value is None or value != value else str(value) for value in values], dtype=object)
+
+
+def _round(values, decimals=2):
+    return np.round(values.astype(float), decimals)
+
+
+class PlayerTable:
+    """Roster in forma colonnare: {colonna: array numpy} con una riga per giocatore"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.players = columns["player"]
+        # Chiavi minuscole per i filtri testuali, calcolate una volta
+        self._keys = {name: np.array([value.lower() for value in columns[name]], dtype=object)
+                      for name in TEXT_COLUMNS if name in columns}
+        self._index = {player: row for row, player in enumerate(self.players)}
+
+    def __len__(self):
+        return len(self.players)
+
+    @classmethod
+    def from_columns(cls, players, teams, leagues, numeric, positions=None, affidabilita=None):
+        """Tabella da array allineati; aggiunge gol_assist e le statistiche per 90 minuti"""
+        count = len(players)
+        columns = {
+            "player": np.array(players, dtype=object),
+            "team": np.array(teams, dtype=object),
+            "league": np.array(leagues, dtype=object),
+            "posizione": np.array(positions if positions is not None else [""] * count, dtype=object),
+        }
+        columns["ruolo"] = _role_from_position(columns["posizione"])
+        columns["ruolo_mantra"] = np.full(count, "", dtype=object)
+        columns["affidabilita"] = np.array(affidabilita if affidabilita is not None else [""] * count, dtype=object)
+        columns.update(numeric)
+        if "gol_assist" not in columns:
+            columns["gol_assist"] = columns["gol"] + columns["assist"]
+
+        minutes = columns["minuti"].astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, base in PER_90:
+                columns[name] = _round(np.where(minutes > 0, columns[base] * 90 / minutes, 0.0))
+        return cls(columns)
+
+    @classmethod
+    def from_dataset(cls, tables, row_index, insights):
+        """Tabella della stagione: standard, tiri, passaggi e insights pre-calcolati"""
+        players, standard = row_index.current_rows(tables.get('standard'), 'standard')
+        if standard.empty:
+            return cls.empty()
+
+        index = standard.index
+        numeric = {
+            "partite": numeric_column(standard, ('Playing Time', 'MP')).astype(np.int64),
+            "minuti": numeric_column(standard, ('Playing Time', 'Min')).astype(np.int64),
+            "gol": numeric_column(standard, ('Performance', 'Gls')).astype(np.int64),
+            "assist": numeric_column(standard, ('Performance', 'Ast')).astype(np.int64),
+            "gialli": numeric_column(standard, ('Performance', 'CrdY')).astype(np.int64),
+            "rossi": numeric_column(standard, ('Performance', 'CrdR')).astype(np.int64),
+        }
+
+        # Tabelle secondarie allineate all'ordine dei giocatori di standard
+        for table_name, fields in (
+            ('shooting', {"tiri": (('Standard', 'Sh'), np.int64)}),
+            ('passing', {"passaggi_totali": (('Total', 'Att'), np.int64),
+                         "precisione_passaggi": (('Total', 'Cmp%'), float)}),
+        ):
+            table_players, table = row_index.current_rows(tables.get(table_name), table_name)
+            rows = {player: row for row, player in enumerate(table_players)}
+            positions = np.array([rows.get(player, -1) for player in players], dtype=np.int64)
+            for name, (column, dtype) in fields.items():
+                values = np.zeros(len(players), dtype=dtype)
+                if not table.empty:
+                    source = numeric_column(table, column)
+                    found = positions >= 0
+                    values[found] = source[positions[found]].astype(dtype)
+                numeric[name] = _round(values, 1) if dtype is float else values
+
+        insights = insights.reindex(players)
+        numeric["voto_medio_stimato"] = insights["voto_medio_stimato"].to_numpy(dtype=float)
+        numeric["bonus_malus_attesi"] = insights["bonus_malus_attesi"].to_numpy(dtype=float)
+        numeric["portiere"] = insights["portiere"].to_numpy(dtype=bool)
+        for name in ("clean_sheets", "gol_subiti", "parate"):
+            numeric[name] = insights[name].to_numpy(dtype=np.int64)
+
+        return cls.from_columns(
+            players, index.get_level_values('team'), index.get_level_values('league'), numeric,
+            positions=_text_column(standard, ('pos', ''), players),
+            affidabilita=insights["affidabilita"].to_numpy(dtype=object)
+        )
+
+    @classmethod
+    def from_totals(cls, players, teams, leagues, totals):
+        """Tabella di un'aggregazione su più stagioni: {colonna di TOTAL_COLUMNS: array}"""
+        numeric = {name: totals[name] for name in TOTAL_STATS}
+        numeric["portiere"] = totals["partite_portiere"] > 0
+        return cls.from_columns(players, teams, leagues, numeric)
+
+    @classmethod
+    def empty(cls):
+        return cls.from_totals([], [], [], {
+            name: np.zeros(0, dtype=np.int64) for name in (*TOTAL_STATS, "partite_portiere")
+        })
+
+    @property
+    def sortable(self):
+        return list(self.columns)
+
+    def with_listone(self, players, mapping):
+        """Copia con ruoli, FVM e quotazioni del listone (prima riga del listone per giocatore FBref)
+
+        Il ruolo del listone sostituisce quello stimato dalla posizione FBref
+        """
+        listone = {}
+        for record in players:
+            fbref_player = mapping.get(record["id"])
+            if fbref_player:
+                listone.setdefault(fbref_player, record)
+
+        columns = dict(self.columns)
+        records = [listone.get(player) for player in self.players]
+        ruolo = [record and str(record.get("ruolo") or "").strip().upper() for record in records]
+        columns["ruolo"] = np.array([role or fallback for role, fallback in zip(ruolo, self.columns["ruolo"])],
+                                    dtype=object)
+        columns["ruolo_mantra"] = np.array([str(record.get("ruolo_mantra") or "") if record else ""
+                                            for record in records], dtype=object)
+        columns["listone_id"] = np.array([record["id"] if record else np.nan for record in records], dtype=float)
+        for name in LISTONE_NUMERIC:
+            values = []
+            for record in records:
+                value = record.get(name) if record else None
+                values.append(value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan)
+            columns[name] = np.array(values, dtype=float)
+        return PlayerTable(columns)
+
+    def mask(self, filters):
+        """Maschera booleana per i filtri
+
+        filters: {colonna di testo: [valori]} (ruolo_mantra: basta uno dei ruoli),
+        {"min_<colonna>" / "max_<colonna>": soglia}, {"portiere": bool}
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in filters.items():
+            if name == "portiere":
+                mask &= self.columns["portiere"] == bool(value)
+            elif name in self._keys:
+                wanted = [str(item).strip().lower() for item in value]
+                keys = self._keys[name]
+                if name == "ruolo_mantra":
+                    # "Dc;E": il giocatore vale per tutti i ruoli indicati
+                    mask &= np.array([any(role in wanted for role in key.split(";")) for key in keys], dtype=bool)
+                else:
+                    mask &= np.isin(keys, wanted)
+            elif name.startswith(("min_", "max_")) and name[4:] in self.columns:
+                values = self.columns[name[4:]]
+                if values.dtype.kind not in 'iuf':
+                    raise ValueError(f"Soglia non valida: {name} si applica solo a colonne numeriche")
+                # NaN (es. giocatori fuori listone) non supera nessuna soglia
+                mask &= values >= value if name.startswith("min_") else values <= value
+            else:
+                raise ValueError(f"Filtro non supportato: {name}")
+        return mask
+
+    def query(self, filters=None, sort=DEFAULT_SORT, descending=True, limit=DEFAULT_LIMIT, offset=0):
+        """(righe corrispondenti in totale, pagina di righe come dizionari)"""
+        if sort not in self.columns:
+            raise ValueError(f"Colonna di ordinamento non supportata: {sort}")
+
+        rows = np.flatnonzero(self.mask(filters or {}))
+        values = self._keys.get(sort, self.columns[sort])[rows]
+        if values.dtype == object:
+            order = np.argsort(values, kind='stable')
+            if descending:
+                order = order[::-1]
+        else:
+            values = values.astype(float)
+            # Ordinamento stabile, valori mancanti (NaN) sempre in fondo
+            order = np.lexsort((-values if descending else values, np.isnan(values)))
+
+        page = rows[order[offset:offset + limit]]
+        return len(rows), self.rows(page)
+
+    def rows(self, positions):
+        """Righe indicate come dizionari JSON (NaN -> None)"""
+        names = list(self.columns)
+        values = []
+        for name in names:
+            column = self.columns[name][positions].tolist()
+            if self.columns[name].dtype.kind == 'f':
+                column = [None if value != value else value for value in column]
+            values.append(column)
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def values(self, players, column):
+        """Colonna numerica allineata alla lista di giocatori FBref (NaN per quelli assenti)"""
+        source = self.columns[column]
+        positions = np.array([self._index.get(player, -1) for player in players], dtype=np.int64)
+        values = np.full(len(players), np.nan)
+        found = positions >= 0
+        values[found] = source[positions[found]]
+        return values
+
+    def row(self, player):
+        """Riga di un giocatore FBref, None se assente"""
+        position = self._index.get(player)
+        return None if position is None else self.rows([position])[0]
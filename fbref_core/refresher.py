@@ -0,0 +1,142 @@
+"""
+Refresh dei dati FBref in background
+Il dataset nuovo viene costruito in un thread separato e pubblicato solo
+quando è completo: le richieste in corso continuano sul dataset precedente
+"""
+
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_interval_from_env(default_hours=24):
+    """Intervallo di refresh periodico in secondi (FBREF_REFRESH_HOURS, 0 = disattivato)"""
+    try:
+        hours = float(os.environ.get('FBREF_REFRESH_HOURS', default_hours))
+    except ValueError:
+        hours = default_hours
+    return hours * 3600 if hours > 0 else None
+
+
+class DataRefresher:
+    """Esegue refresh periodici o su richiesta, uno alla volta
+
+    Con più worker gunicorn ogni processo ha il suo refresher: watch_fn ricarica
+    lo snapshot scritto da un altro worker e is_stale evita download duplicati
+    """
+
+    def __init__(self, refresh_fn, interval=None, name="fbref-refresher",
+                 watch_fn=None, watch_interval=60, is_stale=None, purge_fn=None):
+        # refresh_fn() costruisce e pubblica il nuovo dataset, restituisce le righe per tabella
+        self.refresh_fn = refresh_fn
+        self.interval = interval
+        self.name = name
+        # watch_fn() controlla i file su disco (snapshot, listone) ogni watch_interval secondi
+        self.watch_fn = watch_fn
+        self.watch_interval = watch_interval
+        # is_stale() decide se il refresh periodico deve davvero scaricare
+        self.is_stale = is_stale
+        # purge_fn() ad ogni giro del thread: libera le voci scadute della cache
+        self.purge_fn = purge_fn
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.running = False
+        self.refreshes = 0
+        self.last_started = None
+        self.last_finished = None
+        self.last_duration = None
+        self.last_rows = None
+        self.last_error = None
+
+    def start(self):
+        """Avvia il thread periodico (se è configurato un intervallo o un watch)"""
+        if not (self.interval or self.watch_fn) or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+        if self.interval:
+            logger.info(f"🔁 Refresh automatico ogni {self.interval / 3600:g}h")
+
+    def stop(self):
+        """Ferma il thread periodico"""
+        self._stop.set()
+
+    def _loop(self):
+        ticks = [t for t in (self.interval, self.watch_interval if self.watch_fn else None) if t]
+        tick = min(ticks)
+        next_refresh = time.monotonic() + self.interval if self.interval else None
+
+        while not self._stop.wait(tick):
+            if self.watch_fn:
+                try:
+                    self.watch_fn()
+                except Exception as e:
+                    logger.warning(f"⚠️ Controllo snapshot fallito: {e}")
+
+            if self.purge_fn:
+                purged = self.purge_fn()
+                if purged:
+                    logger.debug(f"🧹 {purged} voci scadute rimosse dalla cache")
+
+            if next_refresh is not None and time.monotonic() >= next_refresh:
+                next_refresh = time.monotonic() + self.interval
+                if self.is_stale is None or self.is_stale():
+                    self.refresh()
+
+    def trigger(self):
+        """Avvia un refresh in background; False se ce n'è già uno in corso"""
+        if not self._lock.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._run_locked, name=f"{self.name}-manual", daemon=True).start()
+        return True
+
+    def refresh(self):
+        """Refresh sincrono; ignorato se un altro refresh è già in corso"""
+        if not self._lock.acquire(blocking=False):
+            return False
+        return self._run_locked()
+
+    def _run_locked(self):
+        """Esegue il refresh: il lock è già acquisito dal chiamante"""
+        try:
+            self.running = True
+            self.last_started = time.time()
+            logger.info("🔄 Refresh dati FBref in background...")
+            self.last_rows = self.refresh_fn()
+            self.last_error = None
+            self.refreshes += 1
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"❌ Refresh dati fallito: {e}")
+            return False
+        finally:
+            self.last_finished = time.time()
+            self.last_duration = round(self.last_finished - self.last_started, 2)
+            self.running = False
+            self._lock.release()
+            logger.info(f"✅ Refresh terminato in {self.last_duration}s")
+
+    def status(self):
+        """Stato dell'ultimo refresh per /api/cache/refresh e /api/health"""
+        return {
+            "running": self.running,
+            "refreshes": self.refreshes,
+            "interval_hours": self.interval / 3600 if self.interval else None,
+            "last_started": _iso(self.last_started),
+            "last_finished": _iso(self.last_finished),
+            "last_duration_s": self.last_duration,
+            "last_rows": self.last_rows,
+            "last_error": self.last_error
+        }
+
+
+def _iso(timestamp):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(timestamp)) if timestamp else None
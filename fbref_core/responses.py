@@ -0,0 +1,218 @@
+"""
+Store delle risposte JSON pre-calcolate per /api/player-stats
+Tutte le statistiche stagionali sono statiche: le risposte vengono costruite
+una volta al caricamento dati, colonna per colonna, e servite come bytes
+"""
+
+import json
+
+from .encoding import EncodedPayload
+from .sections import DERIVED_SECTIONS, SECTION_NAMES, STAT_SECTIONS
+from .seasons import season_label
+
+
+def dumps(data):
+    """Serializza una risposta in JSON compatto (bytes UTF-8)"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def batch_payload(results):
+    """Risposta batch costruita concatenando i bytes già serializzati
+
+    results: lista di (nome, squadra, stato, giocatore FBref, payload); con stato "ok"
+    il payload sono i bytes della risposta, altrimenti il messaggio di errore.
+    Le statistiche dei giocatori trovati non vengono mai ri-serializzate
+    """
+    items = []
+    found = 0
+    for name, team, status, player, payload in results:
+        head = b'{"name":' + dumps(name) + b',"team":' + dumps(team) + b',"status":' + dumps(status)
+        if status == "ok":
+            found += 1
+            items.append(head + b',"player":' + dumps(player) + b',"stats":' + payload + b'}')
+        else:
+            items.append(head + b',"error":' + dumps(payload) + b'}')
+
+    return (
+        b'{"count":' + str(len(results)).encode() +
+        b',"found":' + str(found).encode() +
+        b',"results":[' + b','.join(items) + b']}'
+    )
+
+
+def assemble_payload(head, sections, tail):
+    """(bytes della risposta, confini delle sezioni) con "stats" costruito sezione per sezione
+
+    head / tail: campi prima e dopo "stats"; sections: [(chiave '"nome":', bytes JSON
+    della sezione)]. Il risultato è identico a dumps() del dizionario completo;
+    i confini (inizio di "stats" e fine di ogni sezione) servono alla proiezione ?fields=
+    """
+    prefix = dumps(head)[:-1] + b',"stats":{'
+    position = len(prefix)
+    bounds = [position]
+    for key, fragment in sections:
+        position += len(key) + len(fragment)
+        bounds.append(position)
+        position += 1
+    return prefix + b','.join(key + fragment for key, fragment in sections) + b'},' + dumps(tail)[1:], tuple(bounds)
+
+
+class ResponseStore:
+    """Risposte serializzate per giocatore FBref
+
+    sections / bounds: nomi delle sezioni di "stats" e, per giocatore, i confini
+    restituiti da assemble_payload (proiezione senza ri-serializzare)
+    """
+
+    def __init__(self, payloads, sections=(), bounds=None):
+        self.payloads = payloads
+        self.sections = tuple(sections)
+        self.bounds = bounds or {}
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def __contains__(self, player):
+        return player in self.payloads
+
+    def get(self, player):
+        """Bytes JSON della risposta del giocatore, None se assente"""
+        return self.payloads.get(player)
+
+    def project(self, player, fields=None):
+        """Risposta con le sole sezioni di "stats" indicate (fields=None: completa)
+
+        Le sezioni sono fette dei bytes pre-calcolati: nessuna serializzazione JSON
+        """
+        payload = self.payloads.get(player)
+        bounds = self.bounds.get(player)
+        if payload is None or fields is None or bounds is None:
+            return payload
+        selected = [
+            payload[bounds[position] + (1 if position else 0):bounds[position + 1]]
+            for position, name in enumerate(self.sections) if name in fields
+        ]
+        return EncodedPayload(payload[:bounds[0]] + b','.join(selected) + payload[bounds[-1]:])
+
+    def merged(self, updated):
+        """Store con le risposte di updated al posto di quelle precedenti (aggiornamento incrementale)"""
+        return ResponseStore({**self.payloads, **updated.payloads}, updated.sections or self.sections,
+                             {**self.bounds, **updated.bounds})
+
+
+# Etichette dei ruoli per i consigli basati sui percentili
+ROLE_LABELS = {"P": "portieri", "D": "difensori", "C": "centrocampisti", "A": "attaccanti"}
+
+
+def _percentile_notes(normalization, player, *stats):
+    """Consigli "<etichetta> per 90': x (p° percentile tra i <ruolo>)" per (statistica, etichetta)
+
+    Solo per chi ha abbastanza minuti per il confronto con il proprio ruolo
+    """
+    if normalization is None:
+        return []
+    row = normalization.index.get(player)
+    if row is None or not normalization.qualified[row] or normalization.roles[row] not in ROLE_LABELS:
+        return []
+    notes = []
+    for name, label in stats:
+        rate = normalization.rate(player, name)
+        percentile = normalization.percentile(player, name)
+        if rate is not None and percentile is not None:
+            notes.append(f"{label} per 90': {rate:.2f} ({percentile}° percentile tra i "
+                         f"{ROLE_LABELS[normalization.roles[row]]})")
+    return notes
+
+
+def build_response_store(tables, row_index, insights, platform, updated=None, players=None, normalization=None):
+    """Costruisce le risposte di tutti i giocatori dalle tabelle stagionali
+
+    tables: {nome tabella: DataFrame FBref}, le sezioni seguono sections.SECTIONS
+    insights: tabella di compute_insights() indicizzata per giocatore
+    platform: etichetta della piattaforma usata in "fonte" e nei consigli
+    updated: data dei dati ("ultimo_aggiornamento")
+    players: se indicato, solo le risposte di questi giocatori
+    normalization: RoleNormalization della stagione (sezioni "per_90" e "percentili")
+    """
+    selected = players
+    players, standard = row_index.current_rows(tables.get('standard'), 'standard', selected)
+    if standard.empty:
+        return ResponseStore({})
+
+    source_note = f"Dati reali FBref via {platform}"
+    index_values = standard.index.tolist()
+
+    # Insights pre-calcolati per tutto il roster
+    insights = insights.reindex(players)
+    voti = insights["voto_medio_stimato"].tolist()
+    bonus = insights["bonus_malus_attesi"].tolist()
+    affidabilita = insights["affidabilita"].tolist()
+
+    # Sezioni del registro estratte colonna per colonna e serializzate una volta per tutto il roster
+    derived = [dumps(name) + b':' for name in DERIVED_SECTIONS]
+    sections = []
+    for section in STAT_SECTIONS:
+        section_players, columns = section.columns(tables, row_index, selected)
+        sections.append((section.key, section.fragments(section_players, columns)))
+        if section.name == "generale":
+            generale = dict(zip(section_players, zip(
+                *(columns.get(name, [0] * len(section_players)) for name in ("partite_giocate", "gol", "assist"))
+            )))
+        elif section.name == "portiere":
+            portieri = dict(zip(section_players, zip(
+                *(columns.get(name, [0] * len(section_players)) for name in ("clean_sheets", "parate"))
+            )))
+
+    payloads = {}
+    bounds = {}
+    for i, player in enumerate(players):
+        league, season, team, full_name = index_values[i]
+        partite, gol, assist = generale.get(player, (0, 0, 0))
+
+        insight = {
+            "voto_medio_stimato": voti[i],
+            "bonus_malus_attesi": bonus[i],
+            "affidabilita": affidabilita[i],
+            "trend": "Stabile",
+            "consigli": [
+                f"Ha giocato {partite} partite",
+                f"Contributo gol+assist: {gol + assist}",
+                *_percentile_notes(normalization, player, ("gol_assist", "Gol+assist")),
+                source_note
+            ]
+        }
+
+        portiere = portieri.get(player)
+        if portiere:
+            clean_sheets, parate = portiere
+            insight.update({
+                "ruolo": "Portiere",
+                "consigli": [
+                    f"Portiere con {clean_sheets} clean sheets",
+                    f"Parate: {parate}",
+                    *_percentile_notes(normalization, player, ("parate", "Parate"), ("gol_subiti", "Gol subiti")),
+                    source_note
+                ]
+            })
+
+        payload, bounds[player] = assemble_payload(
+            {
+                "player": {
+                    "name": full_name,
+                    "team": team,
+                    "league": league,
+                    "season": season_label(season)
+                }
+            },
+            [(key, fragments.get(player, b'{}')) for key, fragments in sections] +
+            (list(zip(derived, normalization.fragments(player))) if normalization is not None else []),
+            {
+                "fantacalcio_insights": insight,
+                "fonte": f"FBref via SoccerData ({platform})",
+                "ultimo_aggiornamento": updated
+            }
+        )
+        payloads[player] = EncodedPayload(payload)
+
+    names = SECTION_NAMES if normalization is not None else SECTION_NAMES[:-len(DERIVED_SECTIONS)]
+    return ResponseStore(payloads, names, bounds)
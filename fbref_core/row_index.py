@@ -0,0 +1,61 @@
+"""
+Indice giocatore -> posizioni di riga nelle tabelle FBref
+Sostituisce le maschere booleane sul MultiIndex con accesso posizionale O(1)
+"""
+
+import pandas as pd
+
+
+class PlayerRowIndex:
+    """Posizioni di riga per giocatore in ogni tabella statistica"""
+
+    def __init__(self, positions):
+        # {tabella: {giocatore: (pos, ...)}} nell'ordine originale delle righe
+        self.positions = positions
+        self.goalkeepers = frozenset(positions.get('keeper', {}))
+
+    @classmethod
+    def from_tables(cls, tables):
+        """Costruisce l'indice da {nome_tabella: DataFrame con livello 'player'}"""
+        positions = {}
+        for name, table in tables.items():
+            if table is None or table.empty:
+                positions[name] = {}
+                continue
+
+            rows = {}
+            for pos, player in enumerate(table.index.get_level_values('player')):
+                rows.setdefault(player, []).append(pos)
+            positions[name] = {player: tuple(pos_list) for player, pos_list in rows.items()}
+
+        return cls(positions)
+
+    def rows(self, table_name, player):
+        """Tutte le posizioni del giocatore nella tabella (vuoto se assente)"""
+        return self.positions.get(table_name, {}).get(player, ())
+
+    def first(self, table_name, player):
+        """Posizione della riga più recente (la prima, come .iloc[0]) o None"""
+        rows = self.rows(table_name, player)
+        return rows[0] if rows else None
+
+    def current_rows(self, table, table_name, players=None):
+        """(giocatori, sotto-tabella con la prima riga di ciascuno) nell'ordine della tabella
+
+        players: se indicato, solo questi giocatori (aggiornamenti incrementali)
+        """
+        rows = self.positions.get(table_name, {})
+        if players is not None:
+            rows = {player: positions for player, positions in rows.items() if player in players}
+        selected = list(rows)
+        if table is None or table.empty or not selected:
+            return selected, pd.DataFrame()
+        return selected, table.iloc[[positions[0] for positions in rows.values()]]
+
+    def is_goalkeeper(self, player):
+        """True se il giocatore compare nelle statistiche portieri"""
+        return player in self.goalkeepers
+
+    def counts(self):
+        """Numero di giocatori indicizzati per tabella"""
+        return {name: len(rows) for name, rows in self.positions.items()}
@@ -0,0 +1,159 @@
+"""
+Stagioni FBref: stagione corrente caricata all'avvio, stagioni passate
+caricate alla prima richiesta (?season=2324) e poi tenute in memoria.
+Le aggregazioni su più stagioni (?last_seasons=3) sono costruite una volta
+per finestra di stagioni e riusate finché i dataset non cambiano
+"""
+
+import time
+import logging
+import threading
+
+from .aggregates import AggregateDataset
+from .seasons import season_label, sort_seasons
+
+logger = logging.getLogger(__name__)
+
+# Secondi prima di ritentare una stagione il cui caricamento è fallito
+RETRY_AFTER = 5 * 60
+
+# Attesa massima della richiesta che avvia il caricamento: uno snapshot su disco
+# si carica in pochi decimi di secondo, un download da FBref prosegue in background
+LOAD_WAIT = 2.0
+
+# Retry-After suggerito ai client mentre la stagione è in caricamento
+LOADING_RETRY_AFTER = 15
+
+
+class SeasonLoading(RuntimeError):
+    """Stagione in caricamento in background: riprovare dopo retry_after secondi"""
+
+    def __init__(self, season, retry_after=LOADING_RETRY_AFTER):
+        super().__init__(f"Stagione {season} in caricamento, riprovare tra {retry_after}s")
+        self.season = season
+        self.retry_after = retry_after
+
+
+class SeasonStore:
+    """Dataset per stagione: la corrente dal servizio, le passate caricate su richiesta
+
+    Il caricamento di una stagione passata (snapshot o download FBref) gira in un
+    thread dedicato, senza lock: le altre stagioni restano servibili nel frattempo
+    """
+
+    def __init__(self, seasons, current_fn, load_fn, platform):
+        self.seasons = sort_seasons(seasons)
+        self.current = self.seasons[0]
+        # current_fn() -> dataset della stagione corrente (sostituito ad ogni refresh)
+        self.current_fn = current_fn
+        # load_fn(stagione) -> FBrefDataset di una stagione passata
+        self.load_fn = load_fn
+        self.platform = platform
+        self._datasets = {}
+        self._aggregates = {}
+        # stagione -> (istante del fallimento, errore)
+        self._failures = {}
+        # stagione -> thread di caricamento in corso
+        self._loading = {}
+        # Protegge solo lo stato qui sopra, mai tenuto durante il caricamento
+        self._lock = threading.Lock()
+        # Costruzione delle aggregazioni, separata dal caricamento delle stagioni
+        self._aggregate_lock = threading.Lock()
+
+    def get(self, season=None):
+        """Dataset della stagione (la corrente se None)
+
+        ValueError se non configurata, SeasonLoading se il caricamento è ancora
+        in corso, RuntimeError se è fallito di recente
+        """
+        season = str(season) if season else self.current
+        if season == self.current:
+            return self.current_fn()
+        if season not in self.seasons:
+            raise ValueError(f"Stagione non disponibile: {season}")
+
+        dataset = self._datasets.get(season)
+        if dataset is not None:
+            return dataset
+
+        with self._lock:
+            dataset = self._datasets.get(season)
+            if dataset is not None:
+                return dataset
+            # Un solo caricamento per stagione, le richieste successive lo attendono
+            loader = self._loading.get(season)
+            if loader is None:
+                failed_at, error = self._failures.get(season, (None, None))
+                if failed_at is not None and time.time() - failed_at < RETRY_AFTER:
+                    raise RuntimeError(f"Stagione {season} non disponibile, nuovo tentativo tra poco ({error})")
+                loader = threading.Thread(target=self._load, args=(season,), name=f"season-{season}", daemon=True)
+                self._loading[season] = loader
+                loader.start()
+
+        loader.join(LOAD_WAIT)
+        dataset = self._datasets.get(season)
+        if dataset is not None:
+            return dataset
+        if loader.is_alive():
+            raise SeasonLoading(season)
+        raise RuntimeError(self._failures.get(season, (None, f"Stagione {season} non disponibile"))[1])
+
+    def _load(self, season):
+        """Carica la stagione nel thread dedicato e registra il risultato"""
+        start = time.time()
+        try:
+            dataset = self.load_fn(season)
+            if dataset.is_empty:
+                raise RuntimeError(f"Nessun dato FBref per la stagione {season}")
+        except Exception as e:
+            logger.error(f"❌ Caricamento stagione {season} fallito: {e}")
+            with self._lock:
+                self._failures[season] = (time.time(), str(e))
+                self._loading.pop(season, None)
+            return
+
+        with self._lock:
+            self._failures.pop(season, None)
+            self._datasets[season] = dataset
+            self._loading.pop(season, None)
+        logger.info(f"📚 Stagione {season_label(season)} caricata: {len(dataset.name_index)} giocatori "
+                    f"in {time.time() - start:.2f}s")
+
+    def latest(self, count):
+        """Le ultime count stagioni configurate (ValueError se count non è valido)"""
+        if count < 1:
+            raise ValueError("last_seasons deve essere almeno 1")
+        if count > len(self.seasons):
+            raise ValueError(f"Stagioni configurate: {len(self.seasons)} ({', '.join(self.seasons)})")
+        return self.seasons[:count]
+
+    def aggregate(self, count):
+        """Dataset aggregato delle ultime count stagioni (la sola corrente se count è 1)"""
+        seasons = self.latest(count)
+        if len(seasons) == 1:
+            return self.get(seasons[0])
+
+        datasets = [self.get(season) for season in seasons]
+        signature = tuple(dataset.version for dataset in datasets)
+
+        aggregate = self._aggregates.get(seasons[-1])
+        if aggregate is not None and aggregate.signature == signature:
+            return aggregate
+
+        with self._aggregate_lock:
+            aggregate = self._aggregates.get(seasons[-1])
+            if aggregate is None or aggregate.signature != signature:
+                aggregate = AggregateDataset(datasets, self.platform)
+                # Una sola aggregazione per finestra: quella dei dataset attuali
+                self._aggregates[seasons[-1]] = aggregate
+            return aggregate
+
+    def status(self):
+        """Stagioni configurate e caricate per /api/health"""
+        return {
+            "current": self.current,
+            "configured": self.seasons,
+            "loaded": [self.current] + [season for season in self.seasons if season in self._datasets],
+            "loading": sorted(self._loading),
+            "aggregates": sorted(len(aggregate.seasons) for aggregate in self._aggregates.values())
+        }
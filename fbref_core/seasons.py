@@ -0,0 +1,26 @@
+"""
+Codici stagione FBref ("2425") e loro ordinamento
+"""
+
+
+def season_start_year(season):
+    """Anno di inizio di una stagione FBref ("2425" -> 2024, "2024-2025" -> 2024)"""
+    code = str(season).strip()
+    if len(code) == 4 and code.isdigit() and int(code[2:]) == (int(code[:2]) + 1) % 100:
+        start = int(code[:2])
+        return 2000 + start if start < 90 else 1900 + start
+    return int(code[:4])
+
+
+def season_label(season):
+    """Etichetta leggibile della stagione ("2425" -> "2024-25")"""
+    try:
+        start = season_start_year(season)
+    except ValueError:
+        return str(season)
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def sort_seasons(seasons):
+    """Stagioni dalla più recente alla più vecchia, senza duplicati"""
+    return sorted(dict.fromkeys(str(season) for season in seasons), key=season_start_year, reverse=True)
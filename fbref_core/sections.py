@@ -0,0 +1,134 @@
+"""
+Registro delle sezioni statistiche di /api/player-stats
+Ogni sezione dichiara la tabella FBref di origine e la corrispondenza colonna -> campo;
+viene compilata una volta in estrattori colonnari applicati a tutto il roster.
+Una nuova sezione è solo una voce in SECTIONS, senza costi aggiuntivi per richiesta
+"""
+
+import json
+
+from .columns import int_column, rounded_column
+
+# Sezione -> (tabella FBref, ((campo della risposta, colonna FBref, decimali o None per gli interi), ...))
+SECTIONS = {
+    "generale": ('standard', (
+        ("partite_giocate", ('Playing Time', 'MP'), None),
+        ("minuti_totali", ('Playing Time', 'Min'), None),
+        ("gol", ('Performance', 'Gls'), None),
+        ("assist", ('Performance', 'Ast'), None),
+        ("cartellini_gialli", ('Performance', 'CrdY'), None),
+        ("cartellini_rossi", ('Performance', 'CrdR'), None),
+    )),
+    "passaggi": ('passing', (
+        ("passaggi_totali", ('Total', 'Att'), None),
+        ("precisione_passaggi", ('Total', 'Cmp%'), 1),
+    )),
+    "portiere": ('keeper', (
+        ("partite_giocate", ('Playing Time', 'MP'), None),
+        ("gol_subiti", ('Performance', 'GA'), None),
+        ("parate", ('Performance', 'Saves'), None),
+        ("percentuale_parate", ('Performance', 'Save%'), 1),
+        ("clean_sheets", ('Performance', 'CS'), None),
+        ("percentuale_clean_sheets", ('Performance', 'CS%'), 1),
+    )),
+    "tiri": ('shooting', (
+        ("tiri", ('Standard', 'Sh'), None),
+        ("tiri_in_porta", ('Standard', 'SoT'), None),
+        ("percentuale_tiri_in_porta", ('Standard', 'SoT%'), 1),
+        ("gol_per_tiro", ('Standard', 'G/Sh'), 2),
+        ("distanza_media_tiri", ('Standard', 'Dist'), 1),
+        ("rigori_segnati", ('Standard', 'PK'), None),
+        ("rigori_tentati", ('Standard', 'PKatt'), None),
+        ("xg", ('Expected', 'xG'), 1),
+        ("npxg", ('Expected', 'npxG'), 1),
+        ("gol_meno_xg", ('Expected', 'G-xG'), 1),
+    )),
+    "difesa": ('defense', (
+        ("tackle", ('Tackles', 'Tkl'), None),
+        ("tackle_vinti", ('Tackles', 'TklW'), None),
+        ("intercetti", ('Int', ''), None),
+        ("tackle_e_intercetti", ('Tkl+Int', ''), None),
+        ("tiri_bloccati", ('Blocks', 'Sh'), None),
+        ("passaggi_bloccati", ('Blocks', 'Pass'), None),
+        ("respinte", ('Clr', ''), None),
+        ("errori", ('Err', ''), None),
+    )),
+    "possesso": ('possession', (
+        ("tocchi", ('Touches', 'Touches'), None),
+        ("tocchi_area_avversaria", ('Touches', 'Att Pen'), None),
+        ("dribbling_tentati", ('Take-Ons', 'Att'), None),
+        ("dribbling_riusciti", ('Take-Ons', 'Succ'), None),
+        ("conduzioni", ('Carries', 'Carries'), None),
+        ("conduzioni_progressive", ('Carries', 'PrgC'), None),
+        ("distanza_progressiva", ('Carries', 'PrgDist'), None),
+        ("ricezioni_progressive", ('Receiving', 'PrgR'), None),
+        ("palloni_persi", ('Carries', 'Dis'), None),
+    )),
+    "creazione": ('gca', (
+        ("azioni_da_tiro", ('SCA', 'SCA'), None),
+        ("azioni_da_tiro_90", ('SCA', 'SCA90'), 2),
+        ("azioni_da_gol", ('GCA', 'GCA'), None),
+        ("azioni_da_gol_90", ('GCA', 'GCA90'), 2),
+    )),
+}
+
+
+class StatSection:
+    """Sezione compilata: estrae tutti i campi di una tabella colonna per colonna
+
+    Le righe vengono serializzate con un modello di formato costruito una volta
+    per tabella (i valori sono solo int e float finiti, repr coincide con JSON)
+    """
+
+    def __init__(self, name, table_name, fields):
+        self.name = name
+        self.table_name = table_name
+        self.fields = fields
+        self.key = json.dumps(name).encode('utf-8') + b':'
+
+    def columns(self, tables, row_index, players=None):
+        """(giocatori, {campo: valori allineati ai giocatori}) per la riga corrente di ogni giocatore
+
+        I campi senza colonna nella tabella (es. xG nelle stagioni senza dati
+        Opta) vengono omessi, senza scrivere zeri inventati
+        """
+        table_players, table = row_index.current_rows(tables.get(self.table_name), self.table_name, players)
+        if table.empty:
+            return [], {}
+        return table_players, {
+            name: int_column(table, column) if decimals is None else rounded_column(table, column, decimals)
+            for name, column, decimals in self.fields if column in table.columns
+        }
+
+    def fragments(self, players, columns):
+        """{giocatore: bytes JSON della sezione} dalle colonne di columns()"""
+        if not columns:
+            return {}
+        template = "{" + ",".join(f'"{name}":%r' for name in columns) + "}"
+        return {player: (template % row).encode('utf-8') for player, row in zip(players, zip(*columns.values()))}
+
+
+# Sezioni nell'ordine della risposta, compilate all'import
+STAT_SECTIONS = tuple(StatSection(name, table_name, fields) for name, (table_name, fields) in SECTIONS.items())
+
+# Sezioni derivate dalle precedenti (normalization.RoleNormalization), in coda alla risposta
+DERIVED_SECTIONS = ("per_90", "percentili")
+SECTION_NAMES = tuple(SECTIONS) + DERIVED_SECTIONS
+
+
+def parse_fields(value):
+    """Sezioni richieste da ?fields= (lista o stringa separata da virgole), None = tutte
+
+    ValueError per sezioni sconosciute o valori che non sono stringhe
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)) or not all(isinstance(item, str) for item in value):
+        raise ValueError("fields deve essere una lista di sezioni o una stringa separata da virgole")
+    fields = [item.strip() for item in value if item.strip()]
+    unknown = [field for field in fields if field not in SECTION_NAMES]
+    if unknown:
+        raise ValueError(f"Sezioni sconosciute: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(fields)) or None
@@ -0,0 +1,691 @@
+"""
+Servizio FBref condiviso da tutti gli host (Railway, Oracle Cloud)
+Le differenze tra piattaforme stanno in ServiceConfig, non nel codice
+"""
+
+import json
+import time
+import logging
+
+from .aliases import learn_aliases, load_aliases, save_aliases
+from .auction import AuctionOptimizer
+from .cache import ResponseCache
+from .dataset import FBrefDataset
+from .encoding import EncodedPayload
+from .fasce import FasceStore
+from .insights import rank_insights
+from .listone import ListoneStore, default_listone_path
+from .logs import RequestLogger
+from .matchday import download_matchday, download_played_games, fold_match_stats
+from .metrics import NULL_METRIC, ServiceMetrics
+from .normalization import MIN_MINUTES
+from .player_table import DEFAULT_LIMIT, DEFAULT_SORT
+from .refresher import DataRefresher
+from .responses import batch_payload, dumps
+from .season_store import SeasonStore
+from .seasons import sort_seasons
+from .similarity import DEFAULT_K
+from .snapshot import (
+    download_tables,
+    fetch_tables,
+    load_snapshot,
+    read_manifest,
+    save_snapshot,
+    season_snapshot_dir,
+    snapshot_age,
+    snapshot_lock
+)
+
+logger = logging.getLogger(__name__)
+
+
+class FBrefService:
+    """Servizio FBref con dati reali: dataset, cache, refresh e listone"""
+
+    def __init__(self, config):
+        """Inizializza il servizio: snapshot locale se presente, altrimenti download FBref"""
+        self.config = config
+        self.soccerdata_available = False
+
+        # Cache LRU limitata: risposte e nomi non trovati con scadenze diverse
+        self.cache = ResponseCache(
+            max_entries=config.cache_size,
+            ttl=config.cache_ttl,
+            negative_ttl=config.negative_ttl
+        )
+        # Latenze per fase, matching e cache per /api/metrics
+        self.metrics = ServiceMetrics(self)
+        # Un record strutturato per richiesta (campionato, vedi fbref_core.logs)
+        self.request_log = RequestLogger()
+
+        self.leagues = config.leagues
+        # Stagioni dalla più recente: la prima è la corrente, le altre su richiesta
+        self.seasons = sort_seasons(config.seasons)
+        self.current_season = self.seasons[0]
+
+        # Dataset corrente (tabelle + indici): sostituito in blocco ad ogni refresh
+        self.dataset = FBrefDataset.empty(platform=config.platform)
+        self.season_store = SeasonStore(self.seasons, lambda: self.dataset, self._load_season, config.platform)
+
+        # Listone risolto in blocco su FBref, ricostruito prima di ogni swap del dataset
+        self.listone = ListoneStore(self._resolve_listone_player)
+
+        # Refresh in background, periodico e via /api/cache/refresh
+        # Con più worker gunicorn: scarica solo se lo snapshot su disco è vecchio,
+        # altrimenti ricarica quello scritto da un altro worker
+        self.refresher = DataRefresher(
+            self.refresh_data,
+            interval=config.refresh_interval,
+            watch_fn=self._watch_files,
+            is_stale=self._snapshot_is_stale,
+            purge_fn=self.cache.purge_expired
+        )
+
+        # Snapshot locale: avvio a freddo senza scaricare da FBref
+        if not self._load_snapshot():
+            self._download_data()
+
+        # Listone anche senza dati FBref (prima del fork: condiviso tra i worker)
+        self._refresh_listone(self.dataset)
+        # Fasce FVM per ruolo con le assegnazioni manuali (file condiviso tra i worker)
+        self.fasce = FasceStore(self.get_listone)
+        # Completamento della rosa all'asta, con frontiere per ruolo in cache
+        self.auction = AuctionOptimizer(self.get_listone)
+
+        # Il refresher parte nel processo che serve le richieste:
+        # run() in fbref_core.app oppure post_worker_init in gunicorn.conf.py
+
+    # Accesso alle tabelle del dataset corrente
+    @property
+    def standard_stats(self):
+        return self.dataset.standard_stats
+
+    @property
+    def shooting_stats(self):
+        return self.dataset.shooting_stats
+
+    @property
+    def passing_stats(self):
+        return self.dataset.passing_stats
+
+    @property
+    def keeper_stats(self):
+        return self.dataset.keeper_stats
+
+    @property
+    def defense_stats(self):
+        return self.dataset.defense_stats
+
+    @property
+    def possession_stats(self):
+        return self.dataset.possession_stats
+
+    @property
+    def gca_stats(self):
+        return self.dataset.gca_stats
+
+    @property
+    def snapshot_manifest(self):
+        return self.dataset.manifest
+
+    def _publish(self, dataset):
+        """Pubblica un dataset completo con un unico swap del riferimento
+
+        Il listone viene risolto sul nuovo dataset prima dello swap: nessuna
+        richiesta lo ricostruisce
+        """
+        self._refresh_listone(dataset)
+        self.dataset = dataset
+        self.cache.clear()
+        self.metrics.observe_build(dataset)
+        logger.info(f"✅ Dataset {self.config.label}: {len(dataset.name_index)} giocatori, {len(dataset.responses)} risposte pre-calcolate")
+
+    def _load_snapshot(self):
+        """Carica le tabelle dallo snapshot locale, se presente e compatibile"""
+        try:
+            snapshot = load_snapshot(leagues=self.leagues, seasons=[self.current_season])
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot {self.config.label} non disponibile: {e}")
+            return False
+
+        if snapshot is None:
+            return False
+
+        tables, manifest = snapshot
+        # Snapshot aggiornato per giornata a partire dal dataset corrente (scritto
+        # da un altro worker): si ricalcolano solo i giocatori indicati nel manifest
+        previous = self.dataset
+        changed = manifest.get("changed_players")
+        if changed is None or manifest.get("previous_created_at") != (previous.manifest or {}).get("created_at"):
+            previous = changed = None
+
+        dataset = FBrefDataset(tables, platform=self.config.platform, manifest=manifest,
+                               previous=previous, changed=changed, aliases=load_aliases())
+        if dataset.is_empty:
+            return False
+
+        self._publish(dataset)
+        self.soccerdata_available = True
+        logger.info(f"⚡ Snapshot FBref caricato su {self.config.label} ({manifest['created_at']})")
+        return True
+
+    def _download_data(self):
+        """Primo avvio senza snapshot: scarica da FBref e salva lo snapshot per i riavvii"""
+        try:
+            logger.info(f"📥 Pre-caricamento dati FBref {self.config.label}...")
+            tables, fields = self._download_current()
+        except Exception as e:
+            logger.error(f"❌ Errore inizializzazione SoccerData su {self.config.label}: {e}")
+            return
+
+        if tables['standard'].empty:
+            logger.error("❌ Statistiche standard non disponibili")
+            return
+
+        self._update_aliases(tables)
+        manifest = None
+        try:
+            manifest = save_snapshot(tables, leagues=self.leagues, seasons=[self.current_season], extra=fields)
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot {self.config.label} non salvato: {e}")
+
+        self._publish(FBrefDataset(tables, platform=self.config.platform, manifest=manifest,
+                                   aliases=load_aliases()))
+        self.soccerdata_available = True
+        logger.info(f"🎯 Dati FBref caricati su {self.config.label}")
+
+    def _played_games(self, no_cache=False):
+        """Partite giocate della stagione corrente, None se il calendario non è disponibile"""
+        try:
+            return sorted(download_played_games(self.leagues, self.current_season, no_cache=no_cache))
+        except Exception as e:
+            logger.warning(f"⚠️ Calendario {self.current_season} non disponibile, niente aggiornamenti per giornata: {e}")
+            return None
+
+    def _download_current(self, no_cache=False):
+        """(tabelle, campi del manifest) da un download completo della stagione corrente
+
+        L'esito di ogni tabella (ok, errore, timeout) resta nel manifest ("download").
+        Il calendario è letto prima e dopo le tabelle: se nel frattempo è finita una
+        partita non si sa se le tabelle la includono, quindi niente aggiornamenti per
+        giornata (partita saltata o contata due volte) fino al prossimo refresh completo
+        """
+        games = self._played_games(no_cache) if self.config.incremental else None
+        tables, report = fetch_tables(self.leagues, [self.current_season], no_cache=no_cache)
+        if games is not None and self._played_games(no_cache) != games:
+            logger.warning("⚠️ Partite concluse durante il download, aggiornamenti per giornata sospesi")
+            games = None
+        return tables, {"games": games, "full_refresh_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "download": report}
+
+    def _keep_previous_tables(self, tables, fields):
+        """Le tabelle non scaricate (errore, timeout) restano quelle del dataset pubblicato
+
+        Un refresh parziale non toglie sezioni alle risposte. Le tabelle riprese sono
+        ferme al download precedente: niente aggiornamenti per giornata (partite
+        contate solo in alcune tabelle) fino al prossimo refresh completo riuscito
+        """
+        previous = self.dataset.tables
+        kept = [name for name, table in tables.items()
+                if table.empty and previous.get(name) is not None and not previous[name].empty]
+        if not kept:
+            return tables, fields
+
+        logger.warning(f"⚠️ Tabelle {', '.join(kept)} non scaricate: restano quelle del dataset precedente")
+        tables = dict(tables, **{name: previous[name] for name in kept})
+        return tables, dict(fields, games=None, kept_tables=kept)
+
+    def _update_aliases(self, tables):
+        """Rigenera aliases.json sulle tabelle appena scaricate (nuovo listone, neopromossi)
+
+        Scritto prima del manifest: gli altri worker ricaricano lo snapshot con gli alias nuovi
+        """
+        try:
+            aliases = learn_aliases(tables.get('standard'))
+            if aliases is not None and aliases != load_aliases():
+                save_aliases(aliases, source=default_listone_path().name)
+        except Exception as e:
+            logger.warning(f"⚠️ Alias del listone non aggiornati: {e}")
+
+    def _matchday_due(self):
+        """True se il prossimo refresh può limitarsi alle partite nuove"""
+        manifest = self.snapshot_manifest or {}
+        if not self.config.incremental or self.dataset.is_empty or manifest.get("games") is None:
+            return False
+        try:
+            full_at = time.mktime(time.strptime(manifest["full_refresh_at"], "%Y-%m-%dT%H:%M:%S"))
+        except (KeyError, ValueError):
+            return False
+        # Refresh completo periodico: corregge eventuali rettifiche di FBref
+        return time.time() - full_at < self.config.full_refresh_days * 86400
+
+    def _matchday_update(self):
+        """(tabelle, manifest, giocatori cambiati) sommando solo le partite nuove, None se non ce ne sono"""
+        dataset = self.dataset
+        manifest = dataset.manifest
+        match_tables, new_games = download_matchday(self.leagues, self.current_season, manifest["games"])
+        if not new_games:
+            logger.info(f"📅 Nessuna partita nuova per {self.config.label}")
+            return None
+
+        tables, changed = fold_match_stats(dataset.tables, match_tables)
+        logger.info(f"📅 {len(new_games)} partite nuove, {len(changed)} giocatori da aggiornare")
+        if changed - set(dataset.name_index.players):
+            # Giocatori mai visti nella stagione (es. acquisti di gennaio)
+            self._update_aliases(tables)
+        manifest = save_snapshot(tables, leagues=self.leagues, seasons=[self.current_season], extra={
+            "games": sorted(set(manifest["games"]) | set(new_games)),
+            "full_refresh_at": manifest["full_refresh_at"],
+            "download": manifest.get("download"),
+            # Per gli altri worker: ricarico incrementale a partire dallo snapshot precedente
+            "previous_created_at": manifest["created_at"],
+            "changed_players": sorted(changed)
+        })
+        return tables, manifest, changed
+
+    def _snapshot_is_stale(self):
+        """True se lo snapshot su disco manca o è più vecchio dell'intervallo di refresh"""
+        age = snapshot_age()
+        return age is None or age >= (self.refresher.interval or 0)
+
+    def _watch_files(self):
+        """Controllo periodico del refresher: snapshot di altri worker e listone modificato"""
+        self.reload_snapshot_if_newer()
+        self._refresh_listone(self.dataset)
+
+    def reload_snapshot_if_newer(self):
+        """Ricarica lo snapshot se un altro worker ne ha scritto uno più recente"""
+        manifest = read_manifest()
+        if not manifest:
+            return False
+        current = self.snapshot_manifest or {}
+        if manifest.get("created_at") == current.get("created_at"):
+            return False
+        return self._load_snapshot()
+
+    def refresh_data(self):
+        """Scarica dati freschi da FBref e pubblica il nuovo dataset (fuori dal percorso richieste)
+
+        Se possibile legge solo le partite giocate dopo l'ultimo snapshot e ricalcola
+        i soli giocatori coinvolti; altrimenti riscarica le statistiche stagionali
+        """
+        previous = changed = None
+        with snapshot_lock() as acquired:
+            if not acquired:
+                raise RuntimeError("Refresh già in corso in un altro worker")
+
+            # None: nessuna partita nuova; False: serve il refresh completo
+            update = False
+            if self._matchday_due():
+                try:
+                    update = self._matchday_update()
+                except Exception as e:
+                    logger.warning(f"⚠️ Aggiornamento per giornata fallito, refresh completo: {e}")
+
+            if update is None:
+                return self.dataset.row_counts()
+
+            if update:
+                tables, manifest, changed = update
+                previous = self.dataset
+            else:
+                tables, fields = self._download_current(no_cache=True)
+                if tables['standard'].empty:
+                    raise RuntimeError("Statistiche standard non disponibili, dataset invariato")
+                tables, fields = self._keep_previous_tables(tables, fields)
+
+                self._update_aliases(tables)
+                manifest = None
+                try:
+                    manifest = save_snapshot(tables, leagues=self.leagues, seasons=[self.current_season],
+                                             extra=fields)
+                except Exception as e:
+                    logger.warning(f"⚠️ Snapshot {self.config.label} non salvato: {e}")
+
+        dataset = FBrefDataset(tables, platform=self.config.platform, manifest=manifest,
+                               previous=previous, changed=changed, aliases=load_aliases())
+        self._publish(dataset)
+        self.soccerdata_available = True
+        return dataset.row_counts()
+
+    def _load_season(self, season):
+        """Dataset di una stagione passata: snapshot in seasons/<stagione>, altrimenti FBref
+
+        Le stagioni concluse non cambiano: nessun refresh dopo il primo caricamento
+        """
+        directory = season_snapshot_dir(season)
+        snapshot = load_snapshot(directory, leagues=self.leagues, seasons=[season])
+        if snapshot is not None:
+            tables, manifest = snapshot
+            return FBrefDataset(tables, platform=self.config.platform, manifest=manifest, season=season,
+                                aliases=load_aliases())
+
+        logger.info(f"📥 Download stagione {season} da FBref {self.config.label}...")
+        tables = download_tables(self.leagues, [season])
+        manifest = None
+        if not tables['standard'].empty:
+            try:
+                manifest = save_snapshot(tables, directory, leagues=self.leagues, seasons=[season])
+            except Exception as e:
+                logger.warning(f"⚠️ Snapshot stagione {season} non salvato: {e}")
+        return FBrefDataset(tables, platform=self.config.platform, manifest=manifest, season=season,
+                            aliases=load_aliases())
+
+    def dataset_for(self, season=None, last_seasons=None):
+        """Dataset di una stagione (corrente se None) o aggregato delle ultime last_seasons
+
+        ValueError per stagioni non configurate, RuntimeError se i dati non sono disponibili
+        """
+        if last_seasons is not None:
+            return self.season_store.aggregate(last_seasons)
+        return self.season_store.get(season)
+
+    def _normalize_player_name(self, player_name):
+        """Nome in minuscolo per la ricerca fuzzy (le abbreviazioni sono nella tabella alias)"""
+        return player_name.lower().strip()
+
+    def _is_goalkeeper(self, matched_player):
+        """Identifica se un giocatore è un portiere"""
+        if not matched_player:
+            return False
+
+        return self.dataset.row_index.is_goalkeeper(matched_player)
+
+    def _find_player(self, player_name, team_name=None, dataset=None):
+        """Trova un giocatore usando fuzzy matching considerando i trasferimenti"""
+        return self._match(player_name, team_name, dataset)[0]
+
+    def _match(self, player_name, team_name=None, dataset=None, record=True):
+        """(giocatore o None, punteggio del match) con tempi per fase in /api/metrics
+
+        record=False per i match interni (listone): non entrano nelle metriche delle richieste
+        """
+        dataset = dataset or self.dataset
+        if dataset.is_empty:
+            return None, None
+
+        if record:
+            stage_seconds, matches, match_score = self.metrics.stage_seconds, self.metrics.matches, self.metrics.match_score
+        else:
+            stage_seconds = matches = match_score = NULL_METRIC
+
+        # Match esatto sulla tabella alias (chiavi canoniche FBref + nomi del listone)
+        start = time.perf_counter()
+        alias = dataset.aliases.lookup(player_name, team_name)
+        stage_seconds.observe(time.perf_counter() - start, "alias")
+        if alias:
+            matches.inc("alias")
+            logger.debug(f"🔄 Alias: '{player_name}' -> '{alias}'")
+            return alias, None
+
+        # Normalizza il nome di input
+        start = time.perf_counter()
+        normalized_input = self._normalize_player_name(player_name)
+        matched_at = time.perf_counter()
+        stage_seconds.observe(matched_at - start, "normalize")
+        logger.debug(f"🔍 Nome normalizzato: '{player_name}' -> '{normalized_input}'")
+
+        # Cerca il giocatore in TUTTA la Serie A tramite l'indice pre-calcolato
+        best_match, best_score = dataset.name_index.find(
+            normalized_input, team_name, surname_bonus=self.config.surname_bonus
+        )
+        stage_seconds.observe(time.perf_counter() - matched_at, "match")
+
+        if best_match:
+            matches.inc("matched")
+            match_score.observe(best_score)
+            logger.debug(f"🎯 Match trovato: {best_match} - score: {best_score}")
+            return best_match, best_score
+
+        matches.inc("not_found")
+        logger.debug(f"❌ Nessun match trovato per '{player_name}'")
+        return None, None
+
+    def _resolve_listone_player(self, player_name, team_name, dataset):
+        """Giocatore FBref per una riga del listone (stesso matching di /api/player-stats)
+
+        Fuori dalle metriche: ~500 ricerche interne a ogni ricostruzione del listone
+        """
+        return self._match(player_name, team_name, dataset, record=False)[0]
+
+    def _refresh_listone(self, dataset):
+        """Risolve il listone sul dataset (fuori dal percorso richieste), se file o dataset sono cambiati"""
+        try:
+            self.listone.refresh(dataset)
+        except Exception as e:
+            logger.error(f"❌ Errore lettura listone: {e}")
+
+    def get_listone(self):
+        """Ultimo listone risolto, None se il file non è disponibile"""
+        return self.listone.get()
+
+    def _unavailable_payload(self):
+        return dumps({
+            "error": f"SoccerData non disponibile su {self.config.platform}",
+            "message": "Servizio non inizializzato correttamente"
+        })
+
+    def _lookup(self, dataset, player_name, team_name=None):
+        """(giocatore FBref o None, risposta pre-serializzata, score, esito cache)"""
+        # Controlla cache (nome normalizzato + squadra, legata alla versione del dataset)
+        stage_seconds = self.metrics.stage_seconds
+        start = time.perf_counter()
+        cache_key = self.cache.key(player_name, team_name, dataset.version)
+        cached = self.cache.get(cache_key)
+        stage_seconds.observe(time.perf_counter() - start, "cache")
+        if cached is not None:
+            logger.debug(f"📦 Cache hit per {player_name}")
+            return cached + ("hit" if cached[0] else "negative_hit",)
+
+        logger.debug(f"🔍 Ricerca {self.config.label} {player_name} ({team_name or 'auto'})")
+
+        # Trova il giocatore
+        matched_player, score = self._match(player_name, team_name, dataset)
+        if not matched_player:
+            # Cache negativa: i nomi sconosciuti non rifanno la ricerca fuzzy.
+            # Bytes semplici, non EncodedPayload: la risposta HTTP resta no-cache e
+            # un browser o una CDN non conservano il "non trovato" oltre la giornata
+            suggestions = self.config.not_found_suggestions
+            start = time.perf_counter()
+            entry = (None, dumps({
+                "error": f"Giocatore '{player_name}' non trovato",
+                "available_players": dataset.name_index.players[:suggestions] if suggestions else []
+            }), None)
+            stage_seconds.observe(time.perf_counter() - start, "serialize")
+            self.cache.set(cache_key, entry, negative=True)
+            return entry + ("miss",)
+
+        # Risposta pre-calcolata al caricamento dati
+        start = time.perf_counter()
+        payload = dataset.responses.get(matched_player)
+        stage_seconds.observe(time.perf_counter() - start, "fetch")
+        if payload is None:
+            return None, dumps({"error": f"Nessun dato per {matched_player}"}), score, "miss"
+
+        entry = (matched_player, payload, score)
+        self.cache.set(cache_key, entry)
+
+        logger.debug(f"✅ Stats reali recuperate per {matched_player}")
+        return entry + ("miss",)
+
+    def get_player_payload(self, player_name, team_name=None, dataset=None, fields=None):
+        """Restituisce la risposta JSON pre-serializzata (bytes) del giocatore
+
+        dataset: stagione o aggregato da dataset_for(), di default la stagione corrente
+        fields: sezioni di "stats" da includere (sections.parse_fields), None = tutte
+        """
+        if not self.soccerdata_available:
+            return self._unavailable_payload()
+
+        # Un solo riferimento al dataset per tutta la richiesta
+        dataset = dataset or self.dataset
+        start = time.perf_counter()
+        try:
+            player, payload, score, cache = self._lookup(dataset, player_name, team_name)
+        except Exception as e:
+            logger.error(f"❌ Errore recupero stats {self.config.label}: {e}")
+            self.request_log.log("player_stats", "error", name=player_name, team=team_name, season=dataset.season,
+                                 error=str(e), duration_ms=round((time.perf_counter() - start) * 1000, 3))
+            return dumps({"error": f"Errore interno: {str(e)}"})
+
+        if player and fields is not None:
+            payload = dataset.responses.project(player, fields)
+
+        self.request_log.log(
+            "player_stats", "ok" if player else "not_found",
+            name=player_name, team=team_name, season=dataset.season, player=player, score=score, cache=cache,
+            fields=fields,
+            duration_ms=round((time.perf_counter() - start) * 1000, 3)
+        )
+        return payload
+
+    def get_batch_payload(self, players, dataset=None, fields=None):
+        """Risposta unica (bytes) per una lista di coppie (nome, squadra)
+
+        Tutti i nomi vengono risolti sullo stesso dataset, i duplicati una volta sola,
+        e le risposte pre-serializzate sono concatenate senza passare da json
+        """
+        if not self.soccerdata_available:
+            return self._unavailable_payload()
+
+        start = time.perf_counter()
+        dataset = dataset or self.dataset
+        resolved = {}
+        results = []
+        for player_name, team_name in players:
+            key = self.cache.key(player_name, team_name)
+            if key not in resolved:
+                try:
+                    resolved[key] = self._lookup(dataset, player_name, team_name)
+                except Exception as e:
+                    logger.error(f"❌ Errore recupero stats {self.config.label} per {player_name}: {e}")
+                    resolved[key] = e
+
+            entry = resolved[key]
+            if isinstance(entry, Exception):
+                results.append((player_name, team_name, "error", None, f"Errore interno: {entry}"))
+            elif entry[0] is None:
+                results.append((player_name, team_name, "not_found", None, f"Giocatore '{player_name}' non trovato"))
+            elif fields is not None:
+                results.append((player_name, team_name, "ok", entry[0], dataset.responses.project(entry[0], fields)))
+            else:
+                results.append((player_name, team_name, "ok", entry[0], entry[1]))
+
+        serialize_start = time.perf_counter()
+        payload = batch_payload(results)
+        self.metrics.stage_seconds.observe(time.perf_counter() - serialize_start, "serialize")
+
+        found = sum(1 for result in results if result[2] == "ok")
+        not_found = [result[0] for result in results if result[2] != "ok"]
+        self.request_log.log(
+            "player_stats_batch", "ok" if not not_found else "not_found",
+            season=dataset.season, count=len(results), lookups=len(resolved), found=found, not_found=not_found or None,
+            cache_hits=sum(1 for entry in resolved.values() if isinstance(entry, tuple) and entry[3] != "miss"),
+            duration_ms=round((time.perf_counter() - start) * 1000, 3)
+        )
+        return payload
+
+    def get_player_stats(self, player_name, team_name=None, season=None, last_seasons=None):
+        """Recupera statistiche reali del giocatore"""
+        dataset = self.dataset_for(season, last_seasons) if season or last_seasons else None
+        return json.loads(self.get_player_payload(player_name, team_name, dataset))
+
+    def player_table(self, dataset=None):
+        """Roster colonnare del dataset; con i dati del listone se è stato risolto su quel dataset
+
+        Vale per la stagione corrente anche se indicata esplicitamente (?season=, ?last_seasons=1)
+        """
+        dataset = dataset or self.dataset
+        listone = self.get_listone()
+        if listone is not None and listone.table is not None and listone.signature[2] == dataset.version:
+            return listone.table
+        return dataset.player_table
+
+    def query_players(self, filters=None, sort=DEFAULT_SORT, descending=True, limit=DEFAULT_LIMIT, offset=0,
+                      dataset=None):
+        """Pagina del roster filtrata e ordinata (bytes JSON), calcolata sugli array della tabella
+
+        ValueError per filtri o colonne di ordinamento non supportati
+        """
+        if not self.soccerdata_available:
+            return self._unavailable_payload()
+
+        start = time.perf_counter()
+        table = self.player_table(dataset)
+        total, players = table.query(filters, sort, descending, limit, offset)
+        payload = EncodedPayload(dumps({
+            "season": (dataset or self.dataset).season,
+            "count": total,
+            "offset": offset,
+            "limit": limit,
+            "sort": sort,
+            "order": "desc" if descending else "asc",
+            "players": players
+        }))
+        self.request_log.log(
+            "players_query", season=(dataset or self.dataset).season, filters=filters or None, sort=sort,
+            count=total, returned=len(players), duration_ms=round((time.perf_counter() - start) * 1000, 3)
+        )
+        return payload
+
+    def similar_players(self, player_name, team_name=None, filters=None, k=DEFAULT_K, dataset=None):
+        """Giocatori più simili per profilo statistico (bytes JSON), None se il nome non è trovato
+
+        filters: come /api/players; di default stesso ruolo del giocatore e almeno
+        MIN_MINUTES minuti. ValueError per filtri non supportati o aggregazioni
+        """
+        if not self.soccerdata_available:
+            return self._unavailable_payload()
+
+        start = time.perf_counter()
+        current = dataset or self.dataset
+        index = current.similarity
+        if index is None:
+            raise ValueError("Ricerca simili disponibile solo per una singola stagione")
+
+        player, _ = self._match(player_name, team_name, current)
+        if not player:
+            self.request_log.log("players_similar", "not_found", name=player_name, team=team_name,
+                                 season=current.season, duration_ms=round((time.perf_counter() - start) * 1000, 3))
+            return None
+
+        table = self.player_table(current)
+        target = table.row(player)
+        filters = dict(filters or {})
+        if "ruolo" not in filters and "ruolo_mantra" not in filters:
+            # Stesso ruolo: dal listone, altrimenti dalla posizione FBref
+            role = target["ruolo"] or current.normalization.roles[index.index[player]]
+            if role:
+                filters["ruolo"] = [role]
+        filters.setdefault("min_minuti", float(MIN_MINUTES))
+
+        nearest = index.nearest(player, table.mask(filters), k)
+
+        def summary(row, **extra):
+            return dict({
+                "player": row["player"],
+                "team": row["team"],
+                "ruolo": row["ruolo"],
+                "ruolo_mantra": row["ruolo_mantra"],
+                "fvm": row.get("fvm"),
+                "qt_a": row.get("qt_a"),
+                "minuti": row["minuti"],
+                "gol_assist_90": row["gol_assist_90"]
+            }, **extra)
+
+        payload = EncodedPayload(dumps({
+            "season": current.season,
+            "player": summary(target),
+            "filters": filters,
+            "k": k,
+            "count": len(nearest),
+            "simili": [summary(table.row(other), similarita=round(score, 3)) for other, score in nearest]
+        }))
+        self.request_log.log(
+            "players_similar", name=player_name, team=team_name, player=player, season=current.season,
+            filters=filters, count=len(nearest), duration_ms=round((time.perf_counter() - start) * 1000, 3)
+        )
+        return payload
+
+    def get_insights_ranking(self, metric="bonus_malus_attesi", limit=20, portieri=None):
+        """Classifica del roster letta dagli insights pre-calcolati"""
+        return rank_insights(self.dataset.insights, metric, limit, portieri)
@@ -0,0 +1,72 @@
+"""
+Ricerca di giocatori simili per /api/players/<nome>/similar
+Profilo di ogni giocatore = tassi per 90' e percentuali della normalizzazione,
+standardizzati (z-score sui giocatori con minuti sufficienti) e normalizzati a
+norma 1: la similarità coseno è un prodotto matrice-vettore float32 sui soli
+candidati che passano i filtri di ruolo e fascia FVM
+"""
+
+import numpy as np
+
+DEFAULT_K = 10
+MAX_K = 50
+
+
+class SimilarityIndex:
+    """Matrice float32 giocatori x statistiche con righe a norma unitaria
+
+    Le righe seguono l'ordine di normalization.players, lo stesso della PlayerTable
+    del dataset (righe correnti di standard): le maschere della tabella si applicano
+    direttamente
+    """
+
+    def __init__(self, players, features, names):
+        self.players = players
+        self.index = {player: row for row, player in enumerate(players)}
+        self.features = features
+        self.names = names
+
+    def __len__(self):
+        return len(self.players)
+
+    @classmethod
+    def from_normalization(cls, normalization):
+        """Profili standardizzati: media e deviazione dai giocatori con minuti sufficienti
+
+        I valori mancanti (es. statistiche da portiere per gli altri ruoli) valgono
+        la media, cioè 0 dopo la standardizzazione
+        """
+        values = normalization.values.astype(np.float64)
+        reference = values[normalization.qualified] if normalization.qualified.any() else values
+        present = ~np.isnan(reference)
+        counts = np.maximum(present.sum(axis=0), 1)
+        mean = np.where(present, reference, 0).sum(axis=0) / counts
+        std = np.sqrt(np.where(present, (reference - mean) ** 2, 0).sum(axis=0) / counts)
+        features = (values - mean) / np.where(std > 0, std, 1)
+        features[np.isnan(features)] = 0
+
+        norms = np.linalg.norm(features, axis=1)
+        features /= np.where(norms > 0, norms, 1)[:, None]
+        return cls(list(normalization.players), features.astype(np.float32), normalization.value_names)
+
+    def nearest(self, player, mask, k=DEFAULT_K):
+        """[(giocatore, similarità coseno)] dei k candidati più vicini, il giocatore escluso
+
+        mask: maschera booleana dei candidati allineata alle righe dell'indice
+        """
+        row = self.index.get(player)
+        if row is None:
+            return []
+        candidates = np.flatnonzero(mask)
+        candidates = candidates[candidates != row]
+        if not len(candidates) or k <= 0:
+            return []
+
+        scores = self.features[candidates] @ self.features[row]
+        if len(candidates) > k:
+            # Solo i k migliori vengono ordinati
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.players[candidates[position]], float(scores[position])) for position in top]
@@ -0,0 +1,400 @@
+"""
+Snapshot locale delle tabelle FBref (Feather + manifest JSON)
+Permette un avvio a freddo in meno di un secondo senza scaricare da FBref.
+La stagione corrente sta nella cartella principale, le stagioni passate
+(caricate su richiesta) in seasons/<stagione>. Aggiornamento esplicito:
+
+    python -m fbref_core.snapshot --dir data/fbref_snapshot --seasons 2425 2324
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+import contextlib
+from pathlib import Path
+from queue import Empty, SimpleQueue
+
+import pandas as pd
+
+from .seasons import sort_seasons
+
+logger = logging.getLogger(__name__)
+
+# Versione del formato su disco: uno snapshot con versione diversa viene ignorato
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".refresh.lock"
+STAT_TYPES = ('standard', 'shooting', 'passing', 'keeper', 'defense', 'possession', 'gca')
+# Download delle tabelle: tentativi per tabella, attesa iniziale (raddoppia ad ogni
+# tentativo) e tempo massimo per tabella, tentativi compresi
+FETCH_ATTEMPTS = 3
+FETCH_BACKOFF_SECONDS = 2.0
+DEFAULT_TABLE_TIMEOUT = 180
+# Lettori FBref in parallelo: pochi, ognuno con l'attesa tra richieste di soccerdata
+# moltiplicata per il loro numero (verso FBref la stessa frequenza di un solo lettore)
+DEFAULT_FETCH_WORKERS = 3
+DEFAULT_LEAGUES = ['ITA-Serie A']
+DEFAULT_SEASONS = ['2425']
+
+
+def default_snapshot_dir():
+    """Cartella dello snapshot (override con FBREF_SNAPSHOT_DIR)"""
+    env_dir = os.environ.get('FBREF_SNAPSHOT_DIR')
+    if env_dir:
+        return Path(env_dir)
+    return Path(__file__).resolve().parent.parent / "data" / "fbref_snapshot"
+
+
+def season_snapshot_dir(season, directory=None):
+    """Cartella dello snapshot di una stagione passata"""
+    return Path(directory or default_snapshot_dir()) / "seasons" / str(season)
+
+
+def _flatten(table):
+    """DataFrame piatto con colonne posizionali, scrivibile in Feather"""
+    flat = table.set_axis([f"c{i}" for i in range(table.shape[1])], axis=1)
+    flat = flat.reset_index()
+    return flat
+
+
+def _write_table(table, path):
+    """Scrive una tabella in Feather non compresso (memory-mappable)"""
+    flat = _flatten(table)
+    try:
+        flat.to_feather(path, compression='uncompressed')
+    except Exception:
+        # Colonne object con tipi misti: si salvano come stringhe
+        for column in flat.columns[flat.dtypes == object]:
+            flat[column] = flat[column].astype('string')
+        flat.to_feather(path, compression='uncompressed')
+
+
+def _read_table(path, index_names, columns):
+    """Legge una tabella Feather via memory map e ripristina MultiIndex e colonne
+
+    Le colonne numeriche senza valori nulli restano appoggiate al file mappato
+    (split_blocks): più worker che leggono lo stesso snapshot condividono le pagine
+    """
+    from pyarrow import feather
+
+    arrow_table = feather.read_table(str(path), memory_map=True)
+    data_columns = [name for name in arrow_table.column_names if name not in index_names]
+
+    index_frame = arrow_table.select(index_names).to_pandas()
+    table = arrow_table.select(data_columns).to_pandas(split_blocks=True)
+
+    if len(index_names) > 1:
+        table.index = pd.MultiIndex.from_frame(index_frame)
+    else:
+        table.index = pd.Index(index_frame.iloc[:, 0], name=index_names[0])
+
+    if columns and all(isinstance(column, list) for column in columns):
+        table.columns = pd.MultiIndex.from_tuples([tuple(column) for column in columns])
+    else:
+        table.columns = pd.Index(columns)
+    return table
+
+
+def _column_labels(table):
+    """Etichette delle colonne serializzabili in JSON (le tuple diventano liste)"""
+    return [list(column) if isinstance(column, tuple) else column for column in table.columns]
+
+
+def save_snapshot(tables, directory=None, leagues=None, seasons=None, extra=None):
+    """Salva le tabelle FBref e il manifest nella cartella indicata
+
+    extra: campi aggiuntivi del manifest (partite incluse, ultimo refresh completo)
+    """
+    directory = Path(directory or default_snapshot_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "leagues": list(leagues or DEFAULT_LEAGUES),
+        "seasons": list(seasons or DEFAULT_SEASONS),
+        "tables": {}
+    }
+    manifest.update(extra or {})
+
+    for name, table in tables.items():
+        if table is None or table.empty:
+            manifest["tables"][name] = {"file": None, "rows": 0}
+            continue
+
+        file_name = f"{name}.feather"
+        tmp_path = directory / f".{file_name}.tmp"
+        _write_table(table, tmp_path)
+        os.replace(tmp_path, directory / file_name)
+
+        manifest["tables"][name] = {
+            "file": file_name,
+            "rows": len(table),
+            "index": list(table.index.names),
+            "columns": _column_labels(table)
+        }
+
+    # Il manifest viene scritto per ultimo: uno snapshot incompleto non è mai valido
+    tmp_manifest = directory / f".{MANIFEST_FILE}.tmp"
+    tmp_manifest.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp_manifest, directory / MANIFEST_FILE)
+
+    logger.info(f"💾 Snapshot FBref salvato in {directory}")
+    return manifest
+
+
+def read_manifest(directory=None):
+    """Manifest dello snapshot su disco, None se assente o non leggibile"""
+    manifest_path = Path(directory or default_snapshot_dir()) / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+
+    try:
+        return json.loads(manifest_path.read_text(encoding='utf-8'))
+    except Exception as e:
+        logger.warning(f"⚠️ Manifest snapshot non leggibile: {e}")
+        return None
+
+
+def snapshot_age(directory=None):
+    """Secondi trascorsi dalla creazione dello snapshot, None se assente"""
+    manifest = read_manifest(directory)
+    if not manifest:
+        return None
+    try:
+        created = time.mktime(time.strptime(manifest["created_at"], "%Y-%m-%dT%H:%M:%S"))
+    except (KeyError, ValueError):
+        return None
+    return time.time() - created
+
+
+@contextlib.contextmanager
+def snapshot_lock(directory=None):
+    """Lock esclusivo non bloccante sulla cartella dello snapshot
+
+    Con più worker gunicorn un solo processo alla volta scarica e riscrive lo
+    snapshot; restituisce False se il lock è già preso da un altro processo
+    """
+    directory = Path(directory or default_snapshot_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+
+    try:
+        import fcntl
+    except ImportError:
+        # Piattaforme senza fcntl: nessun coordinamento tra processi
+        yield True
+        return
+
+    with open(directory / LOCK_FILE, 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_snapshot(directory=None, leagues=None, seasons=None):
+    """Carica (tabelle, manifest) dallo snapshot, None se assente o non compatibile"""
+    directory = Path(directory or default_snapshot_dir())
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        logger.warning("⚠️ Snapshot con formato diverso, ignorato")
+        return None
+    if leagues and manifest.get("leagues") != list(leagues):
+        logger.warning(f"⚠️ Snapshot per leghe {manifest.get('leagues')}, ignorato")
+        return None
+    if seasons and manifest.get("seasons") != list(seasons):
+        logger.warning(f"⚠️ Snapshot per stagioni {manifest.get('seasons')}, ignorato")
+        return None
+
+    try:
+        tables = {}
+        for name, info in manifest.get("tables", {}).items():
+            if not info.get("file"):
+                tables[name] = pd.DataFrame()
+                continue
+            tables[name] = _read_table(directory / info["file"], info["index"], info["columns"])
+    except Exception as e:
+        logger.warning(f"⚠️ Snapshot non caricabile: {e}")
+        return None
+
+    return tables, manifest
+
+
+def table_timeout_from_env(default=DEFAULT_TABLE_TIMEOUT):
+    """Secondi massimi per il download di una tabella (FBREF_TABLE_TIMEOUT)"""
+    try:
+        return max(1.0, float(os.environ.get('FBREF_TABLE_TIMEOUT', default)))
+    except ValueError:
+        return default
+
+
+def fetch_workers_from_env(default=DEFAULT_FETCH_WORKERS):
+    """Lettori FBref in parallelo (FBREF_FETCH_WORKERS, 1 = una tabella alla volta)"""
+    try:
+        return max(1, int(os.environ.get('FBREF_FETCH_WORKERS', default)))
+    except ValueError:
+        return default
+
+
+def _fetch_table(fbref, stat_type, deadline):
+    """Una tabella stagionale con retry e backoff esponenziale entro la scadenza"""
+    delay = FETCH_BACKOFF_SECONDS
+    for attempt in range(1, FETCH_ATTEMPTS + 1):
+        try:
+            return fbref.read_player_season_stats(stat_type=stat_type)
+        except Exception as e:
+            if attempt == FETCH_ATTEMPTS or time.monotonic() + delay >= deadline:
+                raise
+            logger.warning(f"⚠️ {stat_type}: tentativo {attempt} fallito ({e}), nuovo tentativo tra {delay:.1f}s")
+            time.sleep(delay)
+            delay *= 2
+
+
+def fetch_tables(leagues=None, seasons=None, stat_types=STAT_TYPES, no_cache=False, timeout=None, workers=None):
+    """(tabelle, esito per tabella) scaricate da FBref (via soccerdata) con pochi lettori in parallelo
+
+    Ogni lettore ha la sua istanza FBref, con l'attesa tra richieste moltiplicata per
+    il numero di lettori: il limite verso FBref resta quello di un solo lettore, ma le
+    tabelle già nella cache su file e quelle lente non si attendono a vicenda.
+    Il timeout vale per tabella, da quando un lettore la inizia. Una lettura bloccata
+    non si può interrompere: la tabella è data per scaduta, il suo lettore (thread
+    daemon) esce dal pool appena la lettura ritorna, con il risultato scartato, e al
+    suo posto ne parte un altro. Esito: {tabella: {"status": "ok" | "error" | "timeout",
+    "rows", "seconds", "error"}}
+    """
+    import soccerdata as sd
+
+    leagues = list(leagues or DEFAULT_LEAGUES)
+    seasons = list(seasons or DEFAULT_SEASONS)
+    timeout = timeout or table_timeout_from_env()
+    workers = max(1, min(workers or fetch_workers_from_env(), len(stat_types)))
+
+    pending = SimpleQueue()
+    for stat_type in stat_types:
+        pending.put(stat_type)
+    results = SimpleQueue()
+    lock = threading.Lock()
+    started = {}
+    expired = set()
+
+    def reader():
+        fbref = None
+        while True:
+            try:
+                stat_type = pending.get_nowait()
+            except Empty:
+                return
+            start = time.monotonic()
+            with lock:
+                started[stat_type] = start
+            try:
+                if fbref is None:
+                    fbref = sd.FBref(leagues=leagues, seasons=seasons, no_cache=no_cache)
+                    if getattr(fbref, 'rate_limit', None):
+                        fbref.rate_limit *= workers
+                results.put((stat_type, _fetch_table(fbref, stat_type, start + timeout), None))
+            except Exception as e:
+                results.put((stat_type, None, e))
+            with lock:
+                if stat_type in expired:
+                    return
+
+    def start_reader():
+        threading.Thread(target=reader, name="fbref-fetch", daemon=True).start()
+
+    for _ in range(workers):
+        start_reader()
+
+    tables = {}
+    report = {}
+    while len(report) < len(stat_types):
+        now = time.monotonic()
+        with lock:
+            running = {stat_type: start for stat_type, start in started.items() if stat_type not in report}
+        for stat_type, start in running.items():
+            if now < start + timeout:
+                continue
+            with lock:
+                expired.add(stat_type)
+            tables[stat_type] = pd.DataFrame()
+            report[stat_type] = {"status": "timeout", "rows": 0, "seconds": round(now - start, 1),
+                                 "error": f"oltre il timeout di {timeout:.0f}s"}
+            logger.warning(f"⚠️ Statistiche {stat_type} oltre il timeout di {timeout:.0f}s, tabella vuota")
+            # Il lettore bloccato non torna nel pool: ne parte un altro per le tabelle restanti
+            start_reader()
+
+        if len(report) == len(stat_types):
+            break
+        deadlines = [start + timeout - now for stat_type, start in running.items() if stat_type not in report]
+        try:
+            stat_type, table, error = results.get(timeout=max(0.01, min(deadlines + [1.0])))
+        except Empty:
+            continue
+        if stat_type in report:
+            # Arrivata dopo il timeout: scartata
+            continue
+
+        seconds = round(time.monotonic() - started[stat_type], 1)
+        if error is None:
+            tables[stat_type] = table
+            report[stat_type] = {"status": "ok", "rows": len(table), "seconds": seconds}
+            logger.info(f"✅ {stat_type}: {len(table)} righe in {seconds}s")
+        else:
+            tables[stat_type] = pd.DataFrame()
+            report[stat_type] = {"status": "error", "rows": 0, "seconds": seconds, "error": str(error)}
+            logger.warning(f"⚠️ Statistiche {stat_type} non disponibili: {error}")
+
+    return ({stat_type: tables[stat_type] for stat_type in stat_types},
+            {stat_type: report[stat_type] for stat_type in stat_types})
+
+
+def download_tables(leagues=None, seasons=None, stat_types=STAT_TYPES, no_cache=False, timeout=None):
+    """Tabelle stagionali da FBref (vuote se fallite o scadute), vedi fetch_tables"""
+    return fetch_tables(leagues, seasons, stat_types, no_cache, timeout)[0]
+
+
+def main():
+    """Scarica i dati FBref e aggiorna lo snapshot su disco"""
+    parser = argparse.ArgumentParser(description="Aggiorna lo snapshot locale delle statistiche FBref")
+    parser.add_argument("--dir", default=None, help="cartella dello snapshot")
+    parser.add_argument("--leagues", nargs="+", default=DEFAULT_LEAGUES)
+    parser.add_argument("--seasons", nargs="+", default=DEFAULT_SEASONS,
+                        help="la più recente è la stagione corrente, le altre vanno in seasons/")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    seasons = sort_seasons(args.seasons)
+    for position, season in enumerate(seasons):
+        start = time.time()
+        tables = download_tables(args.leagues, [season])
+        if tables.get('standard') is None or tables['standard'].empty:
+            logger.error(f"❌ Statistiche standard {season} non disponibili, snapshot non aggiornato")
+            raise SystemExit(1)
+
+        directory = args.dir if position == 0 else season_snapshot_dir(season, args.dir)
+        manifest = save_snapshot(tables, directory, args.leagues, [season])
+        rows = {name: info["rows"] for name, info in manifest["tables"].items()}
+        logger.info(f"🎯 Snapshot {season} aggiornato in {time.time() - start:.1f}s: {rows}")
+
+        if position == 0:
+            # Alias del listone risolti sulla nuova stagione corrente
+            from .aliases import write_aliases
+            try:
+                write_aliases(directory)
+            except Exception as e:
+                logger.warning(f"⚠️ Alias del listone non generati: {e}")
+
+
+if __name__ == '__main__':
+    main()
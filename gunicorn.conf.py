@@ -0,0 +1,42 @@
+"""
+Configurazione gunicorn per i backend FBref
+
+    Railway:  gunicorn -c gunicorn.conf.py railway_app:app
+    Oracle:   PORT=5003 gunicorn -c gunicorn.conf.py oracle_app:app
+
+Il dataset viene caricato una sola volta nel master (preload_app) e condiviso
+copy-on-write tra i worker; ogni worker serve più richieste in parallelo (gthread).
+"""
+
+import gc
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Worker e thread configurabili da variabili d'ambiente
+workers = int(os.environ.get('WEB_CONCURRENCY', min(4, multiprocessing.cpu_count())))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+
+# Tabelle, indici e risposte pre-serializzate costruiti prima del fork
+preload_app = True
+
+# Il primo avvio senza snapshot scarica da FBref nel master: timeout ampio
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    """Congela gli oggetti del master: il GC dei worker non li tocca più
+    e le pagine restano condivise invece di essere copiate ad ogni ciclo"""
+    gc.freeze()
+    server.log.info(f"🧊 gc.freeze: {gc.get_freeze_count()} oggetti condivisi tra {workers} worker")
+
+
+def post_worker_init(worker):
+    """Avvia il refresher nel worker: i thread non sopravvivono al fork del master"""
+    service = worker.wsgi.extensions.get('fbref_service')
+    if service is not None:
+        service.refresher.start()